@@ -1,15 +1,18 @@
-import asyncio
+import asyncio, os, sys
 from autogen_agentchat.ui import Console
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 from autogen_ext.agents.web_surfer import MultimodalWebSurfer
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "browse_use"))
+import llm_pool
+
 
 async def main() -> None:
     # Define an agent
     web_surfer_agent = MultimodalWebSurfer(
         name="MultimodalWebSurfer",
-        model_client=OpenAIChatCompletionClient(model="gpt-4o-2024-08-06"),
+        model_client=OpenAIChatCompletionClient(model="gpt-4o-2024-08-06", **llm_pool.sdk_kwargs()),
         headless=False,
     )
 
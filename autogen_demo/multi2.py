@@ -1,4 +1,4 @@
-import asyncio, json
+import asyncio, json, os, sys
 from typing import Sequence, TypedDict, Any
 from playwright.async_api import async_playwright
 
@@ -10,6 +10,10 @@ from autogen_agentchat.ui import Console
 from autogen_ext.agents.web_surfer import MultimodalWebSurfer
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "browse_use"))
+import llm_pool
+from llm_pool import Priority
+
 # ───────────────────────────────────────────────────────
 # 1.  Shared state 
 # ───────────────────────────────────────────────────────
@@ -25,15 +29,16 @@ class BBGMState(TypedDict, total=False):
 def make_team() -> SelectorGroupChat:
     """Return a SelectorGroupChat with one acting agent + advisors."""
 
-    llm_big   = OpenAIChatCompletionClient(model="gpt-4o-mini")  # Use mini for speed
-    llm_small = OpenAIChatCompletionClient(model="gpt-4o-mini")
+    llm_big   = OpenAIChatCompletionClient(model="gpt-4o-mini", **llm_pool.sdk_kwargs())  # Use mini for speed
+    llm_small = OpenAIChatCompletionClient(model="gpt-4o-mini", **llm_pool.sdk_kwargs())
+    llm_advice = OpenAIChatCompletionClient(model="gpt-4o-mini", **llm_pool.sdk_kwargs(Priority.ADVISORY))
 
     # ————— Ultra-concise advisor archetype —————
     def advisor(name: str, role_spec: str) -> AssistantAgent:
         return AssistantAgent(
             name,
             description=f"{name} advisor",
-            model_client=llm_big,
+            model_client=llm_advice,
             system_message=role_spec
         )
 
@@ -1,4 +1,4 @@
-import asyncio, json
+import asyncio, json, os, sys
 from typing import Sequence, TypedDict, Any
 from playwright.async_api import async_playwright
 
@@ -10,6 +10,15 @@ from autogen_agentchat.ui import Console
 from autogen_ext.agents.web_surfer import MultimodalWebSurfer, PlaywrightController
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "browse_use"))
+from league_export import LeagueExporter
+import fast_browse
+import gm_config
+import llm_pool
+from llm_pool import Priority
+import league_snapshot
+from trade_rules import TradeRules, check_trades
+
 # ───────────────────────────────────────────────────────
 # 1.  Shared state (NO Playwright types, avoid Pydantic error)
 # ───────────────────────────────────────────────────────
@@ -29,24 +38,56 @@ def sim_one_week(shared: dict):
     sel = 'button:has-text("One week")'
     return asyncio.run(shared["page"].click(sel))
 
+async def refresh_league(shared: dict):
+    """Re-export the league so trades and signings since the last export show up.
+
+    Stores whose fingerprint has not changed are not sent back, so calling this
+    before every check is cheap. Keeps the previous snapshot if the export fails.
+    """
+    exporter = shared.get("exporter")
+    if exporter is None:
+        return None
+    try:
+        snapshot = await exporter.export(shared["page"])
+        shared["state"]["roster_json"] = snapshot.roster_json()
+    except Exception as e:
+        print(f"Could not export league roster: {e}")
+    return exporter.snapshot
+
 # ───────────────────────────────────────────────────────
 # 3.  Build agents with detailed prompts
 # ───────────────────────────────────────────────────────
 def make_team(shared_browser: dict) -> SelectorGroupChat:
     """Return a SelectorGroupChat with one acting agent + four advisors."""
 
-    llm_big   = OpenAIChatCompletionClient(model="gpt-4o")
-    llm_small = OpenAIChatCompletionClient(model="gpt-4o-mini")  # router LLM
+    llm_big   = OpenAIChatCompletionClient(model="gpt-4o", **llm_pool.sdk_kwargs())
+    llm_small = OpenAIChatCompletionClient(model="gpt-4o-mini", **llm_pool.sdk_kwargs())  # router LLM
+    # advisors queue behind the coach and the router when the gpt-4o budget runs short
+    llm_advice = OpenAIChatCompletionClient(model="gpt-4o", **llm_pool.sdk_kwargs(Priority.ADVISORY))
 
-    # ————— Advisor archetype (text-only) —————
-    def advisor(name: str, role_spec: str) -> AssistantAgent:
+    # ————— Advisor archetype (text-only, optional local tools) —————
+    def advisor(name: str, role_spec: str, tools=None) -> AssistantAgent:
         return AssistantAgent(
             name,
             description=f"{name} advisor",
-            model_client=llm_big,
-            system_message=role_spec
+            model_client=llm_advice,
+            system_message=role_spec,
+            tools=tools,
+            reflect_on_tool_use=bool(tools),
         )
 
+    async def check_trade_legality(trade: str) -> str:
+        """Check a trade against the league's salary-matching (125% rule), roster-size and hard-cap rules.
+
+        Write the trade as two sections, "Your team trades away:" and "Your team receives:",
+        with one "- Player Name ($12.5M)" line per player and "- 2026 1st round pick" per pick.
+        """
+        # payrolls and rosters as they are now, not as they were before the coach's last move
+        snapshot = await refresh_league(shared_browser)
+        rules = TradeRules.from_snapshot(snapshot) if snapshot is not None else TradeRules()
+        report = check_trades([trade], rules)
+        return "LEGAL" if report.legal[0] else "ILLEGAL: " + "; ".join(report.reasons[0])
+
     trade_adv = advisor("TradeAdvisor", """
 You are TradeAdvisor, an expert in NBA trades and the Basketball GM trade system. Your job is to analyze the team's current roster, assets, and trade block, and provide actionable trade recommendations.
 
@@ -59,6 +100,7 @@ When asked:
 
 Constraints:
 - Only suggest trades that are possible within the game's salary cap and trade rules
+- Run every trade you suggest through the check_trade_legality tool first and only recommend trades it reports as LEGAL
 - Prioritize trades that improve the team's championship odds
 - Be concise and specific in your advice
 
@@ -68,7 +110,7 @@ Example questions you might receive:
 - "Which players should we put on the trade block?"
 
 Your mission: Help CoachBot make the best possible trades to build a championship contender.
-""")
+""", tools=[check_trade_legality])
 
     fa_adv = advisor("FAAdvisor", """
 You are FAAdvisor, an expert in free agent signings and contract management in Basketball GM. Your job is to identify the best available free agents and advise on contract offers.
@@ -137,7 +179,7 @@ Your mission: Help CoachBot time simulations optimally for the best possible sea
         description="Controls the UI based on advisors' input.",
         model_client=llm_big,
         headless=False,
-        start_page="https://play.basketball-gm.com/l/1",
+        start_page=gm_config.url("/l/1"),
         animate_actions=True,
         to_save_screenshots=True,  # Save screenshots for debugging
         use_ocr=True,  # Enable OCR for better text recognition
@@ -217,7 +259,10 @@ REMEMBER: You MUST take actual browser actions after consulting advisors. Do not
 
 
 async def create_new_league(page):
-    await page.goto("https://play.basketball-gm.com/l/1/trade")
+    # GM_LEAGUE_SNAPSHOT: restore a saved league instead of creating one
+    if await league_snapshot.restore_configured(page) is not None:
+        return
+    await page.goto(gm_config.url("/l/1/trade"))
 
     await page.get_by_role("link", name="Create a new league").click()
     await page.get_by_role("button", name="Random").click()
@@ -236,15 +281,12 @@ async def create_new_league(page):
 async def main():
     # Only create one Playwright tab and pass it in shared
     pw = await async_playwright().start()
-    browser = await pw.chromium.launch(
-        headless=False,
-    )
-    context = await browser.new_context(
-        viewport={'width': 1920, 'height': 1080}  # Set a large viewport
+    browser = await fast_browse.launch(pw)  # GM_FAST_BROWSE=1 for headless, no images/ads
+    context = await fast_browse.new_context(
+        browser,
+        viewport={'width': 1920, 'height': 1080}  # Set a large viewport (the fast profile uses a small one)
     )
     page = await context.new_page()
-    await page.goto("https://play.basketball-gm.com/l/1/trade")
-
     await create_new_league(page)
 
     shared = {
@@ -252,9 +294,15 @@ async def main():
         "state": BBGMState(phase="preseason", moves_left=100, last_advice="")
     }
 
+    # Dump the roster straight from the game's IndexedDB so advisors see real contracts
+    shared["exporter"] = LeagueExporter()
+    await refresh_league(shared)
+
     team = make_team(shared)  # Only CoachBot gets browser power
 
     task = "Start a new league and win the championship following phase rules."
+    if shared["state"].get("roster_json"):
+        task += f"\n\nCurrent roster (JSON): {shared['state']['roster_json']}"
     await Console(team.run_stream(task=task))
 
     await browser.close()
@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from generate_trade_examples import iter_trade_texts
+from reward_registry import RewardModelRegistry, file_sha256
+from test_reward import evaluate_trade
+
+DEFAULT_BATCH_SIZES = [1, 8, 64, 512]
+
+# Metrics compared against a baseline, and whether bigger is better
+TRACKED_METRICS = {
+    "cold_load_ms": False,
+    "load_ms": False,
+    "single.p50_ms": False,
+    "single.p95_ms": False,
+    "single.p99_ms": False,
+    "peak_rss_mb": False,
+}
+
+# Measured in a fresh interpreter so imports (sklearn, joblib) count, as they do when web2.py starts
+_COLD_LOAD = """
+import sys, time, json, resource
+t0 = time.perf_counter()
+from reward_registry import RewardModelRegistry
+RewardModelRegistry(sys.argv[1], follow_compact=False).refresh()
+print(json.dumps({"ms": (time.perf_counter() - t0) * 1000,
+                  "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def synthetic_corpus(n: int, seed: int = 0) -> List[str]:
+    """Trade descriptions in the same format the feedback file is trained on."""
+    return list(iter_trade_texts(n, seed))
+
+
+def cold_load(path: str) -> Dict[str, float]:
+    here = os.path.dirname(os.path.abspath(__file__))
+    # prepend, so venvs and --target installs that rely on PYTHONPATH still import
+    pythonpath = os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")]))
+    out = subprocess.run([sys.executable, "-c", _COLD_LOAD, os.path.abspath(path)],
+                         capture_output=True, text=True, check=True, env={**os.environ, "PYTHONPATH": pythonpath})
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def percentiles(samples_s: List[float]) -> Dict[str, float]:
+    ms = np.asarray(samples_s) * 1000
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+    }
+
+
+def run(model_path: str, corpus_size: int = 2000, batch_sizes: Optional[List[int]] = None,
+        single_trades: int = 500, seed: int = 0) -> dict:
+    batch_sizes = batch_sizes or DEFAULT_BATCH_SIZES
+    corpus = synthetic_corpus(corpus_size, seed)
+    cold = cold_load(model_path)
+
+    t0 = time.perf_counter()
+    registry = RewardModelRegistry(model_path, follow_compact=False)  # exactly the file asked for
+    registry.refresh()
+    load_ms = (time.perf_counter() - t0) * 1000
+
+    # single trades through test_reward.evaluate_trade, the same call path web2.py scores with
+    evaluate_trade(corpus[0], registry)  # warm-up
+    single = []
+    for text in corpus[:single_trades]:
+        t0 = time.perf_counter()
+        evaluate_trade(text, registry)
+        single.append(time.perf_counter() - t0)
+
+    throughput = {}
+    for size in batch_sizes:
+        t0 = time.perf_counter()
+        for i in range(0, len(corpus), size):
+            registry.score(corpus[i:i + size])
+        throughput[str(size)] = len(corpus) / (time.perf_counter() - t0)
+
+    return {
+        "model": model_path,
+        "model_sha256": file_sha256(model_path)[:12],
+        "model_bytes": os.path.getsize(model_path),
+        "corpus_size": corpus_size,
+        "seed": seed,
+        "cold_load_ms": cold["ms"],
+        "cold_load_rss_mb": cold["rss_mb"],
+        "load_ms": load_ms,
+        "single": percentiles(single),
+        "throughput_per_s": throughput,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "env": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def _lookup(result: dict, key: str):
+    value = result
+    for part in key.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def compare(result: dict, baseline: dict, tolerance: float = 0.2) -> List[str]:
+    """Metrics that got worse than the baseline by more than tolerance (a fraction)."""
+    metrics = dict(TRACKED_METRICS)
+    metrics.update({f"throughput_per_s.{size}": True for size in result["throughput_per_s"]})
+    regressions = []
+    for key, higher_is_better in metrics.items():
+        new, old = _lookup(result, key), _lookup(baseline, key)
+        if new is None or not old:
+            continue
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(f"{key}: {old:.3f} -> {new:.3f} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reward model loading and scoring on synthetic trades")
+    parser.add_argument("--model", default="reward_model.pkl", help=".pkl or compact .npz reward model")
+    parser.add_argument("--corpus-size", type=int, default=2000)
+    parser.add_argument("--batch-sizes", default=",".join(map(str, DEFAULT_BATCH_SIZES)))
+    parser.add_argument("--single", type=int, default=500, help="trades scored one at a time for the percentiles")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_reward.json")
+    parser.add_argument("--baseline", default=None, help="earlier --out file to flag regressions against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging, e.g. 0.2 = 20%%")
+    args = parser.parse_args()
+
+    result = run(args.model, args.corpus_size, [int(s) for s in args.batch_sizes.split(",")], args.single, args.seed)
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2)
+
+    single = result["single"]
+    print(f"{args.model} ({result['model_bytes']} bytes, {result['model_sha256']})")
+    print(f"  load       cold {result['cold_load_ms']:.1f} ms (fresh interpreter), in-process {result['load_ms']:.1f} ms")
+    print(f"  single     p50 {single['p50_ms']:.3f} ms, p95 {single['p95_ms']:.3f} ms, p99 {single['p99_ms']:.3f} ms")
+    for size, rate in result["throughput_per_s"].items():
+        print(f"  batch {size:>4} {rate:,.0f} trades/s")
+    print(f"  peak RSS   {result['peak_rss_mb']:.1f} MB (cold load alone {result['cold_load_rss_mb']:.1f} MB)")
+    print(f"Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print(f"Regressions vs {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,34 @@
 import asyncio
 from playwright.async_api import Playwright, async_playwright, expect
+import os
 import time
 from pydantic import BaseModel
-from openai import OpenAI
-import base64
 import json
 from datetime import datetime
+from llm_pool import create_response, image_input
+from extraction_cascade import cascade_json, cascade_text, same_fields, validate_game_state, validate_trade_text
+from waits import settle, wait_for_processing, wait_log
+from feedback_store import get_store
+import fast_browse
+import gm_config
+import league_snapshot
+from dom_extract import NEGOTIATE_SELECTOR, TRADE_SUMMARY_SELECTOR, ROSTER_STATS_SELECTOR, PHASE_SELECTOR, extract_game_state_fields
 
 # npx playwright codegen https://play.basketball-gm.com
+
+# Seconds to keep the browser open for inspection after the run
+INSPECT_SECONDS = float(os.getenv("GM_INSPECT_SECONDS", "0"))
+
+_online_model = None
+
+def online_model():
+    """The online reward model, loaded on the first label so runs without feedback never import sklearn."""
+    global _online_model
+    if _online_model is None:
+        from online_reward import OnlineRewardModel
+        _online_model = OnlineRewardModel.load_or_create()
+    return _online_model
+
 class GameState(BaseModel):
     record: str
     team_rating: str
@@ -19,17 +40,18 @@ class GameState(BaseModel):
     profit: str
 
 
+async def parse_game_state(page) -> GameState:
+    # Selector-based parsing first; the vision call is only a fallback
+    fields = await extract_game_state_fields(page)
+    if fields is not None:
+        return GameState(**fields)
+    return await parse_game_state_with_openai(page)
+
 async def parse_game_state_with_openai(page) -> GameState:
     # Take a screenshot of the relevant area
-    element = page.locator("#actual-actual-content > div.d-sm-flex.mb-3 > div.d-flex > div:nth-child(2)")
+    element = page.locator(ROSTER_STATS_SELECTOR)
     screenshot = await element.screenshot()
     
-    # Convert screenshot to base64
-    base64_image = base64.b64encode(screenshot).decode("utf-8")
-    
-    # Initialize OpenAI client
-    client = OpenAI()
-    
     # Compose prompt for OpenAI
     prompt = """
     You are an OCR and information extraction agent. Extract the following fields from the image and output as JSON:
@@ -46,35 +68,15 @@ async def parse_game_state_with_openai(page) -> GameState:
     If a field is missing, use an empty string.
     """
     
-    # Call OpenAI API with the new format
-    response = client.responses.create(
-        model="gpt-4.1",
-        input=[
-            {
-                "role": "user",
-                "content": [
-                    {"type": "input_text", "text": prompt},
-                    {
-                        "type": "input_image",
-                        "image_url": f"data:image/png;base64,{base64_image}"
-                    }
-                ]
-            }
-        ]
-    )
-    
-    # Parse the response and create GameState object
-    state_dict = json.loads(response.output_text)
+    # Identical panels are served from the extraction cache
+    state_dict = await cascade_json("game_state", prompt, screenshot, validate_game_state, same=same_fields)
     return GameState(**state_dict)
 
 async def extract_trade_info(page):
     # Take a screenshot of the trade proposal area
-    element = page.locator("#actual-actual-content > div > div.col-md-3 > div")
+    element = page.locator(TRADE_SUMMARY_SELECTOR)
     await element.wait_for(state="visible", timeout=5000)
     screenshot = await element.screenshot()
-    base64_image = base64.b64encode(screenshot).decode("utf-8")
-
-    client = OpenAI()
     prompt = """
     You are an expert basketball GM. Extract the following information from the trade proposal image:
     1. Players/Assets being traded from your team
@@ -84,45 +86,19 @@ async def extract_trade_info(page):
     Format the response as a clear, structured text description.
     """
     
-    response = client.responses.create(
-        model="gpt-4.1",
-        input=[
-            {
-                "role": "user",
-                "content": [
-                    {"type": "input_text", "text": prompt},
-                    {"type": "input_image", "image_url": f"data:image/png;base64,{base64_image}"}
-                ]
-            }
-        ]
-    )
-    return response.output_text
+    return await cascade_text("trade_info", prompt, screenshot, validate_trade_text)
 
 async def evaluate_trade_logic(page):
     # Take a screenshot of the trade proposal area
-    element = page.locator("#actual-actual-content > div > div.col-md-3 > div")
+    element = page.locator(TRADE_SUMMARY_SELECTOR)
     await element.wait_for(state="visible", timeout=5000)
     screenshot = await element.screenshot()
-    base64_image = base64.b64encode(screenshot).decode("utf-8")
-
-    client = OpenAI()
     prompt = (
         "You are an expert basketball GM. "
         "Given the trade proposal shown in the image, respond with 'ACCEPT' if you recommend accepting/proposing the trade, "
         "or 'REJECT' if not. Only respond with 'ACCEPT' or 'REJECT'."
     )
-    response = client.responses.create(
-        model="gpt-4.1",
-        input=[
-            {
-                "role": "user",
-                "content": [
-                    {"type": "input_text", "text": prompt},
-                    {"type": "input_image", "image_url": f"data:image/png;base64,{base64_image}"}
-                ]
-            }
-        ]
-    )
+    response = await create_response(model="gpt-4.1", input=image_input(prompt, screenshot))
     result = response.output_text.strip().upper()
     return result == "ACCEPT"
 
@@ -133,20 +109,18 @@ async def get_user_feedback():
             return feedback
         print("Please enter 'yes', 'no', or 'skip'")
 
-async def save_trade_data(trade_info, ai_decision, user_feedback, filename="trade_feedback.txt"):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(filename, "a") as f:
-        f.write(f"\n=== Trade Evaluation {timestamp} ===\n")
-        f.write(f"Trade Information:\n{trade_info}\n")
-        f.write(f"AI Decision: {ai_decision}\n")
-        f.write(f"User Feedback: {user_feedback}\n")
-        f.write("="*50 + "\n")
+async def save_trade_data(trade_info, ai_decision, user_feedback):
+    # Written on a worker thread into the shared SQLite feedback store
+    await get_store().add_async(trade_info, ai_decision=ai_decision, user_feedback=user_feedback)
+    if user_feedback in ("yes", "no"):
+        # Fold the new label into the online reward model right away
+        await online_model().sync_async(get_store())
 
 async def evaluate_trade_proposals(page):
     try:
         # Navigate to trade proposals
         await page.get_by_role("link", name="Trade Proposals").click()
-        await asyncio.sleep(2)  # Wait for page to load
+        await settle(page, "navigate", selector=NEGOTIATE_SELECTOR, timeout=5000)
         
         while True:  # Keep checking for new trade proposals
             try:
@@ -169,17 +143,18 @@ async def evaluate_trade_proposals(page):
                         if i >= len(buttons):
                             break
                             
-                        # Click negotiate
+                        # Click negotiate and wait for the trade summary instead of a fixed sleep
+                        old_url = page.url
                         await buttons[i].click()
-                        await asyncio.sleep(1)  # Wait for trade modal
+                        await settle(page, "negotiate", url_changed_from=old_url, selector=TRADE_SUMMARY_SELECTOR)
                         
-                        # Extract trade information
-                        trade_info = await extract_trade_info(page)
+                        # Extract and evaluate the trade concurrently (both calls go through the shared pool)
+                        trade_info, is_good_trade = await asyncio.gather(
+                            extract_trade_info(page), evaluate_trade_logic(page)
+                        )
                         print("\nTrade Information:")
                         print(trade_info)
                         
-                        # Evaluate the trade
-                        is_good_trade = await evaluate_trade_logic(page)
                         ai_decision = "ACCEPT" if is_good_trade else "REJECT"
                         print(f"\nAI Decision: {ai_decision}")
                         
@@ -193,22 +168,23 @@ async def evaluate_trade_proposals(page):
                         if is_good_trade:
                             print(f"Accepting trade proposal {i+1}")
                             await page.get_by_role("button", name="Propose trade").click()
-                            await asyncio.sleep(2)  # Wait for trade to process
+                            await settle(page, "propose_trade")  # Wait for trade to process
                         else:
                             print(f"Rejecting trade proposal {i+1}")
+                            old_url = page.url
                             await page.go_back()
-                            await asyncio.sleep(1)  # Wait for page to settle
+                            await settle(page, "navigate", url_changed_from=old_url)
                             
                         # Go back to trade proposals page
                         await page.get_by_role("link", name="Trade Proposals").click()
-                        await asyncio.sleep(2)  # Wait for page to load
+                        await settle(page, "navigate", selector=NEGOTIATE_SELECTOR, timeout=5000)
                         
                     except Exception as e:
                         print(f"Error processing trade proposal {i+1}: {str(e)}")
                         # Try to recover by going back to trade proposals
                         try:
                             await page.get_by_role("link", name="Trade Proposals").click()
-                            await asyncio.sleep(2)
+                            await settle(page, "navigate", selector=NEGOTIATE_SELECTOR, timeout=5000)
                         except:
                             pass
                         continue
@@ -220,33 +196,40 @@ async def evaluate_trade_proposals(page):
     except Exception as e:
         print(f"Error in evaluate_trade_proposals: {str(e)}")
 
+async def create_league(page) -> None:
+    # Basic setup
+    await page.goto(gm_config.url("/l/1/trade"))
+    await page.get_by_role("link", name="Create a new league").click()
+    await page.get_by_role("combobox").nth(2).select_option("real")
+    await page.get_by_role("button", name="Create League Processing").click()
+    await wait_for_processing(page, "create_league")
+    
+    # Get to trade deadline
+    await page.get_by_role("button", name="Play", exact=True).click()
+    await page.get_by_role("button", name="Until regular season").click()
+    await wait_for_processing(page, "simulate")
+    await page.get_by_role("button", name="Play", exact=True).click()
+    
+    # Wait for trade deadline button and click it
+    await page.get_by_role("button", name="Until trade deadline").click()
+
+    
+    # Wait for trade deadline phase to be fully established
+    await wait_for_processing(page, "simulate")
+
 async def run(playwright: Playwright) -> None:
     try:
-        browser = await playwright.chromium.launch(headless=False)
-        context = await browser.new_context()
+        browser = await fast_browse.launch(playwright)  # GM_FAST_BROWSE=1 for headless, no images/ads
+        context = await fast_browse.new_context(browser)
         page = await context.new_page()
         
-        # Basic setup
-        await page.goto("https://play.basketball-gm.com/l/1/trade")
-        await page.get_by_role("link", name="Create a new league").click()
-        await page.get_by_role("combobox").nth(2).select_option("real")
-        await page.get_by_role("button", name="Create League Processing").click()
-        
-        # Get to trade deadline
-        await page.get_by_role("button", name="Play", exact=True).click()
-        await page.get_by_role("button", name="Until regular season").click()
-        await page.get_by_role("button", name="Play", exact=True).click()
-        
-        # Wait for trade deadline button and click it
-        await page.get_by_role("button", name="Until trade deadline").click()
-
-        
-        # Wait for trade deadline phase to be fully established
-        await asyncio.sleep(3)
+        # GM_LEAGUE_SNAPSHOT: start from a saved trade-deadline league instead of simulating to it
+        if await league_snapshot.restore_configured(page) is None:
+            await create_league(page)
         
         # Verify we're in trade deadline phase
         try:
-            phase_element = await page.wait_for_selector("#content > nav > div > div.dropdown-links.navbar-nav.flex-shrink-1.overflow-hidden.text-nowrap > div > a", timeout=5000)
+            phase_element = await page.wait_for_selector(PHASE_SELECTOR, timeout=5000)
             phase_text = await phase_element.inner_text()
             print(f"Current phase: {phase_text}")
         except Exception as e:
@@ -255,8 +238,14 @@ async def run(playwright: Playwright) -> None:
         # Evaluate all trade proposals
         await evaluate_trade_proposals(page)
         
-        # Keep the browser open for inspection
-        await asyncio.sleep(30)  # Keep open for 30 seconds
+        print(f"Wait timings: {wait_log.summary()}")
+        
+        # Optionally keep the browser open for inspection (ends early if the page is closed)
+        if INSPECT_SECONDS > 0:
+            try:
+                await page.wait_for_event("close", timeout=INSPECT_SECONDS * 1000)
+            except Exception:
+                pass
         
     except Exception as e:
         print(f"Error in run: {str(e)}")
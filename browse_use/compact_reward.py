@@ -0,0 +1,249 @@
+import os
+import re
+import json
+import time
+from typing import Any, List, Sequence
+
+import numpy as np
+
+# Format version stored in every artifact; bump when the layout changes
+COMPACT_FORMAT = 1
+
+
+def compact_path_for(path: str) -> str:
+    """reward_model.pkl -> reward_model.npz"""
+    return os.path.splitext(path)[0] + ".npz"
+
+
+def prefer_compact(path: str) -> str:
+    """Use the exported .npz next to a pickle when it is at least as new as the pickle."""
+    compact = compact_path_for(path)
+    if os.path.exists(compact) and (not os.path.exists(path) or os.stat(compact).st_mtime >= os.stat(path).st_mtime):
+        return compact
+    return path
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+class CompactTextModel:
+    """TF-IDF + logistic regression scored with NumPy only.
+
+    Reproduces sklearn's word analyzer (lowercase, token regex, stop-word
+    removal, then n-grams joined by a space) and TfidfTransformer (raw or
+    sublinear tf, idf weighting, l2 norm). The vocabulary is a sorted array of
+    UTF-8 byte strings looked up with searchsorted, so loading it is a single
+    array read rather than rebuilding a dict.
+    """
+
+    def __init__(self, arrays):
+        meta = json.loads(str(arrays["meta"]))
+        self.meta = meta
+        self.lowercase = meta["lowercase"]
+        self.token_re = re.compile(meta["token_pattern"])
+        self.ngram_range = tuple(meta["ngram_range"])
+        self.sublinear_tf = meta["sublinear_tf"]
+        self.norm = meta["norm"]
+        self.vocab = arrays["vocab"]
+        self.idf = arrays["idf"]
+        self.coef = arrays["coef"]
+        self.intercept = float(arrays["intercept"])
+        # pruned terms still count towards the l2 norm when the exporter kept their idf
+        self.norm_vocab = arrays["norm_vocab"] if "norm_vocab" in arrays else None
+        self.norm_idf = arrays["norm_idf"] if "norm_idf" in arrays else None
+        self.stop_words = frozenset(w.decode("utf-8") for w in arrays["stop_words"]) if "stop_words" in arrays else None
+
+    def analyze(self, text: str) -> List[str]:
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token_re.findall(text)
+        if self.stop_words:
+            tokens = [w for w in tokens if w not in self.stop_words]
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        grams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            grams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def _weights(self, counts: np.ndarray, idf: np.ndarray) -> np.ndarray:
+        tf = np.log(counts) + 1.0 if self.sublinear_tf else counts.astype(np.float64)
+        return tf * idf
+
+    def decision_function(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.full(len(texts), self.intercept)
+        for i, text in enumerate(texts):
+            grams = self.analyze(text)
+            if not grams:
+                continue
+            terms, counts = np.unique(np.array([g.encode("utf-8") for g in grams]), return_counts=True)
+            idx = np.searchsorted(self.vocab, terms)
+            idx[idx == len(self.vocab)] = 0
+            hit = self.vocab[idx] == terms
+            w = self._weights(counts[hit], self.idf[idx[hit]])
+            sq = float(w @ w)
+            if self.norm_vocab is not None:
+                extra = ~hit
+                if extra.any():
+                    j = np.searchsorted(self.norm_vocab, terms[extra])
+                    j[j == len(self.norm_vocab)] = 0
+                    found = self.norm_vocab[j] == terms[extra]
+                    w_extra = self._weights(counts[extra][found], self.norm_idf[j[found]])
+                    sq += float(w_extra @ w_extra)
+            if sq == 0.0:
+                continue
+            score = float(w @ self.coef[idx[hit]])
+            out[i] += score / np.sqrt(sq) if self.norm == "l2" else score
+        return out
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        p = _sigmoid(self.decision_function(list(texts)))
+        return np.column_stack([1.0 - p, p])
+
+
+class CompactStructuredModel:
+    """featurize -> StandardScaler -> logistic regression, as three vectors."""
+
+    def __init__(self, arrays):
+        self.meta = json.loads(str(arrays["meta"]))
+        self.mean = arrays["mean"]
+        self.scale = arrays["scale"]
+        self.coef = arrays["coef"]
+        self.intercept = float(arrays["intercept"])
+
+    def predict_proba(self, trades: Sequence[Any]) -> np.ndarray:
+        from trade_model import featurize
+
+        X = (featurize(trades) - self.mean) / self.scale
+        p = _sigmoid(X @ self.coef + self.intercept)
+        return np.column_stack([1.0 - p, p])
+
+
+def load_compact(path: str):
+    with np.load(path, allow_pickle=False) as f:
+        arrays = {k: f[k] for k in f.files}
+    kind = json.loads(str(arrays["meta"]))["kind"]
+    if kind == "text":
+        return CompactTextModel(arrays)
+    if kind == "structured":
+        return CompactStructuredModel(arrays)
+    raise ValueError(f"Unknown compact reward model kind {kind!r} in {path}")
+
+
+def _linear_head(clf):
+    if clf.coef_.shape[0] != 1:
+        raise ValueError("Only binary logistic regression reward models can be exported")
+    return clf.coef_[0].astype(np.float64), float(clf.intercept_[0])
+
+
+def _export_text(pipeline, prune: float, keep_norm: bool) -> dict:
+    tfidf, clf = pipeline.steps[0][1], pipeline.steps[-1][1]
+    if type(tfidf).__name__ != "TfidfVectorizer" or tfidf.analyzer != "word":
+        raise ValueError(f"Cannot export {type(tfidf).__name__}; only word-level TfidfVectorizer is supported")
+    if tfidf.preprocessor is not None or tfidf.tokenizer is not None or tfidf.strip_accents is not None:
+        raise ValueError("Custom preprocessors, tokenizers and accent stripping are not supported")
+    if tfidf.norm not in ("l2", None):
+        raise ValueError(f"Unsupported TF-IDF norm {tfidf.norm!r}")
+    coef, intercept = _linear_head(clf)
+    terms = np.array([t.encode("utf-8") for t in sorted(tfidf.vocabulary_, key=tfidf.vocabulary_.get)])  # column order
+    idf = tfidf.idf_ if tfidf.use_idf else np.ones(len(terms))
+
+    keep = np.abs(coef) > prune
+    order = np.argsort(terms[keep])
+    arrays = {
+        "vocab": terms[keep][order],
+        "idf": idf[keep][order],
+        "coef": coef[keep][order],
+        "intercept": np.float64(intercept),
+    }
+    if prune > 0 and keep_norm and not keep.all():
+        # dropped terms contribute nothing to the score but still to the norm
+        dropped = np.argsort(terms[~keep])
+        arrays["norm_vocab"] = terms[~keep][dropped]
+        arrays["norm_idf"] = idf[~keep][dropped]
+    stop_words = tfidf.get_stop_words()
+    if stop_words:
+        arrays["stop_words"] = np.array([w.encode("utf-8") for w in sorted(stop_words)])
+    arrays["meta"] = np.array(json.dumps({
+        "format": COMPACT_FORMAT,
+        "kind": "text",
+        "lowercase": tfidf.lowercase,
+        "token_pattern": tfidf.token_pattern,
+        "ngram_range": list(tfidf.ngram_range),
+        "sublinear_tf": tfidf.sublinear_tf,
+        "norm": tfidf.norm,
+        "terms": int(len(terms)),
+        "kept": int(keep.sum()),
+    }))
+    return arrays
+
+
+def _export_structured(pipeline) -> dict:
+    from trade_model import FEATURE_NAMES
+
+    scaler, clf = pipeline.named_steps["scale"], pipeline.named_steps["lr"]
+    coef, intercept = _linear_head(clf)
+    n = len(coef)
+    return {
+        "mean": scaler.mean_ if scaler.with_mean else np.zeros(n),
+        "scale": scaler.scale_ if scaler.with_std else np.ones(n),
+        "coef": coef,
+        "intercept": np.float64(intercept),
+        "meta": np.array(json.dumps({"format": COMPACT_FORMAT, "kind": "structured", "features": FEATURE_NAMES})),
+    }
+
+
+def export(pipeline, path: str, prune: float = 0.0, keep_norm: bool = True) -> str:
+    """Write a fitted reward Pipeline as a NumPy-only .npz artifact.
+
+    prune drops vocabulary terms whose |coefficient| is at or below the
+    threshold, so scores shift by at most prune * (sum of the dropped terms'
+    tf-idf weights). With keep_norm the dropped terms' idf values are kept for
+    the l2 norm so that is the only error; without it the artifact is smaller
+    still but the norm is computed over the kept terms only. Check the drift
+    with max_difference() before shipping a pruned model.
+    """
+    if "scale" in pipeline.named_steps:
+        arrays = _export_structured(pipeline)
+    else:
+        arrays = _export_text(pipeline, prune, keep_norm)
+    with open(path + ".tmp", "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def max_difference(pipeline, compact, samples: Sequence[Any]) -> float:
+    """Largest absolute probability difference between the pickle and the compact model."""
+    if len(samples) == 0:
+        return 0.0
+    return float(np.abs(pipeline.predict_proba(list(samples))[:, 1] - compact.predict_proba(samples)[:, 1]).max())
+
+
+if __name__ == "__main__":
+    # python compact_reward.py <model.pkl> [out.npz] [--prune T] [--no-keep-norm]
+    import argparse
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Export a reward model pickle to a NumPy-only .npz")
+    parser.add_argument("model")
+    parser.add_argument("out", nargs="?")
+    parser.add_argument("--prune", type=float, default=0.0, help="drop terms with |coef| <= this")
+    parser.add_argument("--no-keep-norm", action="store_true", help="also drop pruned terms from the norm")
+    parser.add_argument("--check", default=None, help="feedback store or .txt file to compare probabilities on")
+    args = parser.parse_args()
+
+    pipeline = joblib.load(args.model)
+    out = export(pipeline, args.out or compact_path_for(args.model), args.prune, not args.no_keep_norm)
+    t0 = time.perf_counter()
+    compact = load_compact(out)
+    load_ms = (time.perf_counter() - t0) * 1000
+    print(f"Wrote {out} ({os.path.getsize(out)} bytes vs {os.path.getsize(args.model)} pickled), loads in {load_ms:.1f} ms")
+    if args.check:
+        from train_reward import load_records, prepare
+
+        kind = "structured" if isinstance(compact, CompactStructuredModel) else "text"
+        X, _ = prepare(load_records(args.check), kind)
+        print(f"Max probability difference on {len(X)} trades: {max_difference(pipeline, compact, X):.2e}")
@@ -0,0 +1,292 @@
+import time
+import heapq
+import logging
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+from playwright.async_api import Page
+
+from dom_extract import TRADE_SUMMARY_SELECTOR
+from trade_model import Trade, TradePick, TradePlayer
+from trade_rules import TradeRules, check_trades
+from waits import settle
+
+logger = logging.getLogger(__name__)
+
+PICK_VALUES = {1: 14.0, 2: 2.0}  # on the same scale as asset_value()
+_ORDINAL = {1: "1st", 2: "2nd"}
+
+
+def asset_value(ovr: Optional[int], pot: Optional[int] = None, age: Optional[int] = None) -> float:
+    """Rough trade value: convex in rating so one star outweighs two role players, with credit for young upside."""
+    if ovr is None:
+        return 0.0
+    rating = float(ovr)
+    if pot is not None and age is not None and age < 25:
+        rating += 0.5 * max(pot - ovr, 0) * (25 - age) / 5
+    elif age is not None and age > 30:
+        rating -= age - 30
+    return max(rating - 40.0, 0.0) ** 2 / 10.0
+
+
+class Asset(BaseModel):
+    name: str
+    salary: float = 0.0
+    value: float = 0.0
+    player: Optional[TradePlayer] = None
+    pick: Optional[TradePick] = None
+
+
+class Package(BaseModel):
+    """One candidate counter-offer."""
+
+    assets_out: List[Asset] = Field(default_factory=list)
+    assets_in: List[Asset] = Field(default_factory=list)
+    value_gain: float = 0.0  # our value in minus value out
+    score: float = 0.0  # reward model probability
+    trade: Trade
+
+    def describe(self) -> str:
+        out = ", ".join(a.name for a in self.assets_out)
+        inc = ", ".join(a.name for a in self.assets_in)
+        return f"send {out} for {inc} (p={self.score:.2f}, value {self.value_gain:+.1f})"
+
+
+def assets_from_snapshot(snapshot, tid: int, include_picks: bool = True) -> List[Asset]:
+    assets = [Asset(name=p.name, salary=p.contract_amount, value=asset_value(p.ovr, p.pot, p.age),
+                    player=TradePlayer(name=p.name, salary=p.contract_amount, ovr=p.ovr, pot=p.pot, age=p.age))
+              for p in snapshot.roster(tid)]
+    if include_picks:
+        for dp in snapshot.draft_picks():
+            if dp.tid == tid and dp.round in PICK_VALUES and dp.season.isdigit():
+                pick = TradePick(season=int(dp.season), round=dp.round)
+                assets.append(Asset(name=f"{dp.season} {_ORDINAL[dp.round]} round pick",
+                                    value=PICK_VALUES[dp.round], pick=pick))
+    return assets
+
+
+def _subsets(assets: Sequence[Asset], max_size: int) -> List[Tuple[Tuple[int, ...], float, float]]:
+    """All non-empty subsets up to max_size as (indices, salary, value).
+
+    Each level extends the previous one, so partial sums are computed once per
+    subset rather than once per subset per element.
+    """
+    level = [((i,), a.salary, a.value) for i, a in enumerate(assets)]
+    result = list(level)
+    for _ in range(max_size - 1):
+        level = [(idx + (j,), s + assets[j].salary, v + assets[j].value)
+                 for idx, s, v in level for j in range(idx[-1] + 1, len(assets))]
+        result += level
+    return result
+
+
+class CounterOfferSearch:
+    """Branch-and-bound search for trade packages.
+
+    For every subset of the other team's assets, a depth-first search picks
+    our side. Our assets are sorted by value, and suffix tables hold the most
+    salary and value the remaining k picks could still add. A branch is cut as
+    soon as it overshoots the salary or value window, or can no longer reach it:
+    - Salary window: both teams either stay under the cap or pass the 125%
+      matching rule (or the hard cap).
+    - Value window: we must gain at least min_gain, but not so much that the
+      AI would refuse (max_gain).
+    Once max_candidates packages are held, the worst gain among them becomes
+    the new floor (the incumbent bound). The survivors are scored by the
+    reward model in one batch.
+    """
+
+    def __init__(self, ours: Sequence[Asset], theirs: Sequence[Asset], rules: Optional[TradeRules] = None,
+                 our_payroll: Optional[float] = None, their_payroll: Optional[float] = None,
+                 max_out: int = 3, max_in: int = 3, min_gain: float = 0.0, max_gain: float = 8.0,
+                 max_candidates: int = 256, time_budget: float = 2.0):
+        self.ours = sorted(ours, key=lambda a: -a.value)
+        self.theirs = list(theirs)
+        self.rules = rules or TradeRules()
+        self.our_payroll = our_payroll
+        self.their_payroll = their_payroll
+        self.max_out = max_out
+        self.max_in = max_in
+        self.min_gain = min_gain
+        self.max_gain = max_gain
+        self.max_candidates = max_candidates
+        self.time_budget = time_budget
+        self.nodes = 0
+        self.pruned = 0
+        self.our_roster = sum(1 for a in self.ours if a.player is not None)
+        self.their_roster = sum(1 for a in self.theirs if a.player is not None)
+        self._suffix()
+
+    def _suffix(self):
+        """best_salary[i][k] / best_value[i][k]: the most k of ours[i:] can add (memoized once per search)."""
+        n = len(self.ours)
+        salaries = np.array([a.salary for a in self.ours])
+        values = np.array([a.value for a in self.ours])
+        self.best_salary = np.zeros((n + 1, self.max_out + 1))
+        self.best_value = np.zeros((n + 1, self.max_out + 1))
+        for i in range(n - 1, -1, -1):
+            for k in range(1, self.max_out + 1):
+                # either skip ours[i] or take it; the k largest of a suffix
+                self.best_salary[i, k] = max(self.best_salary[i + 1, k], salaries[i] + self.best_salary[i + 1, k - 1])
+                self.best_value[i, k] = max(self.best_value[i + 1, k], values[i] + self.best_value[i + 1, k - 1])
+
+    def _salary_window(self, salary_in: float) -> Tuple[float, float]:
+        """Range of outgoing salary that keeps both teams legal; an unknown payroll counts as over the cap."""
+        rules, cap = self.rules, self.rules.salary_cap
+        if rules.cap_type == "none":
+            return 0.0, np.inf
+        # we stay under the cap if we send at least this much; they stay under it if we send at most this much
+        our_room = self.our_payroll + salary_in - cap if cap is not None and self.our_payroll is not None else np.inf
+        their_room = cap - self.their_payroll + salary_in if cap is not None and self.their_payroll is not None else -np.inf
+        if rules.cap_type == "hard":
+            lo, hi = min(salary_in, our_room), max(salary_in, their_room)
+        else:
+            lo = min((salary_in - rules.salary_match_buffer) / rules.salary_match, our_room)
+            hi = max(rules.salary_match * salary_in + rules.salary_match_buffer, their_room)
+        return max(lo, 0.0), hi
+
+    def _dfs(self, i, k_left, salary, value, chosen, s_lo, s_hi, v_lo, v_hi, out, deadline):
+        self.nodes += 1
+        if chosen and s_lo <= salary <= s_hi and v_lo <= value:
+            out.append((tuple(chosen), salary, value))
+        if k_left == 0 or (self.nodes & 1023 == 0 and time.perf_counter() > deadline):
+            return
+        # children are bounded before recursing: sums only grow, so overshooting a window is final, and
+        # undershooting is final when even the best k_left - 1 assets after this one cannot close the gap
+        for j in range(i, len(self.ours)):
+            a = self.ours[j]
+            v = value + a.value
+            if v + self.best_value[j + 1, k_left - 1] < v_lo:
+                self.pruned += 1
+                break  # ours is sorted by value, so every later asset falls short too
+            s = salary + a.salary
+            if v > v_hi or s > s_hi or s + self.best_salary[j + 1, k_left - 1] < s_lo:
+                self.pruned += 1
+                continue
+            chosen.append(j)
+            self._dfs(j + 1, k_left - 1, s, v, chosen, s_lo, s_hi, v_lo, v_hi, out, deadline)
+            chosen.pop()
+
+    def _roster_ok(self, players_out: int, players_in: int) -> bool:
+        rules = self.rules
+        for size, delta in ((self.our_roster, players_in - players_out), (self.their_roster, players_out - players_in)):
+            if size + delta > rules.max_roster or (delta < 0 and size + delta < rules.min_roster):
+                return False
+        return True
+
+    def candidates(self) -> List[Tuple[float, Tuple[int, ...], Tuple[int, ...], float, float]]:
+        """(value_gain, out_idx, in_idx, salary_out, salary_in), best value gain first."""
+        deadline = time.perf_counter() + self.time_budget
+        heap: list = []
+        for in_idx, salary_in, value_in in _subsets(self.theirs, self.max_in):
+            if time.perf_counter() > deadline:
+                logger.info("Counter-offer search hit its time budget; returning the best packages so far")
+                break
+            s_lo, s_hi = self._salary_window(salary_in)
+            # incumbent bound: once max_candidates are held, only packages beating the worst of them matter
+            floor = heap[0][0] if len(heap) == self.max_candidates else self.min_gain
+            v_lo, v_hi = value_in - self.max_gain, value_in - floor
+            if salary_in > 0 and s_lo > s_hi:
+                continue
+            found: list = []
+            self._dfs(0, self.max_out, 0.0, 0.0, [], s_lo, s_hi, v_lo, v_hi, found, deadline)
+            players_in = sum(1 for j in in_idx if self.theirs[j].player is not None)
+            for out_idx, salary_out, value_out in found:
+                if not self._roster_ok(sum(1 for j in out_idx if self.ours[j].player is not None), players_in):
+                    continue
+                item = (value_in - value_out, out_idx, in_idx, salary_out, salary_in)
+                if len(heap) < self.max_candidates:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        return sorted(heap, reverse=True)
+
+    def _trade(self, out_idx, in_idx, team: str, other_team: str) -> Trade:
+        out = [self.ours[j] for j in out_idx]
+        inc = [self.theirs[j] for j in in_idx]
+        payroll_after = None
+        if self.our_payroll is not None:
+            payroll_after = self.our_payroll - sum(a.salary for a in out) + sum(a.salary for a in inc)
+        return Trade(
+            team=team, other_team=other_team,
+            players_out=[a.player for a in out if a.player], players_in=[a.player for a in inc if a.player],
+            picks_out=[a.pick for a in out if a.pick], picks_in=[a.pick for a in inc if a.pick],
+            payroll_before=self.our_payroll, payroll_after=payroll_after, salary_cap=self.rules.salary_cap,
+        )
+
+    def search(self, scorer: Callable[[List[Trade]], np.ndarray], top_k: int = 3,
+               team: str = "", other_team: str = "") -> List[Package]:
+        start = time.perf_counter()
+        found = self.candidates()
+        trades = [self._trade(out_idx, in_idx, team, other_team) for _, out_idx, in_idx, _, _ in found]
+        # the window already enforces salary matching; this also covers roster limits
+        report = check_trades(trades, self.rules)
+        legal = [i for i in range(len(trades)) if report.legal[i]]
+        scores = scorer([trades[i] for i in legal]) if legal else np.zeros(0)
+        packages = [Package(assets_out=[self.ours[j] for j in found[i][1]], assets_in=[self.theirs[j] for j in found[i][2]],
+                            value_gain=found[i][0], score=float(s), trade=trades[i])
+                    for i, s in zip(legal, scores)]
+        packages.sort(key=lambda p: (-p.score, -p.value_gain))
+        logger.info(f"Counter-offer search: {self.nodes} nodes, {self.pruned} pruned, {len(found)} candidates, "
+                    f"{len(legal)} legal, {(time.perf_counter() - start) * 1000:.0f} ms")
+        return packages[:top_k]
+
+
+def search_counter_offers(snapshot, other_tid: int, scorer: Callable[[List[Trade]], np.ndarray],
+                          top_k: int = 3, **kwargs) -> List[Package]:
+    """Top-k packages between the user's team and other_tid, from a league_export.LeagueSnapshot."""
+    rules = TradeRules.from_snapshot(snapshot)
+    teams = {t.tid: f"{t.region} {t.name}".strip() for t in snapshot.teams()}
+    search = CounterOfferSearch(
+        assets_from_snapshot(snapshot, snapshot.user_tid), assets_from_snapshot(snapshot, other_tid), rules,
+        our_payroll=snapshot.payroll(), their_payroll=snapshot.payroll(other_tid), **kwargs,
+    )
+    return search.search(scorer, top_k, teams.get(snapshot.user_tid, ""), teams.get(other_tid, ""))
+
+
+###############################################################################
+# Applying a package on the trade page
+###############################################################################
+_ROWS_SELECTOR = "#actual-actual-content table tbody tr"
+_ROW_STATE_JS = """
+(rows) => rows.map((tr) => {
+    const boxes = tr.querySelectorAll('input[type=checkbox]');
+    const select = boxes[boxes.length > 1 ? 1 : 0];
+    return [tr.innerText, boxes.length, !!(select && select.checked), boxes.length > 1 && boxes[0].checked];
+})
+"""
+
+
+def _row_matches(text: str, asset: Asset) -> bool:
+    if asset.pick is not None:
+        return f"{asset.pick.season} {_ORDINAL[asset.pick.round]}" in text and "round" in text.lower()
+    return asset.name in text
+
+
+async def apply_package(page: Page, package: Package, other_tid: Optional[int] = None,
+                        protect: Sequence[str] = ()) -> None:
+    """Select exactly the package's assets on the trade page.
+
+    Rows carry two checkboxes: "Exclude this player from counter offers"
+    first, then the one that puts the asset in the trade. Players named in
+    protect are marked excluded, so the AI's own counter-offers leave them alone.
+    """
+    if other_tid is not None:
+        await page.locator("select").first.select_option(value=str(other_tid))
+        await settle(page, "negotiate", selector=TRADE_SUMMARY_SELECTOR)
+    wanted = package.assets_out + package.assets_in
+    rows = page.locator(_ROWS_SELECTOR)
+    states = await rows.evaluate_all(_ROW_STATE_JS)
+    for i, (text, boxes, selected, excluded) in enumerate(states):
+        if not boxes:
+            continue
+        checkboxes = rows.nth(i).get_by_role("checkbox")
+        want = any(_row_matches(text, a) for a in wanted)
+        if want != selected:
+            await checkboxes.nth(1 if boxes > 1 else 0).set_checked(want)
+            await settle(page, "negotiate", selector=TRADE_SUMMARY_SELECTOR, processing=False)
+        if boxes > 1:
+            protect_row = any(name in text for name in protect) and not want
+            if protect_row != excluded:
+                await checkboxes.first.set_checked(protect_row)
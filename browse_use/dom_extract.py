@@ -0,0 +1,123 @@
+import re
+import logging
+from typing import Dict, Optional
+
+from playwright.async_api import Page
+
+logger = logging.getLogger(__name__)
+
+# Selectors shared with the screenshot-based extractors in web2.py / codegen2.py
+ROSTER_SUMMARY_SELECTOR = "#actual-actual-content > div.d-sm-flex.mb-3"
+ROSTER_STATS_SELECTOR = "#actual-actual-content > div.d-sm-flex.mb-3 > div.d-flex > div:nth-child(2)"
+TRADE_SUMMARY_SELECTOR = "#actual-actual-content > div > div.col-md-3 > div"
+NEGOTIATE_SELECTOR = 'button:has-text("Negotiate")'
+PHASE_SELECTOR = "#content > nav > div > div.dropdown-links.navbar-nav.flex-shrink-1.overflow-hidden.text-nowrap > div > a"
+
+GAME_STATE_FIELDS = [
+    "record",
+    "team_rating",
+    "average_mov",
+    "average_age",
+    "open_roster_spots",
+    "payroll",
+    "salary_cap",
+    "profit",
+]
+
+# Label-based patterns for the roster summary panel. Each entry is tried in order.
+_FIELD_PATTERNS = {
+    "record": [
+        r"record\s*:?\s*(\d+-\d+(?:-\d+)?)",
+        r"^\s*(\d+-\d+(?:-\d+)?)\s*,",
+    ],
+    "team_rating": [
+        r"team\s+(?:rating|ovr)\s*:?\s*(-?\d+(?:/100)?)",
+        r"\bovr\s*:?\s*(-?\d+)",
+    ],
+    "average_mov": [
+        r"(?:average\s+)?mov\s*:?\s*([+-]?\d+(?:\.\d+)?)",
+    ],
+    "average_age": [
+        r"average\s+age\s*:?\s*(\d+(?:\.\d+)?)",
+    ],
+    "open_roster_spots": [
+        r"(\d+)\s+open\s+roster\s+spots?",
+        r"open\s+roster\s+spots?\s*:?\s*(\d+)",
+    ],
+    "payroll": [
+        r"payroll\s*:?\s*(-?\$\s?-?[\d,.]+\s?[kMB]?)",
+    ],
+    "salary_cap": [
+        r"salary\s+cap\s*:?\s*(\$\s?[\d,.]+\s?[kMB]?)",
+    ],
+    "profit": [
+        r"profit\s*:?\s*(-?\$\s?-?[\d,.]+\s?[kMB]?)",
+    ],
+}
+
+_MONEY_RE = re.compile(r"^(-)?\$\s?(-)?([\d,]+(?:\.\d+)?)\s?([kMB])?$")
+_MONEY_SCALE = {None: 1.0, "k": 1e3, "M": 1e6, "B": 1e9}
+
+
+def parse_money(text: str) -> Optional[float]:
+    """Parse a Basketball GM money string like "$155.09M" or "-$2.5M" into dollars."""
+    m = _MONEY_RE.match(text.strip())
+    if not m:
+        return None
+    sign = -1.0 if (m.group(1) or m.group(2)) else 1.0
+    return sign * float(m.group(3).replace(",", "")) * _MONEY_SCALE[m.group(4)]
+
+
+def parse_game_state_text(text: str) -> Dict[str, str]:
+    """Pull the GameState fields out of the roster summary panel's inner text.
+
+    Fields that cannot be found are returned as empty strings, matching what the
+    vision prompt asks the model to do.
+    """
+    fields = {}
+    for name in GAME_STATE_FIELDS:
+        value = ""
+        for pattern in _FIELD_PATTERNS[name]:
+            m = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+            if m:
+                value = m.group(1).replace(" ", "")
+                break
+        fields[name] = value
+    return fields
+
+
+def validate_game_state_fields(fields: Dict[str, str]) -> bool:
+    """Sanity-check extracted fields before trusting them over the vision model."""
+    if not re.fullmatch(r"\d+-\d+(?:-\d+)?", fields.get("record", "")):
+        return False
+    for money_field in ("payroll", "salary_cap"):
+        if parse_money(fields.get(money_field, "")) is None:
+            return False
+    if fields.get("team_rating") and not re.fullmatch(r"-?\d+(?:/100)?", fields["team_rating"]):
+        return False
+    return True
+
+
+async def read_inner_text(page: Page, selector: str, timeout: int = 5000) -> str:
+    """Return the inner text of the first element matching selector, or "" if absent."""
+    try:
+        return await page.locator(selector).first.inner_text(timeout=timeout)
+    except Exception as e:
+        logger.debug(f"Could not read text from {selector}: {e}")
+        return ""
+
+
+async def extract_game_state_fields(page: Page) -> Optional[Dict[str, str]]:
+    """Read the roster summary straight from the DOM.
+
+    Returns the GameState fields if they pass validation, otherwise None so the
+    caller can fall back to the vision model.
+    """
+    text = await read_inner_text(page, ROSTER_SUMMARY_SELECTOR)
+    if not text:
+        return None
+    fields = parse_game_state_text(text)
+    if not validate_game_state_fields(fields):
+        logger.info(f"DOM game state failed validation, falling back to vision: {fields}")
+        return None
+    return fields
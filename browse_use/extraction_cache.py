@@ -0,0 +1,166 @@
+import json
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from llm_pool import Priority, create_response, image_input
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = "extraction_cache.sqlite"
+DEFAULT_MEMORY_ENTRIES = 512
+# Seconds a writer waits for another process's write lock (season_farm.py workers share the file)
+BUSY_TIMEOUT = 30.0
+
+
+class ExtractionCache:
+    """Content-addressed cache of screenshot -> extracted JSON.
+
+    Keys hash the cropped screenshot bytes together with the prompt and model
+    name, so a changed prompt or model never serves stale results. Lookups hit
+    an in-memory LRU first and then a SQLite table on disk.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, max_memory_entries: int = DEFAULT_MEMORY_ENTRIES):
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()  # memory LRU and counters
+        self._db_lock = threading.Lock()  # SQLite connection; the async methods only take it on worker threads
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=BUSY_TIMEOUT)
+            # WAL: readers never block on a writer, and writers from other processes queue for BUSY_TIMEOUT
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS extractions (key TEXT PRIMARY KEY, model TEXT, value TEXT)"
+            )
+            self._db.commit()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(image: bytes, prompt: str, model: str) -> str:
+        h = hashlib.sha256()
+        for part in (model.encode(), prompt.encode(), image):
+            h.update(len(part).to_bytes(8, "little"))
+            h.update(part)
+        return h.hexdigest()
+
+    def _from_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return value
+
+    def _from_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._db_lock:
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT value FROM extractions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value = json.loads(row[0])
+        with self._lock:
+            self._remember(key, value)
+            self.disk_hits += 1
+        return value
+
+    def _miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._from_memory(key)
+        if value is None:
+            value = self._from_disk(key)
+        if value is None:
+            self._miss()
+        return value
+
+    async def get_async(self, key: str) -> Optional[Dict[str, Any]]:
+        """get() without blocking the event loop: memory hits answer inline, SQLite is read on a worker thread."""
+        value = self._from_memory(key)
+        if value is None and self._db is not None:
+            value = await asyncio.to_thread(self._from_disk, key)
+        if value is None:
+            self._miss()
+        return value
+
+    def _write(self, key: str, value: Dict[str, Any], model: str) -> None:
+        with self._db_lock:
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO extractions (key, model, value) VALUES (?, ?, ?)",
+                (key, model, json.dumps(value)),
+            )
+            self._db.commit()
+
+    def put(self, key: str, value: Dict[str, Any], model: str = "") -> None:
+        with self._lock:
+            self._remember(key, value)
+        self._write(key, value, model)
+
+    async def put_async(self, key: str, value: Dict[str, Any], model: str = "") -> None:
+        """put() with the SQLite insert and commit on a worker thread; the value is in memory before this returns."""
+        with self._lock:
+            self._remember(key, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._write, key, value, model)
+
+    def _remember(self, key: str, value: Dict[str, Any]) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_default_cache: Optional[ExtractionCache] = None
+
+
+def get_cache() -> ExtractionCache:
+    """Process-wide cache shared by all extractors."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ExtractionCache()
+    return _default_cache
+
+
+async def cached_vision_json(prompt: str, image: bytes, model: str = "gpt-4.1",
+                             cache: Optional[ExtractionCache] = None, priority: Priority = Priority.EXTRACTION,
+                             hedge: bool = True) -> Dict[str, Any]:
+    """Run a JSON-producing vision prompt on a screenshot, reusing earlier results for identical inputs."""
+    cache = cache or get_cache()
+    key = cache.key(image, prompt, model)
+    value = await cache.get_async(key)
+    if value is not None:
+        return value
+    response = await create_response(model=model, input=image_input(prompt, image), priority=priority, hedge=hedge)
+    value = json.loads(response.output_text)
+    await cache.put_async(key, value, model)
+    logger.debug(f"Extraction cache stats: {cache.stats()}")
+    return value
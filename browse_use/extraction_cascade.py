@@ -0,0 +1,176 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from dom_extract import GAME_STATE_FIELDS, validate_game_state_fields
+from extraction_cache import cached_vision_json
+from llm_pool import Priority, create_response, image_input
+
+logger = logging.getLogger(__name__)
+
+# Models tried in order until one passes validation; "gpt-4.1" alone turns the cascade off
+CASCADE_MODELS = [m.strip() for m in os.getenv("GM_EXTRACTION_CASCADE", "gpt-4.1-mini,gpt-4.1").split(",") if m.strip()]
+STATS_PATH = os.getenv("GM_CASCADE_STATS", "extraction_cascade.jsonl")
+# Share of small-model successes that are re-run on the top model to measure how often they agree
+AUDIT_RATE = float(os.getenv("GM_CASCADE_AUDIT_RATE", "0.05"))
+
+_PHASE_WORDS = re.compile(r"preseason|regular.?season|trade.?deadline|playoffs|draft|free.?agen|re.?sign|expansion",
+                          re.IGNORECASE)
+_MONEY_OR_PICK = re.compile(r"\$\s?\d|\bpick\b", re.IGNORECASE)
+
+_audits = set()  # keeps fire-and-forget audit tasks alive
+_record_lock = threading.Lock()  # one appender at a time, so concurrent lines never interleave
+
+
+def validate_game_state(value: Dict[str, Any]) -> bool:
+    return all(isinstance(value.get(f), str) for f in GAME_STATE_FIELDS) and validate_game_state_fields(value)
+
+
+def validate_season_state(value: Dict[str, Any]) -> bool:
+    phase = value.get("phase")
+    return isinstance(phase, str) and isinstance(value.get("comments", ""), str) and bool(
+        _PHASE_WORDS.search(f"{phase} {value.get('comments', '')}"))
+
+
+def validate_trade_text(text: str) -> bool:
+    """A trade description names salaries or picks; refusals and blank reads do not."""
+    return len(text.strip()) >= 30 and bool(_MONEY_OR_PICK.search(text))
+
+
+def _norm(value: Any) -> str:
+    return re.sub(r"[^a-z0-9.+-]", "", str(value).lower())
+
+
+def same_fields(a: Dict[str, Any], b: Dict[str, Any], fields: Optional[List[str]] = None) -> bool:
+    return all(_norm(a.get(f, "")) == _norm(b.get(f, "")) for f in (fields or sorted(set(a) | set(b))))
+
+
+def same_phase(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    words = lambda v: {w.lower().replace(" ", "_") for w in _PHASE_WORDS.findall(f"{v.get('phase')} {v.get('comments')}")}
+    return words(a) == words(b)
+
+
+def record(entry: Dict[str, Any], path: Optional[str] = STATS_PATH) -> None:
+    if not path:
+        return
+    entry = {"ts": time.strftime("%Y-%m-%d %H:%M:%S"), **entry}
+    with _record_lock, open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+async def record_async(entry: Dict[str, Any], path: Optional[str] = STATS_PATH) -> None:
+    """record() on a worker thread so the stats file never blocks the event loop driving the browser."""
+    if path:
+        await asyncio.to_thread(record, entry, path)
+
+
+Attempt = Callable[[str, Priority], Awaitable[Any]]
+
+
+async def _audit(task: str, tier: int, model: str, value: Any, attempt: Attempt,
+                 same: Callable[[Any, Any], bool]) -> None:
+    try:
+        # background check: it must never hold up real extractions
+        reference = await attempt(model, Priority.ADVISORY)
+        await record_async({"task": task, "audit": True, "tier": tier, "model": model,
+                            "agree": bool(same(value, reference))})
+    except Exception as e:
+        logger.debug(f"Cascade audit for {task} failed: {e}")
+
+
+async def cascade(task: str, attempt: Attempt, validate: Callable[[Any], bool],
+                  priority: Priority = Priority.EXTRACTION, models: Optional[List[str]] = None,
+                  same: Optional[Callable[[Any, Any], bool]] = None) -> Any:
+    """attempt(model, priority) on each model in turn until validate passes.
+
+    Every attempt is appended to the stats file with its tier, latency and
+    whether it escalated. If even the top model's answer fails validation it
+    is returned anyway, as before the cascade; if the top model raises, so
+    does this.
+    """
+    models = models or CASCADE_MODELS
+    value, error = None, None
+    for tier, model in enumerate(models):
+        top = tier == len(models) - 1
+        t0 = time.perf_counter()
+        try:
+            value, error = await attempt(model, priority), None
+            ok = validate(value)
+        except Exception as e:
+            value, error, ok = None, e, False
+        await record_async({"task": task, "tier": tier, "model": model, "ok": ok, "escalated": not ok and not top,
+                            "latency_s": round(time.perf_counter() - t0, 3),
+                            "error": f"{type(error).__name__}: {error}" if error else None})
+        if ok:
+            if not top and same is not None and random.random() < AUDIT_RATE:
+                audit = asyncio.ensure_future(_audit(task, tier, models[-1], value, attempt, same))
+                _audits.add(audit)
+                audit.add_done_callback(_audits.discard)
+            return value
+        if not top:
+            logger.info(f"{task}: {model} {'failed' if error else 'gave an invalid answer'}, escalating")
+    if error is not None:
+        raise error
+    logger.warning(f"{task}: {models[-1]} answer failed validation, using it anyway")
+    return value
+
+
+async def cascade_json(task: str, prompt: str, image: bytes, validate: Callable[[Dict[str, Any]], bool],
+                       priority: Priority = Priority.EXTRACTION, same: Optional[Callable] = None,
+                       models: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Vision JSON extraction through the cascade; each tier has its own extraction-cache entries."""
+    async def attempt(model: str, priority: Priority) -> Dict[str, Any]:
+        return await cached_vision_json(prompt, image, model=model, priority=priority)
+    return await cascade(task, attempt, validate, priority, models, same)
+
+
+async def cascade_text(task: str, prompt: str, image: bytes, validate: Callable[[str], bool],
+                       priority: Priority = Priority.EXTRACTION, models: Optional[List[str]] = None) -> str:
+    """Free-text vision extraction through the cascade (no audit: answers are not comparable field by field)."""
+    async def attempt(model: str, priority: Priority) -> str:
+        response = await create_response(model=model, input=image_input(prompt, image), priority=priority, hedge=True)
+        return response.output_text.strip()
+    return await cascade(task, attempt, validate, priority, models)
+
+
+def summarize(path: str = STATS_PATH) -> Dict[str, Dict[str, Any]]:
+    """Per task and model: attempts, validation pass rate, escalation rate, latency and audit agreement."""
+    attempts = defaultdict(list)
+    audits = defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            entry = json.loads(line)
+            (audits if entry.get("audit") else attempts)[entry["task"]].append(entry)
+    summary = {}
+    for task, entries in sorted(attempts.items()):
+        by_model = defaultdict(list)
+        for e in entries:
+            by_model[(e["tier"], e["model"])].append(e)
+        for (tier, model), rows in sorted(by_model.items()):
+            # how often this tier's accepted answers matched the top model's
+            agreement = [a["agree"] for a in audits.get(task, []) if a["tier"] == tier]
+            latencies = sorted(r["latency_s"] for r in rows)
+            summary[f"{task}/{tier}:{model}"] = {
+                "attempts": len(rows),
+                "pass_rate": round(sum(r["ok"] for r in rows) / len(rows), 4),
+                "escalation_rate": round(sum(r["escalated"] for r in rows) / len(rows), 4),
+                "mean_latency_s": round(sum(latencies) / len(latencies), 3),
+                "p90_latency_s": latencies[int(0.9 * (len(latencies) - 1))],
+                "audit_agreement": round(sum(agreement) / len(agreement), 4) if agreement else None,
+                "audits": len(agreement),
+            }
+    return summary
+
+
+if __name__ == "__main__":
+    # python extraction_cascade.py [stats.jsonl]
+    for name, row in summarize(sys.argv[1] if len(sys.argv) > 1 else STATS_PATH).items():
+        print(name, json.dumps(row))
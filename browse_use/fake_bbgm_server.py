@@ -0,0 +1,112 @@
+import os
+import json
+import logging
+import argparse
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+# The whole game runs client-side (fixtures/fake_bbgm.js) against the browser's IndexedDB,
+# like the real site; this server only hands out the shell page and the script.
+APP_JS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "fake_bbgm.js")
+
+SHELL_HTML = """<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Basketball GM</title>
+<style>
+body {{ font-family: sans-serif; margin: 0; }}
+nav, .sidebar {{ padding: 4px 8px; border-bottom: 1px solid #ccc; }}
+nav .container-fluid, .dropdown-links {{ display: flex; gap: 12px; align-items: center; }}
+.dropdown-menu {{ display: flex; flex-direction: column; position: absolute; background: #fff; border: 1px solid #ccc; }}
+.dropdown-menu[hidden] {{ display: none; }}
+.processing-label {{ opacity: 0; }}
+#actual-content {{ padding: 8px; }}
+.row {{ display: flex; gap: 16px; }}
+.col-md-9 {{ flex: 3; }}
+.col-md-3 {{ flex: 1; }}
+.card {{ border: 1px solid #ccc; margin: 8px 0; padding: 8px; }}
+td {{ padding: 0 6px; }}
+</style>
+<script>window.FAKE_BBGM_CONFIG = {config};</script>
+<script src="/fake_bbgm.js" defer></script>
+</head>
+<body><div id="content"></div></body>
+</html>
+"""
+
+
+class FakeBBGMHandler(BaseHTTPRequestHandler):
+    """Serves the app script at /fake_bbgm.js and the shell page for every other path."""
+
+    def __init__(self, *args, config: dict, **kwargs):
+        self.config = config
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/fake_bbgm.js":
+            with open(APP_JS, "rb") as f:
+                self._send(200, "application/javascript", f.read())
+        elif path == "/favicon.ico":
+            self._send(404, "text/plain", b"")
+        else:
+            body = SHELL_HTML.format(config=json.dumps(self.config)).encode("utf-8")
+            self._send(200, "text/html; charset=utf-8", body)
+
+    def _send(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s " + format, self.address_string(), *args)
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8765, seed: int = 1,
+                sim_delay_ms: int = 200) -> ThreadingHTTPServer:
+    """Server for the stand-in game; port 0 picks a free port."""
+    config = {"seed": seed, "simDelayMs": sim_delay_ms}
+    return ThreadingHTTPServer((host, port), partial(FakeBBGMHandler, config=config))
+
+
+def serve_in_thread(host: str = "127.0.0.1", port: int = 0, seed: int = 1,
+                    sim_delay_ms: int = 200) -> Tuple[ThreadingHTTPServer, str]:
+    """Start a server on a daemon thread; returns it and its base URL (for GM_BASE_URL)."""
+    server = make_server(host, port, seed, sim_delay_ms)
+    threading.Thread(target=server.serve_forever, name="fake-bbgm", daemon=True).start()
+    base_url = f"http://{host}:{server.server_address[1]}"
+    logger.info(f"Stand-in Basketball GM at {base_url} (seed {seed})")
+    return server, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for play.basketball-gm.com")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=1, help="same seed + same decisions = same league")
+    parser.add_argument("--sim-delay-ms", type=int, default=200,
+                        help="how long the Processing spinner shows for each simulation")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = make_server(args.host, args.port, args.seed, args.sim_delay_ms)
+    print(f"Serving the stand-in game at http://{args.host}:{server.server_address[1]}; "
+          f"run the agents with GM_BASE_URL=http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import os
+import re
+import logging
+from typing import Optional
+
+from playwright.async_api import Browser, BrowserContext, Playwright, Route
+
+import gm_config
+
+logger = logging.getLogger(__name__)
+
+# Opt in for the interactive entry points; multi_league.py / season_farm.py use it by default
+FAST_BROWSE = os.getenv("GM_FAST_BROWSE", "0") == "1"
+
+VIEWPORT = {"width": 1280, "height": 800}
+
+LAUNCH_ARGS = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--mute-audio",
+    "--blink-settings=imagesEnabled=false",
+]
+
+CONTEXT_OPTIONS = {
+    "viewport": VIEWPORT,
+    "device_scale_factor": 1,
+    "reduced_motion": "reduce",
+    # requests made by a service worker bypass context.route
+    "service_workers": "block",
+}
+
+# The game and its league database are served from these hosts (plus GM_BASE_URL's); everything else is ads and analytics
+FIRST_PARTY_HOSTS = ("basketball-gm.com", "zengm.com", "localhost", "127.0.0.1")
+if gm_config.host() and gm_config.host() not in FIRST_PARTY_HOSTS:
+    FIRST_PARTY_HOSTS += (gm_config.host(),)
+
+# Matched inside the Playwright driver, so allowed requests never make a round trip through Python
+BLOCKED_FILES = re.compile(r"\.(png|jpe?g|gif|webp|avif|svg|ico|woff2?|ttf|otf|eot|mp3|mp4|webm|ogg|wav)(\?.*)?$",
+                           re.IGNORECASE)
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+NO_ANIMATIONS_CSS = """
+*, *::before, *::after {
+  animation: none !important;
+  transition: none !important;
+  scroll-behavior: auto !important;
+}
+"""
+
+_NO_ANIMATIONS_JS = """
+(() => {
+  const add = () => {
+    const style = document.createElement("style");
+    style.textContent = %r;
+    document.head.appendChild(style);
+  };
+  if (document.head) add(); else document.addEventListener("DOMContentLoaded", add);
+})();
+""" % NO_ANIMATIONS_CSS
+
+
+def third_party_pattern(hosts=FIRST_PARTY_HOSTS) -> re.Pattern:
+    allowed = "|".join(re.escape(h) for h in hosts)
+    return re.compile(rf"^https?://(?!(?:[^/]*\.)?(?:{allowed})(?::\d+)?/)[^/]+/")
+
+
+def enabled(fast: Optional[bool] = None) -> bool:
+    return FAST_BROWSE if fast is None else fast
+
+
+async def _abort(route: Route) -> None:
+    await route.abort()
+
+
+async def _abort_heavy(route: Route) -> None:
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.fallback()
+
+
+async def launch(playwright: Playwright, headless: Optional[bool] = None, fast: Optional[bool] = None) -> Browser:
+    """Chromium with the fast-browse flags when enabled; headless defaults to the profile."""
+    fast = enabled(fast)
+    headless = fast if headless is None else headless
+    return await playwright.chromium.launch(headless=headless, args=LAUNCH_ARGS if fast else None)
+
+
+async def install(context: BrowserContext, first_party_hosts=FIRST_PARTY_HOSTS) -> None:
+    """Block images, fonts, media and third-party hosts, and turn off CSS animations, for every page."""
+    await context.route(third_party_pattern(first_party_hosts), _abort)
+    await context.route(BLOCKED_FILES, _abort_heavy)
+    await context.add_init_script(_NO_ANIMATIONS_JS)
+
+
+async def new_context(browser: Browser, fast: Optional[bool] = None, **options) -> BrowserContext:
+    """browser.new_context(**options), with the fast-browse profile taking precedence when enabled."""
+    if not enabled(fast):
+        return await browser.new_context(**options)
+    context = await browser.new_context(**{**options, **CONTEXT_OPTIONS})
+    await install(context)
+    logger.debug("Fast-browse context: %s", CONTEXT_OPTIONS)
+    return context
@@ -0,0 +1,242 @@
+import re
+import sys
+import json
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import pathlib
+import threading
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = "trade_feedback.sqlite"
+LEGACY_TEXT_FILE = "trade_feedback.txt"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_hash TEXT NOT NULL UNIQUE,
+    ts TEXT NOT NULL,
+    trade_text TEXT NOT NULL,
+    trade_json TEXT,
+    ai_decision TEXT,
+    confidence REAL,
+    user_feedback TEXT,
+    label INTEGER,
+    model_version TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS feedback_ts ON feedback (ts);
+CREATE INDEX IF NOT EXISTS feedback_label ON feedback (label);
+CREATE INDEX IF NOT EXISTS feedback_model_version ON feedback (model_version);
+CREATE TABLE IF NOT EXISTS imports (path TEXT NOT NULL, sha256 TEXT NOT NULL PRIMARY KEY, imported_at TEXT, rows INTEGER);
+"""
+
+
+class FeedbackRecord(BaseModel):
+    id: Optional[int] = None
+    ts: str
+    trade_text: str
+    trade_json: Optional[str] = None
+    ai_decision: Optional[str] = None
+    confidence: Optional[float] = None
+    user_feedback: Optional[str] = None
+    label: Optional[int] = None  # 1 = good trade, 0 = bad trade, None = unlabelled
+    model_version: Optional[str] = None
+    source: Optional[str] = None
+
+    @property
+    def content_hash(self) -> str:
+        key = "\x1f".join([" ".join(self.trade_text.split()), self.ai_decision or "", self.user_feedback or ""])
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def label_from_feedback(user_feedback: Optional[str]) -> Optional[int]:
+    if user_feedback is None:
+        return None
+    feedback = user_feedback.strip().lower()
+    return {"yes": 1, "no": 0}.get(feedback)
+
+
+class FeedbackStore:
+    """SQLite (WAL) store for trade evaluations and human feedback.
+
+    Rows are deduplicated by a hash of the trade text, AI decision and user
+    feedback. Reads page through the table by id, so training and analysis can
+    stream the history (or just the rows after a cursor) without loading it all.
+    """
+
+    _COLUMNS = ["id", "ts", "trade_text", "trade_json", "ai_decision", "confidence",
+                "user_feedback", "label", "model_version", "source"]
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def add_many(self, records: List[FeedbackRecord]) -> int:
+        """Insert records, skipping duplicates. Returns the number actually inserted."""
+        rows = [(r.content_hash, r.ts, r.trade_text, r.trade_json, r.ai_decision, r.confidence,
+                 r.user_feedback, r.label, r.model_version, r.source) for r in records]
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO feedback (content_hash, ts, trade_text, trade_json, ai_decision, confidence,"
+                " user_feedback, label, model_version, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+            return self._db.total_changes - before
+
+    def add(self, trade_text: str, ai_decision: Optional[str] = None, confidence: Optional[float] = None,
+            user_feedback: Optional[str] = None, trade_json: Optional[str] = None,
+            model_version: Optional[str] = None, source: str = "live", ts: Optional[str] = None) -> Optional[int]:
+        """Insert one evaluation; returns its row id, or None if it was a duplicate."""
+        record = FeedbackRecord(
+            ts=ts or datetime.now().strftime(TIMESTAMP_FORMAT),
+            trade_text=trade_text,
+            trade_json=trade_json,
+            ai_decision=ai_decision,
+            confidence=confidence,
+            user_feedback=user_feedback,
+            label=label_from_feedback(user_feedback),
+            model_version=model_version,
+            source=source,
+        )
+        if not self.add_many([record]):
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT id FROM feedback WHERE content_hash = ?", (record.content_hash,)).fetchone()
+        return row[0]
+
+    async def add_async(self, *args, **kwargs) -> Optional[int]:
+        """add() on a worker thread so the event loop driving the browser never blocks on disk."""
+        return await asyncio.to_thread(self.add, *args, **kwargs)
+
+    def iter_records(self, since: Optional[str] = None, until: Optional[str] = None,
+                     label: Optional[int] = None, labelled_only: bool = False,
+                     model_version: Optional[str] = None, after_id: int = 0,
+                     batch_size: int = 1000) -> Iterator[FeedbackRecord]:
+        """Stream records in id order, filtered by timestamp range, label and model version."""
+        where = ["id > ?"]
+        params: list = []
+        if since is not None:
+            where.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("ts < ?")
+            params.append(until)
+        if label is not None:
+            where.append("label = ?")
+            params.append(label)
+        elif labelled_only:
+            where.append("label IS NOT NULL")
+        if model_version is not None:
+            where.append("model_version = ?")
+            params.append(model_version)
+        query = f"SELECT {', '.join(self._COLUMNS)} FROM feedback WHERE {' AND '.join(where)} ORDER BY id LIMIT ?"
+        cursor = after_id
+        while True:
+            with self._lock:
+                rows = self._db.execute(query, [cursor, *params, batch_size]).fetchall()
+            for row in rows:
+                yield FeedbackRecord(**dict(zip(self._COLUMNS, row)))
+            if len(rows) < batch_size:
+                return
+            cursor = rows[-1][0]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT label, COUNT(*) FROM feedback GROUP BY label"
+            ).fetchall()
+        by_label = {("unlabelled" if label is None else str(label)): n for label, n in rows}
+        return {"total": sum(by_label.values()), "by_label": by_label}
+
+    def import_text_file(self, path: str = LEGACY_TEXT_FILE) -> int:
+        """One-time import of the legacy append-only text file. Re-importing the same file is a no-op."""
+        data = pathlib.Path(path).read_bytes()
+        sha = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM imports WHERE sha256 = ?", (sha,)).fetchone():
+                logger.info(f"{path} already imported")
+                return 0
+        records = parse_text_feedback(data.decode("utf-8"), source=f"import:{pathlib.Path(path).name}")
+        inserted = self.add_many(records)
+        with self._lock:
+            self._db.execute("INSERT INTO imports (path, sha256, imported_at, rows) VALUES (?, ?, ?, ?)",
+                             (str(path), sha, datetime.now().strftime(TIMESTAMP_FORMAT), inserted))
+            self._db.commit()
+        logger.info(f"Imported {inserted} of {len(records)} records from {path}")
+        return inserted
+
+    def close(self) -> None:
+        self._db.close()
+
+
+_BLOCK_RE = re.compile(r"=== Trade Evaluation (.*?) ===")
+
+
+def parse_text_feedback(text: str, source: str = "import") -> List[FeedbackRecord]:
+    """Parse the legacy trade_feedback.txt block format."""
+    parts = _BLOCK_RE.split(text)
+    records = []
+    # parts = [preamble, ts1, body1, ts2, body2, ...]
+    for ts, body in zip(parts[1::2], parts[2::2]):
+        body = body.strip().rstrip("=").strip()
+        if not body:
+            continue
+        trade_text = body.split("AI Decision")[0].strip()
+        if trade_text.startswith("Trade Information:"):
+            trade_text = trade_text[len("Trade Information:"):].strip()
+        decision = re.search(r"AI Decision:\s*(\w+)", body)
+        confidence = re.search(r"Confidence:\s*([\d.]+)", body)
+        feedback = re.search(r"User Feedback:\s*(\w+)", body)
+        user_feedback = feedback.group(1).lower() if feedback else None
+        records.append(FeedbackRecord(
+            ts=ts.strip(),
+            trade_text=trade_text,
+            ai_decision=decision.group(1) if decision else None,
+            confidence=float(confidence.group(1)) if confidence else None,
+            user_feedback=user_feedback,
+            label=label_from_feedback(user_feedback),
+            source=source,
+        ))
+    return records
+
+
+_stores = {}
+
+
+def get_store(path: str = DEFAULT_STORE_PATH) -> FeedbackStore:
+    """Shared store per path; imports the legacy text file the first time the store is empty."""
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = FeedbackStore(path)
+        if store.count() == 0 and pathlib.Path(LEGACY_TEXT_FILE).exists():
+            store.import_text_file(LEGACY_TEXT_FILE)
+    return store
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    # python feedback_store.py [import <file> | stats]
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    store = FeedbackStore()
+    if command == "import":
+        store.import_text_file(sys.argv[2] if len(sys.argv) > 2 else LEGACY_TEXT_FILE)
+    print(json.dumps(store.stats(), indent=2))
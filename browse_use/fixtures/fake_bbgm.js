@@ -0,0 +1,790 @@
+// Stand-in for the Basketball GM client, served by fake_bbgm_server.py.
+//
+// Like the real game, all league state lives in the browser's IndexedDB
+// (league{lid}, same store layout), so league_export.py, league_snapshot.py
+// and isolated browser contexts behave exactly as they do against the real
+// site. Pages use the roles, names and CSS selectors the agents rely on
+// (dom_extract.py, web2.py, counter_offer.py). Everything is driven by a
+// seeded PRNG: the same seed and the same user decisions give the same league.
+(function (global) {
+  "use strict";
+
+  const CONFIG = Object.assign({ seed: 1, simDelayMs: 200 }, global.FAKE_BBGM_CONFIG || {});
+
+  const PHASE = { PRESEASON: 0, REGULAR_SEASON: 1, AFTER_TRADE_DEADLINE: 2, PLAYOFFS: 3, DRAFT: 5 };
+  const PHASE_LABEL = {
+    0: "preseason",
+    1: "regular season",
+    2: "regular season (after trade deadline)",
+    3: "playoffs",
+    5: "draft",
+  };
+  const NUM_GAMES = 82;
+  const TRADE_DEADLINE_DAY = 50;
+  const PLAYOFF_TEAMS = 16;
+  const ROSTER_SIZE = 14;
+  const MIN_ROSTER = 13;
+  const MAX_ROSTER = 15;
+  const SALARY_CAP = 140588; // thousands, as stored by the game
+  const MIN_CONTRACT = 1157;
+  const MAX_CONTRACT = 50000;
+  const SALARY_MATCH = 1.25;
+  const SALARY_MATCH_BUFFER = 100;
+  const FREE_AGENT = -1;
+  const STORES = {
+    gameAttributes: "key",
+    teams: "tid",
+    teamSeasons: "rid",
+    players: "pid",
+    draftPicks: "dpid",
+    releasedPlayers: "rid",
+    trade: "rid",
+    playoffSeries: "season",
+  };
+
+  const TEAMS = [
+    ["Atlanta", "Gold Club", "ATL"], ["Baltimore", "Crabs", "BAL"], ["Boston", "Massacre", "BOS"],
+    ["Charlotte", "Queens", "CHA"], ["Chicago", "Whirlwinds", "CHI"], ["Cincinnati", "Riots", "CIN"],
+    ["Cleveland", "Curses", "CLE"], ["Dallas", "Snipers", "DAL"], ["Denver", "High", "DEN"],
+    ["Detroit", "Muscle", "DET"], ["Houston", "Apollos", "HOU"], ["Las Vegas", "High Rollers", "LV"],
+    ["Los Angeles", "Earthquakes", "LA"], ["Los Angeles", "Lowriders", "LAL"], ["Memphis", "Blues", "MEM"],
+    ["Miami", "Cyclones", "MIA"], ["Milwaukee", "Cheesemakers", "MIL"], ["Minneapolis", "Freezers", "MIN"],
+    ["Montreal", "Mounties", "MON"], ["New York", "Bankers", "NYC"], ["Oklahoma City", "Tornadoes", "OKC"],
+    ["Orlando", "Juice", "ORL"], ["Philadelphia", "Liberty", "PHI"], ["Phoenix", "Vultures", "PHO"],
+    ["Pittsburgh", "Rivers", "PIT"], ["Portland", "Roses", "POR"], ["Sacramento", "Gold Rush", "SAC"],
+    ["San Antonio", "Churros", "SA"], ["Seattle", "Symphony", "SEA"], ["Toronto", "Beavers", "TOR"],
+  ];
+  const FIRST_NAMES = ["James", "Marcus", "Tyrese", "Jalen", "Devin", "Malik", "Anthony", "Chris", "Darius",
+    "Isaiah", "Jordan", "Kevin", "Luka", "Miles", "Nikola", "Paul", "Quentin", "Ricky", "Shai", "Trae",
+    "Victor", "Zion", "Andre", "Brandon", "Cole", "Donovan", "Evan", "Franz", "Grant", "Herb"];
+  const LAST_NAMES = ["Adams", "Brooks", "Carter", "Davis", "Edwards", "Fox", "Green", "Harris", "Irving",
+    "Johnson", "King", "Lopez", "Mitchell", "Nance", "Okafor", "Porter", "Randle", "Smith", "Thompson",
+    "Upshaw", "Valentine", "Walker", "Young", "Zubac", "Bridges", "Murray", "Holiday", "Jackson", "Ball", "Allen"];
+  const POSITIONS = ["PG", "SG", "SF", "PF", "C", "G", "F", "GF", "FC"];
+
+  // ─── Seeded randomness ────────────────────────────────────────────────
+  function mulberry32(a) {
+    return function () {
+      a = (a + 0x6d2b79f5) | 0;
+      let t = Math.imul(a ^ (a >>> 15), 1 | a);
+      t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+      return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+  }
+
+  function rng(...parts) {
+    let h = 0x811c9dc5;
+    for (const p of parts) h = Math.imul(h ^ (p >>> 0), 0x01000193) >>> 0;
+    return mulberry32(h);
+  }
+
+  const pick = (r, items) => items[Math.floor(r() * items.length)];
+
+  // ─── League model ─────────────────────────────────────────────────────
+  function attr(L, key) {
+    const value = L.gameAttributes[key];
+    return Array.isArray(value) && value.length && value[value.length - 1] && "value" in value[value.length - 1]
+      ? value[value.length - 1].value : value;
+  }
+
+  function setAttr(L, key, value) {
+    L.gameAttributes[key] = value;
+  }
+
+  const season = (L) => attr(L, "season");
+  const userTid = (L) => attr(L, "userTid");
+  const rating = (p) => p.ratings[p.ratings.length - 1];
+  const playerName = (p) => `${p.firstName} ${p.lastName}`;
+  const teamName = (t) => `${t.region} ${t.name}`;
+  const roster = (L, tid) => L.players.filter((p) => p.tid === tid).sort((a, b) => rating(b).ovr - rating(a).ovr);
+  const payroll = (L, tid) => roster(L, tid).reduce((sum, p) => sum + p.contract.amount, 0) +
+    L.releasedPlayers.filter((r) => r.tid === tid).reduce((sum, r) => sum + r.contract.amount, 0);
+  const teamSeason = (L, tid) => L.teamSeasons.find((ts) => ts.tid === tid && ts.season === season(L));
+
+  function strength(L, tid) {
+    const top = roster(L, tid).slice(0, 10).map((p) => rating(p).ovr);
+    return top.length ? top.reduce((a, b) => a + b, 0) / top.length : 0;
+  }
+
+  function makePlayer(r, pid, tid, year) {
+    const age = 20 + Math.floor(r() * 14);
+    const ovr = Math.round(38 + r() * 30 - (tid === FREE_AGENT ? 6 : 0));
+    const pot = Math.max(ovr, Math.round(ovr + Math.max(0, 27 - age) * r() * 2.5));
+    const amount = Math.min(MAX_CONTRACT, Math.max(MIN_CONTRACT,
+      Math.round((MIN_CONTRACT + Math.max(ovr - 40, 0) ** 2 * 35) / 10) * 10));
+    return {
+      pid, tid,
+      firstName: pick(r, FIRST_NAMES),
+      lastName: pick(r, LAST_NAMES),
+      born: { year: year - age },
+      contract: { amount, exp: year + 1 + Math.floor(r() * 4) },
+      ratings: [{ season: year, ovr, pot, pos: pick(r, POSITIONS) }],
+    };
+  }
+
+  function newLeague(lid, seed, user, year) {
+    const r = rng(seed, year, 1);
+    const L = {
+      lid,
+      gameAttributes: {},
+      teams: TEAMS.map(([region, name, abbrev], tid) => ({ tid, region, name, abbrev })),
+      teamSeasons: [],
+      players: [],
+      draftPicks: [],
+      releasedPlayers: [],
+      trade: [],
+      playoffSeries: [],
+    };
+    let pid = 0;
+    for (const t of L.teams) for (let i = 0; i < ROSTER_SIZE; i++) L.players.push(makePlayer(r, pid++, t.tid, year));
+    for (let i = 0; i < 30; i++) L.players.push(makePlayer(r, pid++, FREE_AGENT, year));
+    Object.assign(L.gameAttributes, {
+      season: year,
+      phase: PHASE.PRESEASON,
+      userTid: [{ start: null, value: user }],
+      salaryCap: SALARY_CAP,
+      salaryCapType: "soft",
+      salaryCapTradeSalaryMatch: SALARY_MATCH * 100,
+      minRosterSize: MIN_ROSTER,
+      maxRosterSize: MAX_ROSTER,
+      numGames: NUM_GAMES,
+      leagueName: `League ${lid}`,
+      seed,
+      day: 0,
+      tradesMade: 0,
+    });
+    startSeason(L, year);
+    resetTrade(L, (user + 1) % L.teams.length);
+    return L;
+  }
+
+  function startSeason(L, year) {
+    for (const t of L.teams) {
+      L.teamSeasons.push({ rid: L.teamSeasons.length, tid: t.tid, season: year, won: 0, lost: 0, gp: 0,
+        ptsDiff: 0, playoffRoundsWon: -1 });
+    }
+    const existing = new Set(L.draftPicks.map((dp) => `${dp.originalTid}:${dp.season}:${dp.round}`));
+    let dpid = L.draftPicks.reduce((m, dp) => Math.max(m, dp.dpid + 1), 0);
+    for (const s of [year + 1, year + 2]) {
+      for (const t of L.teams) {
+        for (const round of [1, 2]) {
+          if (!existing.has(`${t.tid}:${s}:${round}`)) {
+            L.draftPicks.push({ dpid: dpid++, tid: t.tid, originalTid: t.tid, season: s, round });
+          }
+        }
+      }
+    }
+  }
+
+  function resetTrade(L, otherTid) {
+    L.trade = [{ rid: 0, teams: [
+      { tid: userTid(L), pids: [], dpids: [], pidsExcluded: [], dpidsExcluded: [] },
+      { tid: otherTid, pids: [], dpids: [], pidsExcluded: [], dpidsExcluded: [] },
+    ] }];
+  }
+
+  // ─── Simulation and phase machine ─────────────────────────────────────
+  function playGame(L, r, a, b) {
+    const diff = strength(L, a) - strength(L, b) + 1.0; // home court
+    const margin = Math.round(diff * 1.2 + (r() - 0.5) * 28) || 1;
+    const [winner, loser] = margin > 0 ? [a, b] : [b, a];
+    return { winner, loser, margin: Math.abs(margin) };
+  }
+
+  function simDays(L, days) {
+    for (let i = 0; i < days; i++) {
+      const day = attr(L, "day");
+      if (day >= NUM_GAMES) break;
+      const r = rng(attr(L, "seed"), season(L), day, 7);
+      const order = L.teams.map((t) => t.tid).map((tid) => [r(), tid]).sort((x, y) => x[0] - y[0]);
+      for (let k = 0; k + 1 < order.length; k += 2) {
+        const { winner, loser, margin } = playGame(L, r, order[k][1], order[k + 1][1]);
+        const w = teamSeason(L, winner), l = teamSeason(L, loser);
+        w.won += 1; w.gp += 1; w.ptsDiff += margin;
+        l.lost += 1; l.gp += 1; l.ptsDiff -= margin;
+      }
+      setAttr(L, "day", day + 1);
+      if (day + 1 > TRADE_DEADLINE_DAY && attr(L, "phase") === PHASE.REGULAR_SEASON) {
+        setAttr(L, "phase", PHASE.AFTER_TRADE_DEADLINE);
+      }
+    }
+  }
+
+  function standings(L) {
+    return L.teamSeasons.filter((ts) => ts.season === season(L))
+      .sort((a, b) => b.won - a.won || b.ptsDiff - a.ptsDiff || a.tid - b.tid);
+  }
+
+  function startPlayoffs(L) {
+    simDays(L, NUM_GAMES);
+    const seeds = standings(L).slice(0, PLAYOFF_TEAMS);
+    for (const ts of seeds) ts.playoffRoundsWon = 0;
+    L.playoffSeries = L.playoffSeries.filter((ps) => ps.season !== season(L));
+    L.playoffSeries.push({ season: season(L), seeds: seeds.map((ts) => ts.tid), rounds: [] });
+    setAttr(L, "phase", PHASE.PLAYOFFS);
+  }
+
+  function playPlayoffs(L) {
+    const ps = L.playoffSeries.find((s) => s.season === season(L));
+    const r = rng(attr(L, "seed"), season(L), 3);
+    let alive = ps.seeds.slice();
+    while (alive.length > 1) {
+      const next = [], round = [];
+      for (let i = 0; i < alive.length / 2; i++) {
+        const a = alive[i], b = alive[alive.length - 1 - i];
+        let winsA = 0, winsB = 0;
+        while (winsA < 4 && winsB < 4) {
+          if (playGame(L, r, a, b).winner === a) winsA++; else winsB++;
+        }
+        const winner = winsA === 4 ? a : b;
+        teamSeason(L, winner).playoffRoundsWon += 1;
+        round.push({ home: a, away: b, won: [winsA, winsB] });
+        next.push(winner);
+      }
+      ps.rounds.push(round);
+      alive = next;
+    }
+    setAttr(L, "phase", PHASE.DRAFT);
+  }
+
+  function newSeason(L) {
+    const year = season(L) + 1;
+    const r = rng(attr(L, "seed"), year, 5);
+    setAttr(L, "season", year);
+    setAttr(L, "day", 0);
+    L.draftPicks = L.draftPicks.filter((dp) => dp.season > year - 1);
+    for (const p of L.players) {
+      const prev = rating(p);
+      const age = year - p.born.year;
+      const change = Math.round((age < 25 ? 2.5 : age < 30 ? 0.5 : -2.5) + (r() - 0.5) * 6);
+      p.ratings.push({ season: year, ovr: Math.max(30, prev.ovr + change), pot: Math.max(prev.pot, prev.ovr + change),
+        pos: prev.pos });
+      if (p.tid >= 0 && p.contract.exp < year) p.tid = FREE_AGENT;
+    }
+    L.releasedPlayers = L.releasedPlayers.filter((rp) => rp.contract.exp >= year);
+    startSeason(L, year);
+    // every team, the user's included, refills to the minimum from the best free agents
+    for (const t of L.teams) {
+      let size = roster(L, t.tid).length;
+      for (const fa of roster(L, FREE_AGENT)) {
+        if (size >= MIN_ROSTER) break;
+        fa.tid = t.tid;
+        fa.contract = { amount: fa.contract.amount, exp: year + 1 + Math.floor(r() * 3) };
+        size++;
+      }
+    }
+    setAttr(L, "phase", PHASE.PRESEASON);
+  }
+
+  const PLAY_OPTIONS = {
+    "One day": (L) => {
+      if (attr(L, "phase") === PHASE.PRESEASON) setAttr(L, "phase", PHASE.REGULAR_SEASON);
+      simDays(L, 1);
+    },
+    "Until regular season": (L) => {
+      if (attr(L, "phase") === PHASE.DRAFT) newSeason(L);
+      setAttr(L, "phase", PHASE.REGULAR_SEASON);
+    },
+    "Until trade deadline": (L) => {
+      setAttr(L, "phase", PHASE.REGULAR_SEASON);
+      simDays(L, TRADE_DEADLINE_DAY - attr(L, "day"));
+    },
+    "Until playoffs": (L) => startPlayoffs(L),
+    "Through playoffs": (L) => playPlayoffs(L),
+  };
+
+  function playOptions(L) {
+    const phase = attr(L, "phase");
+    if (phase === PHASE.PRESEASON) return ["Until regular season", "Until playoffs"];
+    if (phase === PHASE.REGULAR_SEASON && attr(L, "day") < TRADE_DEADLINE_DAY) {
+      return ["One day", "Until trade deadline", "Until playoffs"];
+    }
+    if (phase === PHASE.REGULAR_SEASON || phase === PHASE.AFTER_TRADE_DEADLINE) return ["One day", "Until playoffs"];
+    if (phase === PHASE.PLAYOFFS) return ["Through playoffs"];
+    return ["Until regular season"];
+  }
+
+  // ─── Trades ───────────────────────────────────────────────────────────
+  function assetValue(L, p) {
+    const rt = rating(p);
+    const age = season(L) - p.born.year;
+    let value = Math.max(rt.ovr - 40, 0) ** 2 / 10;
+    if (age < 25) value += Math.max(rt.pot - rt.ovr, 0) * 0.6;
+    return value - p.contract.amount / 1000 * 0.15;
+  }
+
+  const pickValue = (dp) => (dp.round === 1 ? 14 : 2);
+  const byPid = (L) => new Map(L.players.map((p) => [p.pid, p]));
+  const byDpid = (L) => new Map(L.draftPicks.map((dp) => [dp.dpid, dp]));
+
+  function tradeSides(L, trade) {
+    const players = byPid(L), picks = byDpid(L);
+    return trade.teams.map((side) => ({
+      tid: side.tid,
+      players: side.pids.map((pid) => players.get(pid)).filter(Boolean),
+      picks: side.dpids.map((dpid) => picks.get(dpid)).filter(Boolean),
+    }));
+  }
+
+  function tradeProblems(L, trade) {
+    const sides = tradeSides(L, trade);
+    const problems = [];
+    const phase = attr(L, "phase");
+    if (phase !== PHASE.PRESEASON && phase !== PHASE.REGULAR_SEASON && phase !== PHASE.DRAFT) {
+      problems.push("You're not allowed to make trades now.");
+    }
+    sides.forEach((side, i) => {
+      const other = sides[1 - i];
+      const out = side.players.reduce((s, p) => s + p.contract.amount, 0);
+      const inc = other.players.reduce((s, p) => s + p.contract.amount, 0);
+      const after = payroll(L, side.tid) + inc - out;
+      const name = teamName(L.teams[side.tid]);
+      if (after > SALARY_CAP && inc > SALARY_MATCH * out + SALARY_MATCH_BUFFER) {
+        problems.push(`The ${name} are over the cap and would take back more than 125% of the salary they send.`);
+      }
+      const size = roster(L, side.tid).length + other.players.length - side.players.length;
+      if (size > MAX_ROSTER) problems.push(`The ${name} would have more than ${MAX_ROSTER} players.`);
+      if (size < MIN_ROSTER && side.players.length > other.players.length) {
+        problems.push(`The ${name} would have fewer than ${MIN_ROSTER} players.`);
+      }
+    });
+    return problems;
+  }
+
+  // value the AI team receives minus the value it sends away
+  function aiSurplus(L, trade) {
+    const total = (side) => side.players.reduce((s, p) => s + assetValue(L, p), 0) +
+      side.picks.reduce((s, dp) => s + pickValue(dp), 0);
+    const [user, ai] = tradeSides(L, trade);
+    return total(user) - total(ai);
+  }
+
+  function proposeTrade(L) {
+    const trade = L.trade[0];
+    const [user, ai] = tradeSides(L, trade);
+    if (!user.players.length && !user.picks.length && !ai.players.length && !ai.picks.length) {
+      return { accepted: false, message: "Trade rejected! You have to trade something." };
+    }
+    const problems = tradeProblems(L, trade);
+    if (problems.length) return { accepted: false, message: `Trade rejected! ${problems.join(" ")}` };
+    if (aiSurplus(L, trade) <= 0) return { accepted: false, message: 'Trade rejected! "What, are you crazy?!"' };
+    for (const p of user.players) p.tid = ai.tid;
+    for (const p of ai.players) p.tid = user.tid;
+    for (const dp of user.picks) dp.tid = ai.tid;
+    for (const dp of ai.picks) dp.tid = user.tid;
+    setAttr(L, "tradesMade", attr(L, "tradesMade") + 1);
+    resetTrade(L, ai.tid);
+    return { accepted: true, message: 'Trade accepted! "Nice doing business with you!"' };
+  }
+
+  // AI offers: one of their rotation players for a salary-matched player of ours, sometimes with a pick
+  function tradeProposals(L) {
+    const user = userTid(L);
+    const r = rng(attr(L, "seed"), season(L), attr(L, "day"), attr(L, "tradesMade"), 11);
+    const ours = roster(L, user);
+    const proposals = [];
+    const used = new Set();
+    for (let attempt = 0; attempt < 40 && proposals.length < 5; attempt++) {
+      const tid = pick(r, L.teams.filter((t) => t.tid !== user)).tid;
+      if (used.has(tid)) continue;
+      const theirs = roster(L, tid).slice(2, 10);
+      if (!theirs.length || !ours.length) continue;
+      const give = pick(r, theirs);
+      const want = ours.slice().sort((a, b) => Math.abs(a.contract.amount - give.contract.amount) -
+        Math.abs(b.contract.amount - give.contract.amount))[Math.floor(r() * 3)];
+      if (!want) continue;
+      const sweetener = r() < 0.3 ? L.draftPicks.find((dp) => dp.tid === tid && dp.round === 2) : null;
+      const trade = { rid: 0, teams: [
+        { tid: user, pids: [want.pid], dpids: [], pidsExcluded: [], dpidsExcluded: [] },
+        { tid, pids: [give.pid], dpids: sweetener ? [sweetener.dpid] : [], pidsExcluded: [], dpidsExcluded: [] },
+      ] };
+      if (tradeProblems(L, trade).length || aiSurplus(L, trade) <= 0) continue;
+      used.add(tid);
+      proposals.push(trade);
+    }
+    return proposals;
+  }
+
+  // ─── Formatting ───────────────────────────────────────────────────────
+  const money = (thousands) => `${thousands < 0 ? "-" : ""}$${(Math.abs(thousands) / 1000).toFixed(2)}M`;
+  const ordinal = (round) => (round === 1 ? "1st" : "2nd");
+  const pickText = (L, dp) => `${dp.season} ${ordinal(dp.round)} round pick (${L.teams[dp.originalTid].abbrev})`;
+
+  function tradeSummaryText(L, trade) {
+    const sides = tradeSides(L, trade);
+    const lines = [];
+    sides.forEach((side, i) => {
+      const other = sides[1 - i];
+      lines.push(`${teamName(L.teams[side.tid])} trade away:`);
+      for (const p of side.players) lines.push(`- ${playerName(p)} (${money(p.contract.amount)})`);
+      for (const dp of side.picks) lines.push(`- ${pickText(L, dp)}`);
+      if (!side.players.length && !side.picks.length) lines.push("- nothing");
+      const out = side.players.reduce((s, p) => s + p.contract.amount, 0);
+      const inc = other.players.reduce((s, p) => s + p.contract.amount, 0);
+      lines.push(`Payroll after trade: ${money(payroll(L, side.tid) + inc - out)}`);
+      lines.push(`Salary cap: ${money(SALARY_CAP)}`);
+      if (i === 0) {
+        const before = strength(L, side.tid);
+        const outIds = new Set(side.players.map((p) => p.pid));
+        const after = roster(L, side.tid).filter((p) => !outIds.has(p.pid)).concat(other.players)
+          .map((p) => rating(p).ovr).sort((a, b) => b - a).slice(0, 10);
+        const afterOvr = after.length ? after.reduce((a, b) => a + b, 0) / after.length : 0;
+        lines.push(`Team ovr: ${Math.round(before)} ⇒ ${Math.round(afterOvr)}`);
+      }
+    });
+    return lines.join("\n");
+  }
+
+  const api = {
+    CONFIG, PHASE, PHASE_LABEL, STORES, TRADE_DEADLINE_DAY, NUM_GAMES,
+    rng, newLeague, simDays, standings, playOptions, PLAY_OPTIONS, proposeTrade, tradeProposals,
+    tradeProblems, aiSurplus, tradeSummaryText, roster, payroll, strength, teamSeason, attr, money,
+  };
+  global.FakeBBGM = api;
+  if (typeof module !== "undefined") module.exports = api;
+  if (typeof document === "undefined") return;
+
+  // ─── IndexedDB persistence ────────────────────────────────────────────
+  const request = (req) => new Promise((resolve, reject) => {
+    req.onsuccess = () => resolve(req.result);
+    req.onerror = () => reject(req.error);
+  });
+
+  async function openLeague(lid, create) {
+    const req = indexedDB.open(`league${lid}`, 1);
+    req.onupgradeneeded = () => {
+      if (!create) {
+        req.transaction.abort(); // never create a missing league just by visiting its URL
+        return;
+      }
+      for (const [name, keyPath] of Object.entries(STORES)) req.result.createObjectStore(name, { keyPath });
+    };
+    return request(req);
+  }
+
+  async function loadLeague(lid) {
+    const db = await openLeague(lid, false);
+    const L = { lid };
+    const tx = db.transaction(Object.keys(STORES), "readonly");
+    for (const name of Object.keys(STORES)) L[name] = await request(tx.objectStore(name).getAll());
+    L.gameAttributes = Object.fromEntries(L.gameAttributes.map((r) => [r.key, r.value]));
+    db.close();
+    return L;
+  }
+
+  async function saveLeague(L) {
+    const db = await openLeague(L.lid, true);
+    const tx = db.transaction(Object.keys(STORES), "readwrite");
+    for (const name of Object.keys(STORES)) {
+      const store = tx.objectStore(name);
+      store.clear();
+      const records = name === "gameAttributes"
+        ? Object.entries(L.gameAttributes).map(([key, value]) => ({ key, value }))
+        : L[name];
+      for (const record of records) store.put(record);
+    }
+    await new Promise((resolve, reject) => {
+      tx.oncomplete = resolve;
+      tx.onerror = () => reject(tx.error);
+    });
+    db.close();
+  }
+
+  async function nextLid() {
+    const names = (await indexedDB.databases()).map((d) => d.name);
+    const ids = names.map((n) => /^league(\d+)$/.exec(n)).filter(Boolean).map((m) => Number(m[1]));
+    return ids.length ? Math.max(...ids) + 1 : 1;
+  }
+
+  // ─── Rendering ────────────────────────────────────────────────────────
+  const esc = (s) => String(s).replace(/[&<>"]/g, (c) => ({ "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;" }[c]));
+  const $ = (sel) => document.querySelector(sel);
+
+  function showProcessing() {
+    const spinner = document.createElement("div");
+    spinner.className = "spinner-border";
+    spinner.setAttribute("role", "status");
+    $("#content > nav").appendChild(spinner);
+  }
+
+  const delay = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+  function leagueNav(L) {
+    const base = `/l/${L.lid}`;
+    const label = `${season(L)} ${PHASE_LABEL[attr(L, "phase")]}`;
+    const links = [["Roster", "roster"], ["Trade", "trade"], ["Trade Proposals", "trade_proposals"],
+      ["Free Agents", "free_agents"], ["Standings", "standings"]];
+    return `
+      <nav class="navbar">
+        <div class="container-fluid">
+          <a class="navbar-brand" href="/">BBGM</a>
+          <div class="dropdown-links navbar-nav flex-shrink-1 overflow-hidden text-nowrap">
+            <div class="nav-item"><a class="nav-link" href="${base}">${esc(label)}</a></div>
+          </div>
+          <div class="play-menu">
+            <button type="button" class="btn btn-success" id="play-button">Play</button>
+            <div class="dropdown-menu" id="play-menu" hidden>
+              ${playOptions(L).map((o) => `<button type="button" class="dropdown-item" data-play="${esc(o)}">${esc(o)}</button>`).join("")}
+            </div>
+          </div>
+        </div>
+      </nav>
+      <div class="sidebar">${links.map(([name, path]) => `<a href="${base}/${path}">${name}</a>`).join(" ")}</div>`;
+  }
+
+  function playerRow(L, p, boxes) {
+    const rt = rating(p);
+    const cells = [esc(playerName(p)), rt.pos, season(L) - p.born.year, rt.ovr, rt.pot,
+      `${money(p.contract.amount)} thru ${p.contract.exp}`];
+    return `<tr data-pid="${p.pid}">${boxes}${cells.map((c) => `<td>${c}</td>`).join("")}</tr>`;
+  }
+
+  function rosterPage(L) {
+    const tid = userTid(L);
+    const ts = teamSeason(L, tid);
+    const players = roster(L, tid);
+    const ages = players.map((p) => season(L) - p.born.year);
+    const open = Math.max(MAX_ROSTER - players.length, 0);
+    const mov = ts.gp ? ts.ptsDiff / ts.gp : 0;
+    const lines = [
+      `Record: ${ts.won}-${ts.lost}`,
+      `Team rating: ${Math.round(strength(L, tid))}/100`,
+      `Average MOV: ${mov >= 0 ? "+" : ""}${mov.toFixed(1)}`,
+      `Average age: ${(ages.reduce((a, b) => a + b, 0) / Math.max(ages.length, 1)).toFixed(1)}`,
+      `${open} open roster spot${open === 1 ? "" : "s"}`,
+      `Payroll: ${money(payroll(L, tid))}`,
+      `Salary cap: ${money(SALARY_CAP)}`,
+      `Profit: ${money(165000 - payroll(L, tid))}`,
+    ];
+    return `
+      <h1>${esc(teamName(L.teams[tid]))} Roster</h1>
+      <div class="d-sm-flex mb-3">
+        <div class="d-flex">
+          <div class="team-logo">${esc(L.teams[tid].abbrev)}</div>
+          <div>${lines.map((l) => `<div>${esc(l)}</div>`).join("")}</div>
+        </div>
+      </div>
+      <table class="table"><thead><tr><th>Name</th><th>Pos</th><th>Age</th><th>Ovr</th><th>Pot</th><th>Contract</th></tr></thead>
+        <tbody>${players.map((p) => playerRow(L, p, "")).join("")}</tbody></table>`;
+  }
+
+  function tradeTable(L, side, isUser) {
+    const box = (kind, id, checked, title) =>
+      `<td><input type="checkbox" data-kind="${kind}" data-id="${id}" title="${title}"${checked ? " checked" : ""}></td>`;
+    const rows = roster(L, side.tid).map((p) => playerRow(L, p,
+      (isUser ? box("exclude", p.pid, side.pidsExcluded.includes(p.pid), "Exclude this player from counter offers") : "") +
+      box(isUser ? "user-pid" : "other-pid", p.pid, side.pids.includes(p.pid), "Include in trade")));
+    const picks = L.draftPicks.filter((dp) => dp.tid === side.tid).map((dp) =>
+      `<tr data-dpid="${dp.dpid}">${isUser ? box("exclude-pick", dp.dpid, side.dpidsExcluded.includes(dp.dpid), "Exclude this pick from counter offers") : ""}` +
+      `${box(isUser ? "user-dpid" : "other-dpid", dp.dpid, side.dpids.includes(dp.dpid), "Include in trade")}<td colspan="6">${esc(pickText(L, dp))}</td></tr>`);
+    return `<h2>${esc(teamName(L.teams[side.tid]))}</h2>
+      <table class="table"><tbody>${rows.join("")}${picks.join("")}</tbody></table>`;
+  }
+
+  function tradePage(L, message) {
+    const trade = L.trade[0];
+    const [user, other] = trade.teams;
+    const options = L.teams.filter((t) => t.tid !== user.tid)
+      .map((t) => `<option value="${t.tid}"${t.tid === other.tid ? " selected" : ""}>${esc(teamName(t))}</option>`);
+    return `
+      <h1>Trade</h1>
+      ${message ? `<p class="alert">${esc(message)}</p>` : ""}
+      <div class="row">
+        <div class="col-md-9">
+          <select class="form-select" id="trade-team">${options.join("")}</select>
+          ${tradeTable(L, other, false)}
+          ${tradeTable(L, user, true)}
+        </div>
+        <div class="col-md-3">
+          <div class="trade-summary">
+            <pre>${esc(tradeSummaryText(L, trade))}</pre>
+            <button type="button" class="btn btn-primary" id="propose-trade">Propose trade</button>
+            <button type="button" class="btn btn-secondary" id="clear-trade">Clear trade</button>
+          </div>
+        </div>
+      </div>`;
+  }
+
+  function proposalsPage(L) {
+    const proposals = tradeProposals(L);
+    if (!proposals.length) return "<h1>Trade Proposals</h1><p>No trade proposals right now.</p>";
+    return `<h1>Trade Proposals</h1>` + proposals.map((trade, i) => `
+      <div class="card"><div class="card-body">
+        <pre>${esc(tradeSummaryText(L, trade))}</pre>
+        <button type="button" class="btn btn-primary" data-negotiate="${i}">Negotiate</button>
+      </div></div>`).join("");
+  }
+
+  function freeAgentsPage(L) {
+    const rows = roster(L, FREE_AGENT).map((p) => playerRow(L, p, "").replace("</tr>",
+      `<td><button type="button" class="btn btn-sm" data-sign="${p.pid}">Sign</button></td></tr>`));
+    return `<h1>Free Agents</h1>
+      <p>Payroll: ${money(payroll(L, userTid(L)))}, salary cap: ${money(SALARY_CAP)}, roster: ${roster(L, userTid(L)).length}/${MAX_ROSTER}</p>
+      <table class="table"><tbody>${rows.join("")}</tbody></table>`;
+  }
+
+  function standingsPage(L) {
+    return `<h1>Standings</h1><table class="table"><tbody>${standings(L).map((ts, i) =>
+      `<tr><td>${i + 1}</td><td>${esc(teamName(L.teams[ts.tid]))}</td><td>${ts.won}-${ts.lost}</td></tr>`).join("")}</tbody></table>`;
+  }
+
+  function dashboardPage(L) {
+    const ts = teamSeason(L, userTid(L));
+    // like the real game, the owner weighs in once the playoffs are over
+    const message = attr(L, "phase") === PHASE.DRAFT ? `<a href="/l/${L.lid}/message">Read new message</a>` : "";
+    return `<h1>${esc(teamName(L.teams[userTid(L)]))}</h1><p>${season(L)} ${PHASE_LABEL[attr(L, "phase")]}: ${ts.won}-${ts.lost}</p>${message}`;
+  }
+
+  function messagePage(L) {
+    const ts = teamSeason(L, userTid(L));
+    const verdict = ts.playoffRoundsWon >= 4 ? "Champions! Fantastic work." :
+      ts.playoffRoundsWon >= 0 ? "Making the playoffs was a good step." : "Missing the playoffs is not acceptable.";
+    return `<h1>Message from the owner</h1><p>${ts.won}-${ts.lost} this season. ${verdict}</p>`;
+  }
+
+  function newLeaguePage(real) {
+    const teams = TEAMS.map(([region, name], tid) => `<option value="${tid}">${esc(region)} ${esc(name)}</option>`);
+    return `
+      <h1>Create New League</h1>
+      <form id="new-league" onsubmit="return false">
+        <label>League name <input id="league-name" value="My League"></label>
+        <label>Team <select id="team">${teams.join("")}</select></label>
+        <button type="button" class="btn btn-light" id="random-team">Random</button>
+        <label>Difficulty <select id="difficulty"><option value="0">Normal</option><option value="1">Hard</option></select></label>
+        <label>Players <select id="players"><option value="random">Random players</option>
+          <option value="real"${real ? " selected" : ""}>Real players</option></select></label>
+        <span id="real-options">${real ? realOptions() : ""}</span>
+        <button type="button" class="btn btn-primary" id="create-league">Create League<span class="processing-label"> Processing</span></button>
+      </form>`;
+  }
+
+  function realOptions() {
+    const seasons = [2025, 2024, 2023, 2022, 2021].map((s) => `<option value="${s}">${s}</option>`);
+    return `<label>Season <select id="real-season">${seasons.join("")}</select></label>
+      <button type="button" class="btn btn-light" id="random-season">Random</button>`;
+  }
+
+  function notFoundPage(lid) {
+    return `<h1>Error</h1><p>League ${esc(lid)} does not exist.</p><a href="/new_league">Create a new league</a>`;
+  }
+
+  function homePage() {
+    return `<h1>Basketball GM</h1>
+      <a href="/new_league/real">New league » Real players</a><br>
+      <a href="/new_league">Create a new league</a>`;
+  }
+
+  function mount(html) {
+    $("#content").innerHTML = html;
+  }
+
+  async function route() {
+    const path = location.pathname.replace(/\/+$/, "");
+    const m = /^\/l\/(\d+)(?:\/([a-z_]+))?/.exec(path);
+    if (!m) {
+      if (path.startsWith("/new_league")) return bindNewLeague(path.endsWith("/real"));
+      return mount(`<nav></nav><div id="actual-content"><div id="actual-actual-content">${homePage()}</div></div>`);
+    }
+    const lid = Number(m[1]), view = m[2] || "";
+    let L;
+    try {
+      L = await loadLeague(lid);
+    } catch (e) {
+      return mount(`<nav></nav><div id="actual-content"><div id="actual-actual-content">${notFoundPage(lid)}</div></div>`);
+    }
+    const pages = { "": dashboardPage, roster: rosterPage, trade: tradePage, trade_proposals: proposalsPage,
+      free_agents: freeAgentsPage, standings: standingsPage, message: messagePage };
+    const render = (message) => mount(leagueNav(L) +
+      `<div id="actual-content"><div id="actual-actual-content">${(pages[view] || dashboardPage)(L, message)}</div></div>`);
+    render(sessionStorage.getItem("fakeBbgmMessage") || "");
+    sessionStorage.removeItem("fakeBbgmMessage");
+    bindLeague(L, view, render);
+  }
+
+  function bindLeague(L, view, render) {
+    const base = `/l/${L.lid}`;
+    document.addEventListener("click", async (event) => {
+      const target = event.target.closest("button");
+      if (!target) return;
+      if (target.id === "play-button") {
+        $("#play-menu").hidden = !$("#play-menu").hidden;
+      } else if (target.dataset.play) {
+        $("#play-menu").hidden = true;
+        showProcessing();
+        await delay(CONFIG.simDelayMs);
+        PLAY_OPTIONS[target.dataset.play](L);
+        await saveLeague(L);
+        location.reload();
+      } else if (target.dataset.negotiate !== undefined) {
+        L.trade = [tradeProposals(L)[Number(target.dataset.negotiate)]];
+        await saveLeague(L);
+        location.assign(`${base}/trade`);
+      } else if (target.id === "propose-trade") {
+        const result = proposeTrade(L);
+        await saveLeague(L);
+        render(result.message);
+      } else if (target.id === "clear-trade") {
+        resetTrade(L, L.trade[0].teams[1].tid);
+        await saveLeague(L);
+        render("");
+      } else if (target.dataset.sign !== undefined) {
+        const p = L.players.find((x) => x.pid === Number(target.dataset.sign));
+        const tid = userTid(L);
+        if (roster(L, tid).length >= MAX_ROSTER) return render("Your roster is full.");
+        if (payroll(L, tid) + p.contract.amount > SALARY_CAP && p.contract.amount > MIN_CONTRACT) {
+          return render("This contract would put you over the salary cap.");
+        }
+        p.tid = tid;
+        p.contract = { amount: p.contract.amount, exp: season(L) + 2 };
+        await saveLeague(L);
+        render(`${playerName(p)} signed.`);
+      }
+    });
+    document.addEventListener("change", async (event) => {
+      const el = event.target;
+      if (view !== "trade") return;
+      const [user, other] = L.trade[0].teams;
+      if (el.id === "trade-team") {
+        resetTrade(L, Number(el.value));
+      } else if (el.dataset.kind) {
+        const id = Number(el.dataset.id);
+        const lists = { "user-pid": user.pids, "user-dpid": user.dpids, "other-pid": other.pids,
+          "other-dpid": other.dpids, exclude: user.pidsExcluded, "exclude-pick": user.dpidsExcluded };
+        const list = lists[el.dataset.kind];
+        const at = list.indexOf(id);
+        if (el.checked && at < 0) list.push(id);
+        if (!el.checked && at >= 0) list.splice(at, 1);
+      }
+      await saveLeague(L);
+      render("");
+    });
+  }
+
+  function bindNewLeague(real) {
+    mount(`<nav></nav><div id="actual-content"><div id="actual-actual-content">${newLeaguePage(real)}</div></div>`);
+    const r = rng(CONFIG.seed, 99);
+    document.addEventListener("click", async (event) => {
+      const target = event.target.closest("button");
+      if (!target) return;
+      if (target.id === "random-team") {
+        $("#team").value = String(Math.floor(r() * TEAMS.length));
+      } else if (target.id === "random-season") {
+        const select = $("#real-season");
+        select.selectedIndex = Math.floor(r() * select.options.length);
+      } else if (target.id === "create-league") {
+        showProcessing();
+        const lid = await nextLid();
+        const year = $("#real-season") ? Number($("#real-season").value) : 2025;
+        const L = newLeague(lid, CONFIG.seed, Number($("#team").value), year);
+        await delay(CONFIG.simDelayMs);
+        await saveLeague(L);
+        location.assign(`/l/${lid}`);
+      }
+    });
+    $("#players").addEventListener("change", () => {
+      $("#real-options").innerHTML = $("#players").value === "real" ? realOptions() : "";
+    });
+  }
+
+  route();
+})(typeof window !== "undefined" ? window : globalThis);
@@ -1,6 +1,13 @@
+import os
+import sys
 import random
 from datetime import datetime, timedelta
 import json
+import argparse
+import multiprocessing as mp
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 
 # Sample player pool with realistic salaries and ratings
 PLAYERS = [
@@ -108,18 +115,328 @@ def generate_trade_example():
         "user_feedback": user_feedback
     }
 
+###############################################################################
+# Vectorized generator: whole blocks of trades are sampled as NumPy arrays
+###############################################################################
+FIRST_NAMES = ["Marcus", "Jalen", "Tyrese", "Devin", "Anthony", "Chris", "Jordan", "Kevin", "Malik", "Derrick",
+               "Isaiah", "Cam", "Darius", "Trey", "Andre", "Luka", "Zion", "Paolo", "Scottie", "Franz"]
+LAST_NAMES = ["Johnson", "Williams", "Brown", "Davis", "Miller", "Wilson", "Moore", "Taylor", "Thomas", "Jackson",
+              "White", "Harris", "Martin", "Thompson", "Robinson", "Walker", "Young", "Allen", "King", "Wright"]
+FORMATS = ("text", "jsonl", "columnar", "store")
+START = "2025-01-01 00:00:00"
+PICK_YEARS = (2024, 2028)
+SALARY_CAP = 140.6
+BLOCK_SIZE = 10_000  # unit of seeding and of each write
+
+
+class PlayerPool:
+    """Names, salaries ($M) and ratings as parallel arrays.
+
+    The first entries are PLAYERS; larger pools are padded with seeded
+    synthetic players so that a million trades do not all reuse twenty names.
+    """
+
+    def __init__(self, size: Optional[int] = None, seed: int = 0):
+        names = [p["name"] for p in PLAYERS]
+        salaries = [p["salary"] for p in PLAYERS]
+        ratings = [p["rating"] for p in PLAYERS]
+        extra = max(0, (size or len(PLAYERS)) - len(PLAYERS))
+        if extra:
+            rng = np.random.default_rng(np.random.SeedSequence([seed, 0x706F6F6C]))
+            first = rng.integers(0, len(FIRST_NAMES), extra)
+            last = rng.integers(0, len(LAST_NAMES), extra)
+            names += [f"{FIRST_NAMES[f]} {LAST_NAMES[l]} {i + 1}" for i, (f, l) in enumerate(zip(first, last))]
+            salaries += np.round(np.clip(rng.lognormal(2.5, 0.8, extra), 1.1, 55.0), 1).tolist()
+            ratings += np.clip(np.rint(rng.normal(72, 7, extra)), 40, 99).astype(int).tolist()
+        self.names = np.array(names)
+        self.salaries = np.array(salaries, dtype=np.float64)
+        self.ratings = np.array(ratings, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _distinct_players(rng: np.random.Generator, n: int, pool_size: int, k: int = 6) -> np.ndarray:
+    """(n, k) player indices with no repeats inside a row, by redrawing only the rows that collide."""
+    idx = rng.integers(0, pool_size, (n, k))
+    while True:
+        s = np.sort(idx, axis=1)
+        bad = np.flatnonzero((s[:, 1:] == s[:, :-1]).any(axis=1))
+        if not len(bad):
+            return idx
+        idx[bad] = rng.integers(0, pool_size, (len(bad), k))
+
+
+def sample_trades(rng: np.random.Generator, n: int, pool: PlayerPool) -> Dict[str, np.ndarray]:
+    """Draw n trades at once. Player slots beyond a side's count are -1."""
+    n_teams = len(TEAMS)
+    team1 = rng.integers(0, n_teams, n)
+    team2 = (team1 + rng.integers(1, n_teams, n)) % n_teams  # never the same team
+    n_out = rng.integers(1, 4, n)
+    n_in = rng.integers(1, 4, n)
+    players = _distinct_players(rng, n, len(pool))
+    slot = np.arange(3)
+    out_players = np.where(slot < n_out[:, None], players[:, :3], -1)
+    in_players = np.where(slot < n_in[:, None], players[:, 3:], -1)
+    salaries = np.append(pool.salaries, 0.0)  # index -1 -> no player
+    rating1 = rng.integers(50, 71, n)
+    rating2 = rng.integers(50, 71, n)
+    return {
+        "team1": team1,
+        "team2": team2,
+        "out_players": out_players,
+        "in_players": in_players,
+        "salary_out": np.round(salaries[out_players].sum(axis=1), 1),
+        "salary_in": np.round(salaries[in_players].sum(axis=1), 1),
+        "picks_out": rng.integers(0, 3, n),
+        "picks_in": rng.integers(0, 3, n),
+        "pick_years": rng.integers(PICK_YEARS[0], PICK_YEARS[1] + 1, (n, 2, 2)),
+        "pick_rounds": rng.integers(1, 3, (n, 2, 2)),
+        "payroll1": rng.integers(180, 221, n),
+        "payroll2": rng.integers(180, 221, n),
+        "rating1": rating1,
+        "rating2": rating2,
+        "rating1_after": rating1 + rng.integers(-2, 3, n),
+        "rating2_after": rating2 + rng.integers(-2, 3, n),
+        "ai_accept": rng.random(n) >= 0.7,  # biased towards REJECT, as in generate_trade_example
+        "feedback_yes": rng.random(n) < 0.8,
+        "minutes": rng.integers(0, 60 * 24 * 365, n),
+    }
+
+
+_ORDINAL = {1: "1st", 2: "2nd"}
+
+
+def format_trade_texts(batch: Dict[str, np.ndarray], pool: PlayerPool) -> List[str]:
+    """Render sampled trades in the same markdown layout as generate_trade_example."""
+    names, salaries = pool.names.tolist(), pool.salaries.tolist()
+    cols = {k: v.tolist() for k, v in batch.items()}
+    texts = []
+    for i in range(len(cols["team1"])):
+        team1, team2 = TEAMS[cols["team1"][i]], TEAMS[cols["team2"][i]]
+        out_p = [p for p in cols["out_players"][i] if p >= 0]
+        in_p = [p for p in cols["in_players"][i] if p >= 0]
+        picks_out, picks_in = cols["picks_out"][i], cols["picks_in"][i]
+        years, rounds = cols["pick_years"][i], cols["pick_rounds"][i]
+        out_picks = "\n".join(f"- {years[0][j]} {_ORDINAL[rounds[0][j]]} round pick" for j in range(picks_out))
+        in_picks = "\n".join(f"- {years[1][j]} {_ORDINAL[rounds[1][j]]} round pick" for j in range(picks_in))
+        diff = cols["salary_out"][i] - cols["salary_in"][i]
+        r1, r2 = cols["rating1"][i], cols["rating2"][i]
+        texts.append(f"""**Trade Proposal Breakdown**
+
+---
+
+### 1. Players/Assets being traded from your team ({team1}):
+{chr(10).join(f"- **{names[p]}** (${salaries[p]}M)" for p in out_p)}
+{out_picks}
+
+### 2. Players/Assets being received by your team ({team1}):
+{chr(10).join(f"- **{names[p]}** (${salaries[p]}M)" for p in in_p)}
+{in_picks}
+
+### 3. Draft picks involved:
+- {team1} sends: {picks_out} pick(s)
+- {team1} receives: {picks_in} pick(s)
+
+### 4. Salary implications:
+- **{team1} payroll after trade:** ${cols["payroll1"][i]}M
+- **Salary cap:** ${SALARY_CAP}M
+- **Team overall rating:** {r1} → {cols["rating1_after"][i]}
+
+- **{team2} payroll after trade:** ${cols["payroll2"][i]}M
+- **Salary cap:** ${SALARY_CAP}M
+- **Team overall rating:** {r2} → {cols["rating2_after"][i]}
+
+---
+
+**Summary:**  
+{team1} is trading {', '.join(names[p] for p in out_p)} and {picks_out} pick(s) to {team2} in exchange for {', '.join(names[p] for p in in_p)} and {picks_in} pick(s). The trade {'increases' if diff < 0 else 'decreases'} {team1}'s payroll by ${abs(diff):.1f}M.""")
+    return texts
+
+
+def _timestamps(minutes: np.ndarray, start: str) -> List[str]:
+    base = np.datetime64(datetime.strptime(start, "%Y-%m-%d %H:%M:%S"), "m")
+    return [str(t).replace("T", " ") + ":00" for t in base + minutes.astype("timedelta64[m]")]
+
+
+def shard_blocks(n: int, shard: int = 0, num_shards: int = 1) -> range:
+    """The contiguous run of BLOCK_SIZE blocks that makes up one shard."""
+    num_blocks = -(-n // BLOCK_SIZE)
+    per_shard = [num_blocks // num_shards + (1 if s < num_blocks % num_shards else 0) for s in range(num_shards)]
+    first = sum(per_shard[:shard])
+    return range(first, first + per_shard[shard])
+
+
+def shard_rows(n: int, shard: int = 0, num_shards: int = 1) -> int:
+    return sum(min(BLOCK_SIZE, n - b * BLOCK_SIZE) for b in shard_blocks(n, shard, num_shards))
+
+
+def iter_batches(n: int, seed: int = 0, shard: int = 0, num_shards: int = 1,
+                 pool: Optional[PlayerPool] = None) -> Iterator[Dict[str, np.ndarray]]:
+    """Stream one shard's trades a block at a time.
+
+    Block b is always drawn from SeedSequence([seed, b]), so concatenating the
+    shards gives the same corpus however many processes generated it.
+    """
+    pool = pool or PlayerPool()
+    for b in shard_blocks(n, shard, num_shards):
+        rng = np.random.default_rng(np.random.SeedSequence([seed, b]))
+        yield sample_trades(rng, min(BLOCK_SIZE, n - b * BLOCK_SIZE), pool)
+
+
+def iter_trade_texts(n: int, seed: int = 0, pool_size: Optional[int] = None) -> Iterator[str]:
+    pool = PlayerPool(pool_size, seed)
+    for batch in iter_batches(n, seed, pool=pool):
+        yield from format_trade_texts(batch, pool)
+
+
+def _records(batch: Dict[str, np.ndarray], pool: PlayerPool, start: str):
+    texts = format_trade_texts(batch, pool)
+    stamps = _timestamps(batch["minutes"], start)
+    decisions = np.where(batch["ai_accept"], "ACCEPT", "REJECT").tolist()
+    feedback = np.where(batch["feedback_yes"], "yes", "no").tolist()
+    return zip(stamps, texts, decisions, feedback)
+
+
+def shard_path(out: str, shard: int, num_shards: int) -> str:
+    if num_shards == 1:
+        return out
+    root, ext = os.path.splitext(out)
+    return f"{root}.part{shard:03d}-of-{num_shards:03d}{ext}"
+
+
+def write_shard(out: str, fmt: str, n: int, seed: int = 0, shard: int = 0, num_shards: int = 1,
+                pool_size: Optional[int] = None, start: str = START) -> Tuple[str, int]:
+    """Generate one shard and stream it to disk block by block."""
+    pool = PlayerPool(pool_size, seed)
+    path = shard_path(out, shard, num_shards)
+    batches = iter_batches(n, seed, shard, num_shards, pool)
+    written = 0
+    if fmt == "columnar":
+        # one .npy per column, preallocated as memmaps and filled block by block
+        os.makedirs(path, exist_ok=True)
+        total = shard_rows(n, shard, num_shards)
+        columns = {}
+        for batch in batches:
+            if not columns:
+                columns = {k: np.lib.format.open_memmap(os.path.join(path, f"{k}.npy"), mode="w+", dtype=v.dtype,
+                                                        shape=(total,) + v.shape[1:]) for k, v in batch.items()}
+            size = len(batch["team1"])
+            for k, v in batch.items():
+                columns[k][written:written + size] = v
+            written += size
+        for column in columns.values():
+            column.flush()
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"rows": written, "seed": seed, "shard": shard, "num_shards": num_shards, "start": start,
+                       "teams": TEAMS, "players": pool.names.tolist(), "salaries": pool.salaries.tolist(),
+                       "ratings": pool.ratings.tolist()}, f)
+    elif fmt == "store":
+        from feedback_store import FeedbackRecord, FeedbackStore, label_from_feedback
+
+        store = FeedbackStore(path)
+        for batch in batches:
+            written += store.add_many([
+                FeedbackRecord(ts=ts, trade_text=text, ai_decision=decision, user_feedback=fb,
+                               label=label_from_feedback(fb), source=f"synthetic:{seed}")
+                for ts, text, decision, fb in _records(batch, pool, start)
+            ])
+        store.close()
+    else:
+        with open(path, "w") as f:
+            for batch in batches:
+                lines = []
+                for ts, text, decision, fb in _records(batch, pool, start):
+                    if fmt == "jsonl":
+                        lines.append(json.dumps({"timestamp": ts, "trade_info": text, "ai_decision": decision,
+                                                 "user_feedback": fb}) + "\n")
+                    else:
+                        lines.append(f"\n=== Trade Evaluation {ts} ===\nTrade Information:\n{text}\n"
+                                     f"AI Decision: {decision}\nUser Feedback: {fb}\n" + "=" * 50 + "\n")
+                f.writelines(lines)
+                written += len(lines)
+    return path, written
+
+
+def _write_shard_args(args):
+    return write_shard(*args)
+
+
+def merge_stores(out: str, shards: List[str], batch_size: int = 10_000) -> int:
+    """Copy shard stores into out in shard order, then delete them.
+
+    Workers each write their own shard so they never contend for SQLite's
+    write lock; only this process writes to out, and the merged ids come out
+    in the same order as a single-process run.
+    """
+    from feedback_store import FeedbackStore
+
+    store = FeedbackStore(out)
+    written = 0
+    try:
+        for path in shards:
+            shard = FeedbackStore(path)
+            batch = []
+            for record in shard.iter_records(batch_size=batch_size):
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    written += store.add_many(batch)
+                    batch = []
+            written += store.add_many(batch)
+            shard.close()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+    finally:
+        store.close()
+    return written
+
+
+def generate(out: str, fmt: str, n: int, seed: int = 0, workers: int = 1,
+             pool_size: Optional[int] = None, start: str = START) -> List[Tuple[str, int]]:
+    """Generate n trades split into one shard per worker process."""
+    jobs = [(out, fmt, n, seed, shard, workers, pool_size, start) for shard in range(workers)]
+    if workers == 1:
+        return [write_shard(*jobs[0])]
+    with mp.get_context("spawn").Pool(workers) as pool:
+        results = pool.map(_write_shard_args, jobs)
+    if fmt == "store":
+        return [(out, merge_stores(out, [path for path, _ in results]))]
+    return results
+
+
 def main():
-    # Generate 30 trade examples
-    trades = [generate_trade_example() for _ in range(30)]
-    
-    # Write to file
-    with open("trade_feedback.txt", "a") as f:
-        for trade in trades:
-            f.write(f"\n=== Trade Evaluation {trade['timestamp']} ===\n")
-            f.write(f"Trade Information:\n{trade['trade_info']}\n")
-            f.write(f"AI Decision: {trade['ai_decision']}\n")
-            f.write(f"User Feedback: {trade['user_feedback']}\n")
-            f.write("="*50 + "\n")
+    if len(sys.argv) == 1:
+        # Generate 30 trade examples
+        trades = [generate_trade_example() for _ in range(30)]
+
+        # Write to file
+        with open("trade_feedback.txt", "a") as f:
+            for trade in trades:
+                f.write(f"\n=== Trade Evaluation {trade['timestamp']} ===\n")
+                f.write(f"Trade Information:\n{trade['trade_info']}\n")
+                f.write(f"AI Decision: {trade['ai_decision']}\n")
+                f.write(f"User Feedback: {trade['user_feedback']}\n")
+                f.write("="*50 + "\n")
+        return
+
+    parser = argparse.ArgumentParser(description="Generate a large synthetic trade corpus")
+    parser.add_argument("-n", "--count", type=int, required=True)
+    parser.add_argument("--out", required=True, help="file, directory (columnar) or .sqlite store")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="processes; each writes its own shard (store shards are merged into --out)")
+    parser.add_argument("--pool-size", type=int, default=None, help="pad the player pool with synthetic players")
+    parser.add_argument("--start", default=START, help="timestamps fall within a year of this")
+    args = parser.parse_args()
+
+    started = datetime.now()
+    results = generate(args.out, args.format, args.count, args.seed, args.workers, args.pool_size, args.start)
+    elapsed = (datetime.now() - started).total_seconds()
+    total = sum(n for _, n in results)
+    for path, n in results:
+        print(f"{path}: {n} trades")
+    print(f"{total} trades in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f}/s)")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
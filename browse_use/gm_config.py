@@ -0,0 +1,18 @@
+import os
+from urllib.parse import urlsplit
+
+# Where the game is served. Point it at fake_bbgm_server.py (e.g. http://127.0.0.1:8765)
+# for offline, deterministic runs; the agents' selectors work the same on both.
+BASE_URL = os.getenv("GM_BASE_URL", "https://play.basketball-gm.com").rstrip("/")
+
+# browser_use only offers the custom controller actions on these domains
+GAME_DOMAINS = [BASE_URL]
+
+
+def url(path: str = "/") -> str:
+    """Absolute URL of a game page, e.g. url(f"/l/{lid}/trade")."""
+    return BASE_URL + "/" + path.lstrip("/")
+
+
+def host() -> str:
+    return urlsplit(BASE_URL).hostname or ""
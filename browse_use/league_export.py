@@ -0,0 +1,289 @@
+import re
+import json
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from pydantic import BaseModel
+from playwright.async_api import Page
+
+logger = logging.getLogger(__name__)
+
+# Object stores the agents care about; stores missing from a league are skipped
+DEFAULT_STORES = (
+    "gameAttributes",
+    "players",
+    "teams",
+    "teamSeasons",
+    "draftPicks",
+    "releasedPlayers",
+    "trade",
+    "playoffSeries",
+)
+
+ROSTER_LIMIT = 15
+FIXTURE_PAGE = Path(__file__).parent / "fixtures" / "fake_league.html"
+
+# Dumps the requested stores in one round-trip. Each store gets a cheap
+# fingerprint (record count + FNV-1a of its JSON) computed in the page, and
+# stores whose fingerprint matches the caller's previous one are not sent back.
+_EXPORT_JS = """
+async ({ dbName, stores, fingerprints }) => {
+  const db = await new Promise((resolve, reject) => {
+    const req = indexedDB.open(dbName);
+    req.onupgradeneeded = () => req.transaction.abort();  // never create a missing league
+    req.onsuccess = () => resolve(req.result);
+    req.onerror = () => reject(req.error);
+  });
+  const fnv1a = (text) => {
+    let h = 0x811c9dc5;
+    for (let i = 0; i < text.length; i++) {
+      h ^= text.charCodeAt(i);
+      h = Math.imul(h, 0x01000193) >>> 0;
+    }
+    return h.toString(16);
+  };
+  const out = { stores: {}, missing: [] };
+  const present = stores.filter((s) => db.objectStoreNames.contains(s));
+  out.missing = stores.filter((s) => !db.objectStoreNames.contains(s));
+  if (present.length) {
+    const tx = db.transaction(present, "readonly");
+    await Promise.all(present.map((name) => new Promise((resolve, reject) => {
+      const req = tx.objectStore(name).getAll();
+      req.onsuccess = () => {
+        const records = req.result;
+        const fingerprint = records.length + ":" + fnv1a(JSON.stringify(records));
+        out.stores[name] = fingerprints[name] === fingerprint
+          ? { fingerprint, unchanged: true }
+          : { fingerprint, records };
+        resolve();
+      };
+      req.onerror = () => reject(req.error);
+    })));
+  }
+  db.close();
+  return out;
+}
+"""
+
+
+class PlayerRecord(BaseModel):
+    pid: int
+    tid: int
+    name: str
+    pos: str = ""
+    age: Optional[int] = None
+    ovr: Optional[int] = None
+    pot: Optional[int] = None
+    contract_amount: float = 0.0  # dollars per season
+    contract_exp: Optional[int] = None
+
+
+class TeamRecord(BaseModel):
+    tid: int
+    region: str = ""
+    name: str = ""
+    abbrev: str = ""
+
+
+class TeamSeasonRecord(BaseModel):
+    tid: int
+    season: int
+    won: int = 0
+    lost: int = 0
+    tied: int = 0
+    playoff_rounds_won: int = -1
+
+
+class DraftPickRecord(BaseModel):
+    dpid: int
+    tid: int
+    original_tid: int
+    season: str
+    round: int
+
+
+def _current(value: Any) -> Any:
+    """gameAttributes keep some values as a [{start, value}, ...] history; return the latest."""
+    if isinstance(value, list) and value and isinstance(value[-1], dict) and "value" in value[-1]:
+        return value[-1]["value"]
+    return value
+
+
+def format_money(dollars: float) -> str:
+    """Format dollars the way the game does, e.g. 155090000 -> "$155.09M"."""
+    sign = "-" if dollars < 0 else ""
+    return f"{sign}${abs(dollars) / 1e6:.2f}M"
+
+
+class LeagueSnapshot:
+    """Typed view over the raw records exported from one league database."""
+
+    def __init__(self, lid: int, raw: Dict[str, List[Dict[str, Any]]], fingerprints: Dict[str, str]):
+        self.lid = lid
+        self.raw = raw
+        self.fingerprints = fingerprints
+
+    @property
+    def game_attributes(self) -> Dict[str, Any]:
+        return {r["key"]: _current(r.get("value")) for r in self.raw.get("gameAttributes", []) if "key" in r}
+
+    @property
+    def season(self) -> Optional[int]:
+        return self.game_attributes.get("season")
+
+    @property
+    def user_tid(self) -> Optional[int]:
+        return self.game_attributes.get("userTid")
+
+    @property
+    def salary_cap(self) -> Optional[float]:
+        cap = self.game_attributes.get("salaryCap")
+        return cap * 1000.0 if cap is not None else None  # stored in thousands
+
+    def players(self) -> List[PlayerRecord]:
+        season = self.season
+        players = []
+        for p in self.raw.get("players", []):
+            ratings = (p.get("ratings") or [{}])[-1]
+            born = (p.get("born") or {}).get("year")
+            contract = p.get("contract") or {}
+            players.append(PlayerRecord(
+                pid=p["pid"],
+                tid=p.get("tid", -1),
+                name=f"{p.get('firstName', '')} {p.get('lastName', '')}".strip(),
+                pos=ratings.get("pos", ""),
+                age=season - born if season is not None and born is not None else None,
+                ovr=ratings.get("ovr"),
+                pot=ratings.get("pot"),
+                contract_amount=contract.get("amount", 0) * 1000.0,
+                contract_exp=contract.get("exp"),
+            ))
+        return players
+
+    def teams(self) -> List[TeamRecord]:
+        return [TeamRecord(**{k: t[k] for k in ("tid", "region", "name", "abbrev") if k in t})
+                for t in self.raw.get("teams", [])]
+
+    def team_seasons(self) -> List[TeamSeasonRecord]:
+        return [TeamSeasonRecord(
+            tid=ts["tid"], season=ts["season"], won=ts.get("won", 0), lost=ts.get("lost", 0),
+            tied=ts.get("tied", 0), playoff_rounds_won=ts.get("playoffRoundsWon", -1),
+        ) for ts in self.raw.get("teamSeasons", [])]
+
+    def draft_picks(self) -> List[DraftPickRecord]:
+        return [DraftPickRecord(
+            dpid=dp["dpid"], tid=dp["tid"], original_tid=dp.get("originalTid", dp["tid"]),
+            season=str(dp.get("season")), round=dp.get("round", 0),
+        ) for dp in self.raw.get("draftPicks", [])]
+
+    def roster(self, tid: Optional[int] = None) -> List[PlayerRecord]:
+        tid = self.user_tid if tid is None else tid
+        return sorted((p for p in self.players() if p.tid == tid), key=lambda p: -(p.ovr or 0))
+
+    def players_by_name(self) -> Dict[str, PlayerRecord]:
+        return {p.name: p for p in self.players()}
+
+    def payroll(self, tid: Optional[int] = None) -> float:
+        tid = self.user_tid if tid is None else tid
+        released = sum(r.get("contract", {}).get("amount", 0) * 1000.0
+                       for r in self.raw.get("releasedPlayers", []) if r.get("tid") == tid)
+        return sum(p.contract_amount for p in self.roster(tid)) + released
+
+    def game_state_fields(self, tid: Optional[int] = None) -> Dict[str, str]:
+        """GameState fields derivable from the database; the rest are left empty."""
+        tid = self.user_tid if tid is None else tid
+        roster = self.roster(tid)
+        current = [ts for ts in self.team_seasons() if ts.tid == tid and ts.season == self.season]
+        record = ""
+        if current:
+            ts = current[0]
+            record = f"{ts.won}-{ts.lost}" + (f"-{ts.tied}" if ts.tied else "")
+        ages = [p.age for p in roster if p.age is not None]
+        cap = self.salary_cap
+        return {
+            "record": record,
+            "team_rating": "",
+            "average_mov": "",
+            "average_age": f"{sum(ages) / len(ages):.1f}" if ages else "",
+            "open_roster_spots": str(max(ROSTER_LIMIT - len(roster), 0)),
+            "payroll": format_money(self.payroll(tid)),
+            "salary_cap": format_money(cap) if cap is not None else "",
+            "profit": "",
+        }
+
+    def roster_json(self, tid: Optional[int] = None) -> str:
+        """Compact roster dump for the advisors."""
+        return json.dumps([p.model_dump() for p in self.roster(tid)])
+
+
+def league_id_from_url(url: str) -> Optional[int]:
+    m = re.search(r"/l/(\d+)", url)
+    return int(m.group(1)) if m else None
+
+
+class LeagueExporter:
+    """Bulk exporter for the game's IndexedDB with incremental re-export.
+
+    Every call sends the fingerprints of the previous export, so only stores
+    that changed since then are serialized and shipped back to Python.
+    """
+
+    def __init__(self, stores: Sequence[str] = DEFAULT_STORES):
+        self.stores = list(stores)
+        self.snapshot: Optional[LeagueSnapshot] = None
+
+    async def export(self, page: Page, lid: Optional[int] = None) -> LeagueSnapshot:
+        lid = lid if lid is not None else league_id_from_url(page.url)
+        if lid is None:
+            raise ValueError(f"Cannot determine league id from {page.url}")
+        previous = self.snapshot if self.snapshot is not None and self.snapshot.lid == lid else None
+        result = await page.evaluate(_EXPORT_JS, {
+            "dbName": f"league{lid}",
+            "stores": self.stores,
+            "fingerprints": previous.fingerprints if previous else {},
+        })
+        raw = {}
+        fingerprints = {}
+        changed = []
+        for name, payload in result["stores"].items():
+            fingerprints[name] = payload["fingerprint"]
+            if payload.get("unchanged"):
+                raw[name] = previous.raw[name]
+            else:
+                raw[name] = payload["records"]
+                changed.append(name)
+        if result["missing"]:
+            logger.debug(f"Stores not present in league{lid}: {result['missing']}")
+        logger.info(f"Exported league{lid}, changed stores: {changed or 'none'}")
+        self.snapshot = LeagueSnapshot(lid, raw, fingerprints)
+        return self.snapshot
+
+
+async def _demo_against_fixture() -> None:
+    """Export the seeded fake league in fixtures/ twice to show incremental re-export."""
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        page = await browser.new_page()
+        # IndexedDB needs a real origin, so serve the fixture under a fake host
+        await page.route("http://bbgm.fixture/**", lambda route: route.fulfill(
+            status=200, content_type="text/html", body=FIXTURE_PAGE.read_text()))
+        await page.goto("http://bbgm.fixture/l/1")
+        await page.wait_for_function("window.__seeded === true")
+
+        exporter = LeagueExporter()
+        snapshot = await exporter.export(page)
+        print(json.dumps(snapshot.game_state_fields(), indent=2))
+        print(snapshot.roster_json())
+
+        await page.evaluate("window.__bumpRecord()")
+        await exporter.export(page)
+        await browser.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_demo_against_fixture())
@@ -0,0 +1,38 @@
+import logging
+from typing import Optional
+
+from playwright.async_api import Page
+
+import gm_config
+import league_snapshot
+from league_snapshot import LEAGUE_SNAPSHOT, LeagueCheckpoint
+from waits import wait_for_processing
+
+logger = logging.getLogger(__name__)
+
+
+async def create_league(page: Page) -> None:
+    """Create a random-players league and simulate to the trade deadline."""
+    await page.goto(gm_config.url("/"))
+    await page.get_by_role("link", name="New league » Real players").click()
+    await page.get_by_role("button", name="Random").nth(1).click()
+    await page.get_by_role("button", name="Create League Processing").click()
+    await wait_for_processing(page, "create_league")
+    await page.get_by_role("button", name="Play", exact=True).click()
+    await page.get_by_role("button", name="Until regular season").click()
+    await wait_for_processing(page, "simulate")
+    await page.get_by_role("button", name="Play", exact=True).click()
+    await page.get_by_role("button", name="Until trade deadline").click()
+    await wait_for_processing(page, "simulate")
+
+
+async def bootstrap_league(page: Page, snapshot_path: Optional[str] = LEAGUE_SNAPSHOT) -> Optional[LeagueCheckpoint]:
+    """Restore the checkpoint at snapshot_path if there is one, else create a league from scratch.
+
+    Returns the restored checkpoint, or None when the league was created.
+    """
+    checkpoint = await league_snapshot.restore_configured(page, snapshot_path)
+    if checkpoint is None:
+        logger.info("No league checkpoint configured, creating a league")
+        await create_league(page)
+    return checkpoint
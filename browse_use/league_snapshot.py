@@ -0,0 +1,244 @@
+import os
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel
+from playwright.async_api import Page
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+# Checkpoint to start from instead of creating a league and simulating to the trade deadline
+LEAGUE_SNAPSHOT = os.getenv("GM_LEAGUE_SNAPSHOT") or None
+RESTORE_PATH = "/__league_restore"  # served by page.route, so the game's own scripts never load during a restore
+
+# Values JSON cannot carry (non-finite numbers, undefined, Dates, typed arrays) are tagged on the way out
+_CODEC_JS = """
+const encode = (v) => {
+  if (typeof v === "number") return Number.isFinite(v) ? v : { $num: String(v) };
+  if (v === undefined) return { $undef: 1 };
+  if (v === null || typeof v !== "object") return v;
+  if (v instanceof Date) return { $date: v.getTime() };
+  if (ArrayBuffer.isView(v)) return { $typed: v.constructor.name, data: Array.from(v) };
+  if (Array.isArray(v)) return v.map(encode);
+  const out = {};
+  for (const [k, x] of Object.entries(v)) out[k] = encode(x);
+  return out;
+};
+const decode = (v) => {
+  if (v === null || typeof v !== "object") return v;
+  if (Array.isArray(v)) return v.map(decode);
+  if ("$num" in v) return Number(v.$num);
+  if ("$undef" in v) return undefined;
+  if ("$date" in v) return new Date(v.$date);
+  if ("$typed" in v) return new globalThis[v.$typed](v.data);
+  const out = {};
+  for (const [k, x] of Object.entries(v)) out[k] = decode(x);
+  return out;
+};
+const request = (req) => new Promise((resolve, reject) => {
+  req.onsuccess = () => resolve(req.result);
+  req.onerror = () => reject(req.error);
+});
+"""
+
+# Every database on the origin (the "meta" league list and each league{lid}) with its schema and records
+_DUMP_JS = """
+async () => {
+  %s
+  const databases = [];
+  for (const { name } of await indexedDB.databases()) {
+    const db = await request(indexedDB.open(name));
+    const stores = [];
+    const names = [...db.objectStoreNames];
+    if (names.length) {
+      const tx = db.transaction(names, "readonly");
+      for (const storeName of names) {
+        const store = tx.objectStore(storeName);
+        const indexes = [...store.indexNames].map((n) => {
+          const ix = store.index(n);
+          return { name: n, keyPath: ix.keyPath, unique: ix.unique, multiEntry: ix.multiEntry };
+        });
+        const values = await request(store.getAll());
+        const keys = store.keyPath === null ? await request(store.getAllKeys()) : null;
+        stores.push({ name: storeName, keyPath: store.keyPath, autoIncrement: store.autoIncrement,
+                      indexes, keys: keys && keys.map(encode), values: values.map(encode) });
+      }
+    }
+    databases.push({ name, version: db.version, stores });
+    db.close();
+  }
+  return JSON.stringify(databases);
+}
+""" % _CODEC_JS
+
+_RESTORE_JS = """
+async ({ databases, localStorage: items }) => {
+  %s
+  for (const { name } of await indexedDB.databases()) await request(indexedDB.deleteDatabase(name));
+  for (const dump of JSON.parse(databases)) {
+    const open = indexedDB.open(dump.name, dump.version);
+    open.onupgradeneeded = () => {
+      for (const s of dump.stores) {
+        const store = open.result.createObjectStore(s.name, { keyPath: s.keyPath, autoIncrement: s.autoIncrement });
+        for (const ix of s.indexes) store.createIndex(ix.name, ix.keyPath, { unique: ix.unique, multiEntry: ix.multiEntry });
+      }
+    };
+    const db = await request(open);
+    if (dump.stores.length) {
+      const tx = db.transaction(dump.stores.map((s) => s.name), "readwrite");
+      for (const s of dump.stores) {
+        const store = tx.objectStore(s.name);
+        s.values.forEach((v, i) => s.keys ? store.put(decode(v), decode(s.keys[i])) : store.put(decode(v)));
+      }
+      await new Promise((resolve, reject) => {
+        tx.oncomplete = resolve;
+        tx.onerror = () => reject(tx.error);
+      });
+    }
+    db.close();
+  }
+  localStorage.clear();
+  for (const [k, v] of Object.entries(items)) localStorage.setItem(k, v);
+}
+""" % _CODEC_JS
+
+
+class LeagueCheckpoint(BaseModel):
+    """A saved browser state (cookies, localStorage, every IndexedDB database) at a named point in a league."""
+    format: int = SNAPSHOT_FORMAT
+    name: str
+    url: str  # page to reopen after restoring, e.g. .../l/1
+    created: str
+    sha256: str
+    storage_state: Dict[str, Any]
+    indexeddb: str  # JSON from _DUMP_JS, kept as text so the hash covers exactly what is restored
+
+    @property
+    def origin(self) -> str:
+        parts = urlsplit(self.url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def local_storage(self) -> Dict[str, str]:
+        for origin in self.storage_state.get("origins", []):
+            if origin.get("origin") == self.origin:
+                return {item["name"]: item["value"] for item in origin.get("localStorage", [])}
+        return {}
+
+
+def content_hash(indexeddb: str, local_storage: Dict[str, str]) -> str:
+    """Hash of the game state only; cookie expiry times would make identical leagues differ."""
+    h = hashlib.sha256(indexeddb.encode("utf-8"))
+    h.update(json.dumps(local_storage, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+async def save(page: Page, path: str, name: str = "trade_deadline") -> LeagueCheckpoint:
+    """Dump the page's browser state to a gzipped JSON file, written atomically."""
+    indexeddb = await page.evaluate(_DUMP_JS)
+    storage_state = await page.context.storage_state()
+    checkpoint = LeagueCheckpoint(name=name, url=page.url, created=time.strftime("%Y-%m-%d %H:%M:%S"),
+                                  sha256="", storage_state=storage_state, indexeddb=indexeddb)
+    checkpoint.sha256 = content_hash(indexeddb, checkpoint.local_storage())
+    tmp = f"{path}.tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        f.write(checkpoint.model_dump_json())
+    os.replace(tmp, path)
+    logger.info(f"Saved league checkpoint {name!r} ({checkpoint.sha256[:12]}) to {path}")
+    return checkpoint
+
+
+@lru_cache(maxsize=4)
+def _load(path: str, mtime: float) -> LeagueCheckpoint:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        checkpoint = LeagueCheckpoint.model_validate_json(f.read())
+    if checkpoint.format != SNAPSHOT_FORMAT:
+        raise ValueError(f"{path}: unsupported snapshot format {checkpoint.format}")
+    if content_hash(checkpoint.indexeddb, checkpoint.local_storage()) != checkpoint.sha256:
+        raise ValueError(f"{path}: content does not match its sha256")
+    return checkpoint
+
+
+def load(path: str) -> LeagueCheckpoint:
+    """Read and verify a checkpoint; parsed once per file version, so sweeps can restore it many times."""
+    return _load(path, os.path.getmtime(path))
+
+
+async def restore(page: Page, checkpoint: LeagueCheckpoint, url: Optional[str] = None) -> None:
+    """Replace the page's browser state with the checkpoint and open its league."""
+    cookies = checkpoint.storage_state.get("cookies", [])
+    if cookies:
+        await page.context.add_cookies(cookies)
+    restore_url = checkpoint.origin + RESTORE_PATH
+    await page.route(restore_url, lambda route: route.fulfill(status=200, content_type="text/html",
+                                                             body="<!doctype html><title>restore</title>"))
+    try:
+        await page.goto(restore_url)
+        await page.evaluate(_RESTORE_JS, {"databases": checkpoint.indexeddb,
+                                          "localStorage": checkpoint.local_storage()})
+    finally:
+        await page.unroute(restore_url)
+    await page.goto(url or checkpoint.url)
+    logger.info(f"Restored league checkpoint {checkpoint.name!r} ({checkpoint.sha256[:12]})")
+
+
+async def restore_configured(page: Page, path: Optional[str] = LEAGUE_SNAPSHOT) -> Optional[LeagueCheckpoint]:
+    """Restore the checkpoint at path (GM_LEAGUE_SNAPSHOT by default); None when no snapshot is configured."""
+    if not path:
+        return None
+    checkpoint = load(path)
+    await restore(page, checkpoint)
+    return checkpoint
+
+
+async def _create(out: str, name: str) -> None:
+    from playwright.async_api import async_playwright
+    import fast_browse
+    from waits import settle
+    from league_setup import create_league
+
+    async with async_playwright() as pw:
+        browser = await fast_browse.launch(pw)
+        context = await fast_browse.new_context(browser)
+        page = await context.new_page()
+        await create_league(page)
+        await settle(page, "navigate")
+        checkpoint = await save(page, out, name)
+        await browser.close()
+    print(f"{out}: {checkpoint.name} at {checkpoint.url}, sha256 {checkpoint.sha256}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Save or inspect league checkpoints")
+    sub = parser.add_subparsers(dest="command", required=True)
+    create = sub.add_parser("create", help="create a league, simulate to the trade deadline and save it")
+    create.add_argument("out", nargs="?", default="trade_deadline.league.json.gz")
+    create.add_argument("--name", default="trade_deadline")
+    info = sub.add_parser("info", help="verify a checkpoint and print its metadata")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "create":
+        asyncio.run(_create(args.out, args.name))
+    else:
+        checkpoint = load(args.path)
+        databases = json.loads(checkpoint.indexeddb)
+        print(f"{checkpoint.name} saved {checkpoint.created} at {checkpoint.url}")
+        print(f"sha256 {checkpoint.sha256}")
+        for db in databases:
+            counts = ", ".join(f"{s['name']}={len(s['values'])}" for s in db["stores"])
+            print(f"  {db['name']} v{db['version']}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
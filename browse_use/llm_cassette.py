@@ -0,0 +1,218 @@
+import os
+import sys
+import json
+import time
+import zlib
+import base64
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# off: talk to the API as usual
+# record: always call the API and store every successful response
+# replay: serve only recorded responses; a request that was never recorded fails with a 404
+# auto: replay what is recorded, record the rest
+CASSETTE_MODE = os.getenv("GM_LLM_CASSETTE_MODE", "off").lower()
+CASSETTE_PATH = os.getenv("GM_LLM_CASSETTE", "llm_cassette.sqlite")
+# Replayed responses wait this fraction of the recorded API latency (0 = instant, 1 = as recorded)
+REPLAY_LATENCY = float(os.getenv("GM_LLM_CASSETTE_LATENCY", "0"))
+MODES = ("off", "record", "replay", "auto")
+
+if CASSETTE_MODE not in MODES:
+    raise ValueError(f"GM_LLM_CASSETTE_MODE must be one of {', '.join(MODES)}, not {CASSETTE_MODE!r}")
+
+# Request fields that do not change what the model answers
+_IGNORED_FIELDS = {"user", "store", "metadata", "prompt_cache_key", "safety_identifier"}
+# Headers that describe the wire encoding, which no longer applies to the decoded body we store
+_WIRE_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS interactions (
+    key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    model TEXT,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    request BLOB NOT NULL,
+    latency_s REAL NOT NULL,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS interactions_model ON interactions (model);
+"""
+
+# hits / misses / recorded across every transport in this process
+stats: Counter = Counter()
+
+
+def _normalize(value: Any) -> Any:
+    """Replace inline base64 images with the sha256 of their bytes, and drop fields that do not affect the answer."""
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if k not in _IGNORED_FIELDS}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str) and value.startswith("data:") and ";base64," in value[:100]:
+        data = base64.b64decode(value.split(",", 1)[1])
+        return "sha256:" + hashlib.sha256(data).hexdigest()
+    return value
+
+
+def request_key(endpoint: str, body: bytes) -> Tuple[str, str, Optional[str]]:
+    """(key, normalized request JSON, model) for a request body sent to endpoint."""
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        payload = {"raw": hashlib.sha256(body).hexdigest()}
+    normalized = json.dumps({"endpoint": endpoint, "request": _normalize(payload)},
+                            sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    model = payload.get("model") if isinstance(payload, dict) else None
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest(), normalized, model
+
+
+class Recording:
+    def __init__(self, status: int, headers: List[Tuple[str, str]], body: bytes, latency_s: float):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.latency_s = latency_s
+
+
+class CassetteStore:
+    """SQLite (WAL) file of recorded model calls; request and response bodies are zlib-compressed."""
+
+    def __init__(self, path: str = CASSETTE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[Recording]:
+        with self._lock:
+            row = self._db.execute("SELECT status, headers, body, latency_s FROM interactions WHERE key = ?",
+                                   (key,)).fetchone()
+        if row is None:
+            return None
+        status, headers, body, latency_s = row
+        return Recording(status, [tuple(h) for h in json.loads(headers)], zlib.decompress(body), latency_s)
+
+    def put(self, key: str, endpoint: str, model: Optional[str], normalized: str, recording: Recording) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO interactions (key, endpoint, model, status, headers, body, request,"
+                " latency_s, recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, model, recording.status, json.dumps(recording.headers),
+                 zlib.compress(recording.body, 6), zlib.compress(normalized.encode("utf-8"), 6),
+                 recording.latency_s, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+            )
+            self._db.commit()
+
+    def summary(self) -> List[Tuple[str, str, int, float, int]]:
+        """(endpoint, model, calls, mean recorded latency, compressed bytes) per endpoint and model."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT endpoint, model, COUNT(*), AVG(latency_s), SUM(LENGTH(body) + LENGTH(request))"
+                " FROM interactions GROUP BY endpoint, model ORDER BY endpoint, model"
+            ).fetchall()
+
+
+_stores: Dict[str, CassetteStore] = {}
+
+
+def get_store(path: str = CASSETTE_PATH) -> CassetteStore:
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = CassetteStore(path)
+    return store
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """Records POSTs to the model API through the inner transport, or answers them from the cassette."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, store: CassetteStore, mode: str = CASSETTE_MODE,
+                 latency: float = REPLAY_LATENCY):
+        self.inner = inner
+        self.store = store
+        self.mode = mode
+        self.latency = latency
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST":
+            return await self.inner.handle_async_request(request)
+        body = await request.aread()
+        key, normalized, model = request_key(request.url.path, body)
+
+        if self.mode in ("replay", "auto"):
+            recording = await asyncio.to_thread(self.store.get, key)
+            if recording is not None:
+                stats["hits"] += 1
+                if self.latency:
+                    await asyncio.sleep(recording.latency_s * self.latency)
+                return httpx.Response(recording.status, headers=recording.headers, content=recording.body,
+                                      request=request)
+            if self.mode == "replay":
+                stats["misses"] += 1
+                logger.warning(f"No recorded response for {request.url.path} ({model}), key {key[:12]}")
+                return httpx.Response(404, request=request, json={"error": {
+                    "message": f"llm_cassette: no recorded response for this request (key {key[:12]})",
+                    "type": "cassette_miss", "code": "cassette_miss"}})
+
+        t0 = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _WIRE_HEADERS]
+        if response.status_code == 200:
+            recording = Recording(response.status_code, headers, content, time.perf_counter() - t0)
+            await asyncio.to_thread(self.store.put, key, request.url.path, model, normalized, recording)
+            stats["recorded"] += 1
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def enabled() -> bool:
+    return CASSETTE_MODE != "off"
+
+
+def wrap_transport(inner: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+    """inner unchanged when cassettes are off, otherwise a CassetteTransport around it."""
+    if not enabled():
+        return inner
+    return CassetteTransport(inner, get_store())
+
+
+def api_key() -> Optional[str]:
+    """OPENAI_API_KEY, or a placeholder in replay mode so offline runs need no key at all."""
+    key = os.getenv("OPENAI_API_KEY")
+    if key is None and CASSETTE_MODE == "replay":
+        return "cassette-replay"
+    return key
+
+
+def main():
+    # python llm_cassette.py [path]
+    path = sys.argv[1] if len(sys.argv) > 1 else CASSETTE_PATH
+    rows = get_store(path).summary()
+    total = sum(r[2] for r in rows)
+    print(f"{path}: {total} recorded calls")
+    for endpoint, model, calls, latency, size in rows:
+        print(f"  {endpoint} {model}: {calls} calls, mean latency {latency:.2f}s, {size / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
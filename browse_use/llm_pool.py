@@ -0,0 +1,168 @@
+import os
+import base64
+import asyncio
+import logging
+import weakref
+import contextlib
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+import llm_cassette
+import llm_scheduler
+from llm_scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on in-flight model calls per event loop
+MAX_CONCURRENT_REQUESTS = int(os.getenv("GM_LLM_MAX_CONCURRENCY", "8"))
+MAX_KEEPALIVE_CONNECTIONS = 20
+
+
+class LLMPool:
+    """One AsyncOpenAI client with keep-alive connections and a concurrency cap.
+
+    httpx connections and asyncio semaphores are bound to the event loop that
+    created them, so there is one pool per running loop (see get_pool).
+    With GM_LLM_CASSETTE_MODE set, every call is recorded to or replayed
+    from the cassette (see llm_cassette.py); calls that reach the API are
+    rate limited, prioritized and retried by llm_scheduler.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_REQUESTS):
+        self.client = AsyncOpenAI(
+            api_key=llm_cassette.api_key(),
+            max_retries=0,  # llm_scheduler retries with backoff shared across every caller
+            http_client=http_client(max_concurrency),
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def create_response(self, **kwargs) -> Any:
+        async with self.semaphore:
+            return await self.client.responses.create(**kwargs)
+
+    async def create_chat_completion(self, **kwargs) -> Any:
+        async with self.semaphore:
+            return await self.client.chat.completions.create(**kwargs)
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+# Model calls made in this process, and in the current counting_calls() block if there is one
+_calls = Counter()
+_tally: ContextVar[Optional[Counter]] = ContextVar("llm_pool_tally", default=None)
+
+
+class CallCountingTransport(httpx.AsyncBaseTransport):
+    """Outermost layer of http_client(): counts every model call once, whether replayed, sent or retried."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            _calls["calls"] += 1
+            tally = _tally.get()
+            if tally is not None:
+                tally["calls"] += 1
+        return await self.inner.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+@contextlib.contextmanager
+def counting_calls() -> Iterator[Counter]:
+    """Count the model calls made inside the block, including by tasks it starts, in tally["calls"].
+
+    Leagues sharing one process each get their own count, which a difference
+    of total_calls() before and after cannot give.
+    """
+    tally = Counter()
+    token = _tally.set(tally)
+    try:
+        yield tally
+    finally:
+        _tally.reset(token)
+
+
+def http_client(max_concurrency: int = MAX_CONCURRENT_REQUESTS) -> httpx.AsyncClient:
+    """httpx client for OpenAI SDK clients: call counter, cassette, then the scheduler, then the network."""
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=max_concurrency * 2,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        )
+    )
+    return httpx.AsyncClient(
+        transport=CallCountingTransport(llm_cassette.wrap_transport(llm_scheduler.SchedulingTransport(transport))),
+        timeout=httpx.Timeout(120.0, connect=10.0),
+    )
+
+
+def sdk_kwargs(priority: Priority = Priority.DECISION, http_client_arg: str = "http_client") -> Dict[str, Any]:
+    """Constructor kwargs that put another OpenAI-SDK-based client on the shared cassette and scheduler.
+
+    Pass "http_async_client" for langchain's ChatOpenAI; autogen's
+    OpenAIChatCompletionClient takes the default.
+    """
+    kwargs = {http_client_arg: http_client(), "max_retries": 0,
+              "default_headers": llm_scheduler.headers(priority)}
+    key = llm_cassette.api_key()
+    if key is not None:
+        kwargs["api_key"] = key
+    return kwargs
+
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LLMPool]" = weakref.WeakKeyDictionary()
+
+
+def get_pool() -> LLMPool:
+    """Return the shared pool for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = LLMPool()
+        _pools[loop] = pool
+    return pool
+
+
+def image_input(prompt: str, image: bytes) -> List[Dict[str, Any]]:
+    """Build the Responses API input for a single prompt + PNG screenshot."""
+    base64_image = base64.b64encode(image).decode("utf-8")
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "input_text", "text": prompt},
+                {"type": "input_image", "image_url": f"data:image/png;base64,{base64_image}"},
+            ],
+        }
+    ]
+
+
+def _tagged(kwargs: Dict[str, Any], priority: Priority, hedge: bool) -> Dict[str, Any]:
+    extra_headers = {**(kwargs.pop("extra_headers", None) or {}), **llm_scheduler.headers(priority, hedge)}
+    return {**kwargs, "extra_headers": extra_headers}
+
+
+async def create_response(model: str, input: Any, priority: Priority = Priority.DECISION, hedge: bool = False,
+                          **kwargs) -> Any:
+    """responses.create through the shared pool; hedge=True sends a duplicate if the call runs slow."""
+    return await get_pool().create_response(model=model, input=input, **_tagged(kwargs, priority, hedge))
+
+
+async def create_chat_completion(model: str, messages: List[Dict[str, Any]], priority: Priority = Priority.DECISION,
+                                 hedge: bool = False, **kwargs) -> Any:
+    """chat.completions.create through the shared pool."""
+    return await get_pool().create_chat_completion(model=model, messages=messages,
+                                                   **_tagged(kwargs, priority, hedge))
+
+
+def total_calls() -> int:
+    """Number of model calls made in this process by every client built on http_client() (pool, agents, autogen)."""
+    return _calls["calls"]
@@ -0,0 +1,379 @@
+import os
+import json
+import time
+import heapq
+import random
+import asyncio
+import logging
+import weakref
+import itertools
+from collections import Counter, deque
+from enum import IntEnum
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Lower runs first when a model's budget is short."""
+    PHASE = 0       # navbar phase detection: everything else depends on it
+    EXTRACTION = 1  # reading game state and trade panels
+    DECISION = 2    # agent steps and trade decisions
+    ADVISORY = 3    # advisor chatter and guidance questions
+
+
+# Callers tag requests with these headers; the scheduler strips them before anything is sent
+PRIORITY_HEADER = "X-GM-Priority"
+HEDGE_HEADER = "X-GM-Hedge"
+
+# (requests per minute, tokens per minute), matched by longest model-name prefix.
+# GM_LLM_LIMITS='{"gpt-4.1": [500, 30000]}' overrides or adds entries.
+MODEL_LIMITS: Dict[str, Tuple[float, float]] = {
+    "gpt-4.1": (500, 30_000),
+    "gpt-4.1-mini": (500, 200_000),
+    "gpt-4.1-nano": (500, 200_000),
+    "gpt-4o": (500, 30_000),
+    "gpt-4o-mini": (500, 200_000),
+    "gpt-4": (500, 10_000),
+    "": (500, 30_000),
+}
+MODEL_LIMITS.update({k: tuple(v) for k, v in json.loads(os.getenv("GM_LLM_LIMITS", "{}")).items()})
+
+MAX_RETRIES = int(os.getenv("GM_LLM_MAX_RETRIES", "4"))
+BACKOFF_BASE = 0.5  # seconds; attempt n sleeps uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**n))
+BACKOFF_CAP = 30.0
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+BREAKER_THRESHOLD = 5  # consecutive server/transport failures that open a model's circuit
+BREAKER_COOLDOWN = 30.0  # seconds before a single probe request is let through
+HEDGE_DEFAULT_DELAY = 8.0  # seconds, until enough latencies are known for the p90
+HEDGE_MIN_SAMPLES = 8
+IMAGE_TOKENS = 1_000  # rough per-image estimate; actual usage is charged once the response arrives
+DEFAULT_OUTPUT_TOKENS = 512
+
+# throttled_s / retries / rate_limited / hedges / hedge_wins / circuit_rejected, across all loops
+stats: Counter = Counter()
+
+
+def limits_for(model: str) -> Tuple[float, float]:
+    prefix = max((p for p in MODEL_LIMITS if model.startswith(p)), key=len)
+    return MODEL_LIMITS[prefix]
+
+
+def estimate_tokens(payload: dict) -> int:
+    """Prompt characters / 4, a flat charge per image, plus the output cap."""
+    text = 0
+    images = 0
+    stack = [payload.get("messages") or payload.get("input") or ""]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, str):
+            if value.startswith("data:image"):
+                images += 1
+            else:
+                text += len(value)
+    output = (payload.get("max_output_tokens") or payload.get("max_completion_tokens")
+              or payload.get("max_tokens") or DEFAULT_OUTPUT_TOKENS)
+    return text // 4 + images * IMAGE_TOKENS + output
+
+
+class TokenBucket:
+    """Refills continuously to one minute's budget; charges may run it into debt."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken (0 = now)."""
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def charge(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity) if amount > 0 else amount
+
+    def pause(self, seconds: float, now: float) -> None:
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+class CircuitBreaker:
+    """Opens after BREAKER_THRESHOLD consecutive failures; after the cooldown one probe decides."""
+
+    def __init__(self, model: str, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.model = model
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def closed(self) -> bool:
+        return self.opened_at is None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at < self.cooldown or self.probing:
+            return False
+        self.probing = True
+        return True
+
+    def success(self) -> None:
+        if self.opened_at is not None:
+            logger.info(f"{self.model}: circuit closed")
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.probing or (self.opened_at is None and self.failures >= self.threshold):
+            logger.warning(f"{self.model}: circuit open for {self.cooldown:.0f}s after {self.failures} failures")
+            self.opened_at = time.monotonic()
+            self.probing = False
+
+
+class ModelLane:
+    """Budgets, priority queue, breaker and latency history for one model."""
+
+    def __init__(self, model: str):
+        rpm, tpm = limits_for(model)
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.breaker = CircuitBreaker(model)
+        self.latencies = deque(maxlen=64)
+        self._waiting = []
+        self._seq = itertools.count()
+        self._changed = asyncio.Condition()
+
+    def _delay(self, tokens: int) -> float:
+        now = time.monotonic()
+        return max(self.requests.delay(1, now), self.tokens.delay(tokens, now))
+
+    def _take(self, tokens: int) -> None:
+        self.requests.charge(1)
+        self.tokens.charge(tokens)
+
+    async def acquire(self, tokens: int, priority: Priority) -> None:
+        """Wait until this request is the most urgent one queued and the budgets cover it."""
+        entry = (int(priority), next(self._seq))
+        t0 = time.monotonic()
+        async with self._changed:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    wait = self._delay(tokens) if self._waiting[0] == entry else None
+                    if wait == 0:
+                        self._take(tokens)
+                        return
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._changed.notify_all()
+                stats["throttled_s"] += time.monotonic() - t0
+
+    def try_acquire(self, tokens: int) -> bool:
+        """Take budget only if nobody is queued and it is available right now (used for hedges)."""
+        if self._waiting or self._delay(tokens) > 0:
+            return False
+        self._take(tokens)
+        return True
+
+    def settle(self, estimated: int, response: httpx.Response) -> None:
+        """Charge the difference between the estimate and the usage the API reported."""
+        try:
+            usage = json.loads(response.content).get("usage") or {}
+        except (ValueError, AttributeError):
+            return
+        if usage.get("total_tokens"):
+            self.tokens.charge(usage["total_tokens"] - estimated)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every queued request for this model, e.g. on a 429."""
+        now = time.monotonic()
+        self.requests.pause(seconds, now)
+        self.tokens.pause(seconds, now)
+
+    def hedge_delay(self) -> float:
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        ordered = sorted(self.latencies)
+        return ordered[int(0.9 * (len(ordered) - 1))]
+
+
+class Scheduler:
+    """Per-model lanes for the running event loop (asyncio primitives are loop-bound)."""
+
+    def __init__(self):
+        self.lanes: Dict[str, ModelLane] = {}
+
+    def lane(self, model: str) -> ModelLane:
+        lane = self.lanes.get(model)
+        if lane is None:
+            lane = self.lanes[model] = ModelLane(model)
+        return lane
+
+
+_schedulers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Scheduler]" = weakref.WeakKeyDictionary()
+
+
+def get_scheduler() -> Scheduler:
+    loop = asyncio.get_running_loop()
+    scheduler = _schedulers.get(loop)
+    if scheduler is None:
+        scheduler = _schedulers[loop] = Scheduler()
+    return scheduler
+
+
+def backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = response.headers.get(header)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                pass
+    return None
+
+
+def _error(request: httpx.Request, status: int, code: str, message: str) -> httpx.Response:
+    return httpx.Response(status, request=request, json={"error": {"message": message, "type": code, "code": code}})
+
+
+class SchedulingTransport(httpx.AsyncBaseTransport):
+    """Rate limits, prioritizes, retries and optionally hedges POSTs to the model API."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, max_retries: int = MAX_RETRIES):
+        self.inner = inner
+        self.max_retries = max_retries
+
+    async def _send(self, request: httpx.Request, body: bytes) -> httpx.Response:
+        copy = httpx.Request(request.method, request.url, headers=request.headers, content=body,
+                             extensions=request.extensions)
+        response = await self.inner.handle_async_request(copy)
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        headers = [(k, v) for k, v in response.headers.items()
+                   if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    async def _hedged(self, lane: ModelLane, request: httpx.Request, body: bytes, tokens: int) -> httpx.Response:
+        """Send a duplicate if the first attempt is slower than the model's p90; the first good answer wins."""
+        first = asyncio.ensure_future(self._send(request, body))
+        done, _ = await asyncio.wait({first}, timeout=lane.hedge_delay())
+        # never hedge into a queue or a struggling model: that is when duplicates hurt most
+        if done or not lane.breaker.closed or not lane.try_acquire(tokens):
+            return await first
+        stats["hedges"] += 1
+        second = asyncio.ensure_future(self._send(request, body))
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result().status_code not in RETRY_STATUSES:
+                        if task is second:
+                            stats["hedge_wins"] += 1
+                        return task.result()
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        priority = Priority.__members__.get(request.headers.get(PRIORITY_HEADER, "").upper(), Priority.DECISION)
+        hedge = request.headers.get(HEDGE_HEADER) == "1"
+        for header in (PRIORITY_HEADER, HEDGE_HEADER):
+            if header in request.headers:
+                del request.headers[header]
+        if request.method != "POST":
+            return await self.inner.handle_async_request(request)
+
+        body = await request.aread()
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            payload = {}
+        model = payload.get("model", "")
+        tokens = estimate_tokens(payload)
+        lane = get_scheduler().lane(model)
+
+        outcome = None
+        for attempt in range(self.max_retries + 1):
+            if not lane.breaker.allow():
+                stats["circuit_rejected"] += 1
+                return _error(request, 503, "circuit_open",
+                              f"{model}: circuit breaker open after repeated failures; failing fast")
+            await lane.acquire(tokens, priority)
+            t0 = time.monotonic()
+            retry_after = None
+            try:
+                response = await (self._hedged(lane, request, body, tokens) if hedge else self._send(request, body))
+            except httpx.TransportError as e:
+                lane.breaker.failure()
+                outcome = e
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    lane.breaker.success()
+                    lane.latencies.append(time.monotonic() - t0)
+                    lane.settle(tokens, response)
+                    return response
+                retry_after = _retry_after(response)
+                if response.status_code == 429:
+                    # the server is up, just busy: hold the whole lane instead of counting a failure
+                    stats["rate_limited"] += 1
+                    lane.breaker.success()
+                    lane.pause(retry_after or backoff(attempt))
+                else:
+                    lane.breaker.failure()
+                outcome = response
+            if attempt == self.max_retries:
+                break
+            delay = backoff(attempt, retry_after)
+            stats["retries"] += 1
+            logger.info(f"{model} attempt {attempt + 1} failed ({getattr(outcome, 'status_code', outcome)}); "
+                        f"retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def headers(priority: Priority = Priority.DECISION, hedge: bool = False) -> Dict[str, str]:
+    """Request headers that set a call's priority class and hedging."""
+    tags = {PRIORITY_HEADER: priority.name.lower()}
+    if hedge:
+        tags[HEDGE_HEADER] = "1"
+    return tags
@@ -0,0 +1,145 @@
+import json
+import time
+import asyncio
+import logging
+import argparse
+from typing import List, Optional
+
+from pydantic import BaseModel
+from langchain_openai import ChatOpenAI
+from browser_use import Agent, BrowserSession
+from playwright.async_api import Browser, async_playwright
+
+import llm_pool
+import llm_cassette
+import llm_scheduler
+import fast_browse
+import league_snapshot
+from web2 import LeagueSession, bind_session, controller, reward_registry, router_hook, state_hook
+
+logger = logging.getLogger(__name__)
+
+
+class LeagueOutcome(BaseModel):
+    name: str
+    ok: bool
+    error: Optional[str] = None
+    record: str = ""
+    playoff_rounds_won: Optional[int] = None
+    phase: str = ""
+    trades_made: int = 0
+    steps: int = 0
+    wall_time_s: float = 0.0
+    llm_calls: int = 0  # every model call the league made: agent steps, extraction and trade decisions
+    snapshot_sha256: Optional[str] = None  # checkpoint the league started from
+
+
+async def _final_standing(page, session: LeagueSession, outcome: LeagueOutcome) -> None:
+    """Fill in the record and playoff result from the league database, best effort."""
+    try:
+        snapshot = await session.league_exporter.export(page)
+    except Exception as e:
+        logger.info(f"[{session.name}] final export unavailable: {e}")
+        return
+    outcome.record = snapshot.game_state_fields()["record"]
+    current = [ts for ts in snapshot.team_seasons() if ts.tid == snapshot.user_tid and ts.season == snapshot.season]
+    if current:
+        outcome.playoff_rounds_won = current[0].playoff_rounds_won
+
+
+async def run_league(browser: Browser, name: str, task: str, semaphore: asyncio.Semaphore,
+                     model: str = "gpt-4o", max_steps: int = 100, fast: bool = True,
+                     snapshot: Optional[str] = league_snapshot.LEAGUE_SNAPSHOT) -> LeagueOutcome:
+    """Play one league in its own browser context; errors end up in the outcome instead of raising."""
+    async with semaphore:
+        t0 = time.perf_counter()
+        session = LeagueSession(name, snapshot_path=snapshot)
+        outcome = LeagueOutcome(name=name, ok=False)
+        # a fresh context has its own IndexedDB, so every league starts from an empty game
+        context = await fast_browse.new_context(browser, fast=fast)
+        bind_session(context, session)
+        browser_session = BrowserSession(browser_context=context, keep_alive=True)
+        with llm_pool.counting_calls() as calls:
+            try:
+                llm = ChatOpenAI(model=model, **llm_pool.sdk_kwargs(http_client_arg="http_async_client"))
+                agent = Agent(task=task, llm=llm, controller=controller,
+                              browser_session=browser_session)
+                history = await agent.run(max_steps=max_steps, on_step_start=state_hook, on_step_end=router_hook)
+                outcome.steps = len(history.history)
+                outcome.ok = True
+                await _final_standing(await browser_session.get_current_page(), session, outcome)
+            except Exception as e:
+                logger.exception(f"[{name}] league failed")
+                outcome.error = f"{type(e).__name__}: {e}"
+            finally:
+                outcome.trades_made = session.trades_made
+                outcome.phase = session.phase_manager.phase_text or session.phase_manager.current_phase
+                outcome.wall_time_s = round(time.perf_counter() - t0, 2)
+                outcome.snapshot_sha256 = session.snapshot_sha256
+                outcome.llm_calls = calls["calls"]
+                await context.close()
+        logger.info(f"[{name}] finished: {outcome.model_dump()}")
+        return outcome
+
+
+async def run_leagues(count: int, task: str, concurrency: int = 4, model: str = "gpt-4o",
+                      max_steps: int = 100, headless: bool = True, fast: bool = True,
+                      snapshot: Optional[str] = league_snapshot.LEAGUE_SNAPSHOT) -> List[LeagueOutcome]:
+    """Play count leagues on one Chromium instance, at most concurrency at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    async with async_playwright() as pw:
+        browser = await fast_browse.launch(pw, headless=headless, fast=fast)
+        try:
+            return await asyncio.gather(*(
+                run_league(browser, f"league-{i:03d}", task, semaphore, model, max_steps, fast, snapshot)
+                for i in range(count)
+            ))
+        finally:
+            await browser.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Play several Basketball GM leagues concurrently")
+    parser.add_argument("-n", "--leagues", type=int, default=4)
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="leagues playing at the same time")
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--max-steps", type=int, default=100, help="agent steps per league")
+    parser.add_argument("--task", default="instructions.txt")
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--full-browse", action="store_true", help="load images, fonts and third-party scripts")
+    parser.add_argument("--snapshot", default=league_snapshot.LEAGUE_SNAPSHOT,
+                        help="league checkpoint every league starts from (league_snapshot.py create)")
+    parser.add_argument("--out", default="multi_league.json")
+    args = parser.parse_args()
+
+    with open(args.task, "r") as f:
+        task = f.read()
+    try:
+        reward_registry.refresh()
+    except Exception as e:
+        logger.warning(f"Reward model not loaded at startup: {e}")
+
+    t0 = time.perf_counter()
+    outcomes = await run_leagues(args.leagues, task, args.concurrency, args.model, args.max_steps,
+                                 headless=not args.headed, fast=not args.full_browse, snapshot=args.snapshot)
+    report = {
+        "leagues": [o.model_dump() for o in outcomes],
+        "completed": sum(o.ok for o in outcomes),
+        "llm_calls": llm_pool.total_calls(),
+        "llm_cassette": dict(llm_cassette.stats),
+        "llm_scheduler": dict(llm_scheduler.stats),
+        "wall_time_s": round(time.perf_counter() - t0, 2),
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for o in outcomes:
+        status = "ok" if o.ok else f"FAILED ({o.error})"
+        print(f"{o.name}: {status} record {o.record or '?'}, playoff rounds won {o.playoff_rounds_won}, "
+              f"{o.trades_made} trades, {o.steps} steps, {o.llm_calls} LLM calls, {o.wall_time_s:.0f}s")
+    print(f"{report['completed']}/{len(outcomes)} leagues finished in {report['wall_time_s']:.0f}s, "
+          f"{report['llm_calls']} LLM calls. Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
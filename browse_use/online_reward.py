@@ -0,0 +1,136 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import tempfile
+from typing import List, Optional
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+
+from feedback_store import FeedbackRecord, FeedbackStore, get_store
+
+logger = logging.getLogger(__name__)
+
+ONLINE_MODEL_PATH = "reward_model_online.pkl"
+CLASSES = np.array([0, 1])
+
+
+class OnlineRewardModel:
+    """Incrementally trained reward model.
+
+    The hashing featurizer is stateless, so there is no vocabulary to refit and
+    each labelled feedback record is a single SGD partial_fit step. Checkpoints
+    are written as a fitted Pipeline, so the reward registry can hot-load them
+    like any other reward model, plus a JSON sidecar holding the feedback
+    store cursor.
+    """
+
+    def __init__(self, path: str = ONLINE_MODEL_PATH):
+        self.path = path
+        self.vectorizer = HashingVectorizer(n_features=2 ** 18, ngram_range=(1, 2), stop_words="english",
+                                            alternate_sign=False, norm="l2")
+        self.clf = SGDClassifier(loss="log_loss", alpha=1e-4, random_state=42)
+        self.last_id = 0
+        self.updates = 0
+        # Leagues running side by side (multi_league.py) share one model; one sync at a time
+        self._sync_lock = asyncio.Lock()
+
+    @property
+    def state_path(self) -> str:
+        return os.path.splitext(self.path)[0] + ".json"
+
+    @classmethod
+    def load_or_create(cls, path: str = ONLINE_MODEL_PATH) -> "OnlineRewardModel":
+        model = cls(path)
+        if os.path.exists(path) and os.path.exists(model.state_path):
+            pipeline = joblib.load(path)
+            model.vectorizer = pipeline.named_steps["hash"]
+            model.clf = pipeline.named_steps["lr"]
+            with open(model.state_path) as f:
+                state = json.load(f)
+            model.last_id = state["last_id"]
+            model.updates = state["updates"]
+        return model
+
+    @property
+    def pipeline(self) -> Pipeline:
+        return Pipeline([("hash", self.vectorizer), ("lr", self.clf)])
+
+    def partial_fit(self, texts: List[str], labels: List[int]) -> None:
+        if not texts:
+            return
+        self.clf.partial_fit(self.vectorizer.transform(texts), np.asarray(labels), classes=CLASSES)
+        self.updates += len(texts)
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        return self.clf.predict_proba(self.vectorizer.transform(texts))
+
+    @staticmethod
+    def _replace(path: str, write) -> None:
+        """write(f) into a temp file unique to this call next to path, then rename it over path."""
+        directory, name = os.path.split(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile("wb", dir=directory, prefix=name + ".", suffix=".tmp", delete=False) as f:
+            try:
+                write(f)
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        os.replace(f.name, path)
+
+    def checkpoint(self) -> None:
+        """Write model then cursor, each via its own temp file + rename."""
+        state = {"last_id": self.last_id, "updates": self.updates, "saved_at": time.time()}
+        self._replace(self.path, lambda f: joblib.dump(self.pipeline, f))
+        self._replace(self.state_path, lambda f: f.write(json.dumps(state).encode("utf-8")))
+
+    def learn(self, records: List[FeedbackRecord], checkpoint: bool = True) -> int:
+        """Update on labelled records (unlabelled ones only advance the cursor)."""
+        labelled = [r for r in records if r.label is not None]
+        self.partial_fit([r.trade_text for r in labelled], [r.label for r in labelled])
+        if records:
+            self.last_id = max(self.last_id, max(r.id or 0 for r in records))
+        if labelled and checkpoint:
+            self.checkpoint()
+        return len(labelled)
+
+    def sync(self, store: Optional[FeedbackStore] = None, batch_size: int = 256) -> int:
+        """Consume every feedback record added since the last checkpoint."""
+        store = store or get_store()
+        learned = 0
+        batch = []
+        for record in store.iter_records(after_id=self.last_id, batch_size=batch_size):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                learned += self.learn(batch, checkpoint=False)
+                batch = []
+        learned += self.learn(batch, checkpoint=False)
+        if learned:
+            self.checkpoint()
+            logger.info(f"Online reward model learned {learned} new records ({self.updates} total)")
+        return learned
+
+    async def sync_async(self, store: Optional[FeedbackStore] = None) -> int:
+        """sync() on a worker thread; concurrent callers queue so partial_fit and checkpoints never interleave."""
+        async with self._sync_lock:
+            return await asyncio.to_thread(self.sync, store)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    # python online_reward.py [sync | rebuild]
+    command = sys.argv[1] if len(sys.argv) > 1 else "sync"
+    if command == "rebuild":
+        model = OnlineRewardModel()  # fresh weights, replay the whole store
+    else:
+        model = OnlineRewardModel.load_or_create()
+    start = time.perf_counter()
+    learned = model.sync()
+    print(f"Learned {learned} records in {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"({model.updates} updates total, cursor at id {model.last_id})")
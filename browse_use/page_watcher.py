@@ -0,0 +1,129 @@
+import json
+import logging
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+from playwright.async_api import Page
+
+from dom_extract import PHASE_SELECTOR, ROSTER_SUMMARY_SELECTOR
+
+logger = logging.getLogger(__name__)
+
+BINDING_NAME = "__gmPageChanged"
+
+# Elements whose text changes mean our extracted state is stale
+WATCH_TARGETS = {
+    "phase": PHASE_SELECTOR,
+    "roster": ROSTER_SUMMARY_SELECTOR,
+}
+
+# Installed as an init script (survives navigations) and evaluated once on the
+# current document. A MutationObserver re-reads the watched elements after DOM
+# changes and pushes any new text to Python through the exposed binding.
+_OBSERVER_JS = """
+(targets) => {
+  if (window.__gmWatcherInstalled) return;
+  window.__gmWatcherInstalled = true;
+  const last = {};
+  let pending = [];
+  let scheduled = false;
+
+  const check = () => {
+    scheduled = false;
+    for (const [key, selector] of Object.entries(targets)) {
+      const el = document.querySelector(selector);
+      const text = el ? el.innerText.trim() : "";
+      if (text && text !== last[key]) {
+        last[key] = text;
+        pending.push(window.%(binding)s(key, text));
+      }
+    }
+  };
+
+  window.__gmWatcherFlush = async () => {
+    check();
+    const calls = pending;
+    pending = [];
+    await Promise.all(calls);
+  };
+
+  const start = () => {
+    new MutationObserver(() => {
+      if (!scheduled) {
+        scheduled = true;
+        setTimeout(check, 50);
+      }
+    }).observe(document.documentElement, { subtree: true, childList: true, characterData: true });
+    check();
+  };
+
+  if (document.readyState === "loading") {
+    document.addEventListener("DOMContentLoaded", start);
+  } else {
+    start();
+  }
+}
+""" % {"binding": BINDING_NAME}
+
+
+class PageWatcher:
+    """Versioned view of the watched page regions, updated by push events from the page.
+
+    Every time a watched element's text changes its version is bumped. Callers
+    store whatever they extracted alongside the version they extracted it at and
+    only re-extract once the version has moved on.
+    """
+
+    def __init__(self, targets: Optional[Dict[str, str]] = None):
+        self.targets = dict(targets or WATCH_TARGETS)
+        self.versions = {key: 0 for key in self.targets}
+        self.texts: Dict[str, str] = {}
+        self._cached: Dict[str, Any] = {}
+        self._listeners = []
+        self._pages = weakref.WeakSet()
+
+    async def install(self, page: Page) -> None:
+        if page in self._pages:
+            return
+        await page.expose_binding(BINDING_NAME, self._on_change)
+        script = f"({_OBSERVER_JS})({json.dumps(self.targets)})"
+        await page.add_init_script(script)
+        await page.evaluate(script)
+        self._pages.add(page)
+        logger.info(f"Page watcher installed for {list(self.targets)}")
+
+    def _on_change(self, source, key: str, text: str) -> None:
+        if self.texts.get(key) == text:
+            return
+        self.texts[key] = text
+        self.versions[key] = self.versions.get(key, 0) + 1
+        logger.info(f"Page change: {key} -> v{self.versions[key]} ({text[:60]!r})")
+        for listener in self._listeners:
+            try:
+                listener(key, text)
+            except Exception as e:
+                logger.error(f"Page watcher listener failed: {e}")
+
+    async def flush(self, page: Page) -> None:
+        """Force a check and wait until any pending change events have reached Python."""
+        await self.install(page)
+        try:
+            await page.evaluate("() => window.__gmWatcherFlush && window.__gmWatcherFlush()")
+        except Exception as e:
+            logger.debug(f"Page watcher flush failed: {e}")
+
+    def add_listener(self, listener: Callable[[str, str], None]) -> None:
+        self._listeners.append(listener)
+
+    def version(self, key: str) -> int:
+        return self.versions.get(key, 0)
+
+    def cached(self, key: str) -> Optional[Any]:
+        """Return the value stored for key if it was extracted at the current version."""
+        entry = self._cached.get(key)
+        if entry is None or entry[0] != self.version(key) or self.version(key) == 0:
+            return None
+        return entry[1]
+
+    def store(self, key: str, value: Any, version: int) -> None:
+        self._cached[key] = (version, value)
@@ -0,0 +1,132 @@
+import os
+import hashlib
+import logging
+import threading
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from compact_reward import compact_path_for, prefer_compact
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = "reward_model.pkl"
+
+
+class ModelVersion:
+    """A loaded reward model plus what it was loaded from."""
+
+    def __init__(self, model: Any, path: str, sha256: str, mtime: float):
+        self.model = model
+        self.path = path
+        self.sha256 = sha256
+        self.mtime = mtime
+
+    @property
+    def version(self) -> str:
+        return self.sha256[:12]
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class RewardModelRegistry:
+    """Keeps the reward model loaded and hot-swaps it when the file on disk changes.
+
+    The pickle and its compact .npz export are stat()ed on every access and
+    whichever is newer is served, so a later train_reward.py run with or
+    without --compact is picked up either way. A file is only re-hashed and
+    re-loaded when it or its mtime changes, so steady-state overhead is two
+    syscalls. The previously active version is kept around for rollback().
+    """
+
+    def __init__(self, path: str = DEFAULT_MODEL_PATH, follow_compact: bool = True):
+        self.path = path
+        self.follow_compact = follow_compact  # False serves exactly path (bench_reward.py)
+        self._lock = threading.Lock()
+        self.current: Optional[ModelVersion] = None
+        self.previous: Optional[ModelVersion] = None
+        self._seen: Optional[Tuple[str, float]] = None  # (path, mtime) last loaded
+
+    def exists(self) -> bool:
+        """True once train_reward.py has written the pickle or its compact export."""
+        return os.path.exists(self.path) or os.path.exists(compact_path_for(self.path))
+
+    def _load(self, path: str, mtime: float) -> Optional[ModelVersion]:
+        sha = file_sha256(path)
+        if self.current is not None and sha == self.current.sha256:
+            return None  # touched but unchanged
+        if path.endswith(".npz"):
+            # NumPy-only export from compact_reward.py: no sklearn import, no pickle
+            from compact_reward import load_compact
+
+            model = load_compact(path)
+        else:
+            import joblib
+
+            model = joblib.load(path)
+        return ModelVersion(model, path, sha, mtime)
+
+    def refresh(self) -> ModelVersion:
+        """Load the model if it is new or changed on disk and return the active version."""
+        path = prefer_compact(self.path) if self.follow_compact else self.path
+        seen = (path, os.stat(path).st_mtime)
+        if self.current is not None and seen == self._seen:
+            return self.current
+        with self._lock:
+            if self.current is None or seen != self._seen:
+                try:
+                    loaded = self._load(*seen)
+                except Exception as e:
+                    # A half-written model file from a running train_reward.py; keep serving the old one
+                    if self.current is None:
+                        raise
+                    logger.warning(f"Could not load {path}, keeping {self.current.version}: {e}")
+                    return self.current
+                self._seen = seen
+                if loaded is not None:
+                    self.previous, self.current = self.current, loaded
+                    logger.info(f"Reward model {loaded.version} active (from {path})")
+        return self.current
+
+    def get(self) -> Any:
+        return self.refresh().model
+
+    @property
+    def version(self) -> str:
+        return self.refresh().version
+
+    def rollback(self) -> ModelVersion:
+        """Swap back to the previously loaded version until the file changes again."""
+        with self._lock:
+            if self.previous is None:
+                raise RuntimeError("No previous reward model version to roll back to")
+            self.current, self.previous = self.previous, self.current
+            logger.info(f"Rolled reward model back to {self.current.version}")
+            return self.current
+
+    def score(self, trades: Sequence[Any]) -> np.ndarray:
+        """Probability that each trade is a good one, in a single predict_proba call."""
+        if len(trades) == 0:
+            return np.zeros(0)
+        return self.get().predict_proba(list(trades))[:, 1]
+
+
+_registries = {}
+
+
+def get_registry(path: str = DEFAULT_MODEL_PATH) -> RewardModelRegistry:
+    """Process-wide registry per model path."""
+    registry = _registries.get(path)
+    if registry is None:
+        registry = _registries[path] = RewardModelRegistry(path)
+    return registry
+
+
+def score(trades: List[Any], path: str = DEFAULT_MODEL_PATH) -> np.ndarray:
+    return get_registry(path).score(trades)
@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import queue
+import asyncio
+import logging
+import argparse
+import multiprocessing as mp
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# The parent hands each worker one league at a time through its own inbox, so it always
+# knows what a crashed worker was playing. Workers answer with (worker_id, outcome dict).
+POLL_INTERVAL = 1.0
+
+
+def available_cpus() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _pin(cpu: Optional[int]) -> None:
+    # Chromium's renderer processes inherit the mask, so the game's simulation stays on this core too
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu})
+
+
+async def _worker_loop(worker_id: int, cpu: Optional[int], inbox, results, task: str, options: dict) -> None:
+    from playwright.async_api import async_playwright
+    import fast_browse
+    from multi_league import run_league
+    from web2 import reward_registry
+
+    try:
+        reward_registry.refresh()
+    except Exception as e:
+        logger.warning(f"Reward model not loaded in worker {worker_id}: {e}")
+    semaphore = asyncio.Semaphore(1)
+    async with async_playwright() as pw:
+        browser = await fast_browse.launch(pw, headless=options["headless"], fast=options["fast"])
+        try:
+            while True:
+                name = await asyncio.to_thread(inbox.get)
+                if name is None:
+                    return
+                outcome = await run_league(browser, name, task, semaphore, options["model"], options["max_steps"],
+                                           options["fast"], options["snapshot"])
+                record = outcome.model_dump()
+                record.update(worker=worker_id, cpu=cpu)
+                results.put((worker_id, record))
+        finally:
+            await browser.close()
+
+
+def _worker(worker_id: int, cpu: Optional[int], inbox, results, task: str, options: dict) -> None:
+    _pin(cpu)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_worker_loop(worker_id, cpu, inbox, results, task, options))
+
+
+def _wins_losses(record: str):
+    parts = record.split("-")
+    try:
+        return int(parts[0]), int(parts[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def summarize(seasons: List[dict], wall_time_s: float) -> dict:
+    """Aggregate per-season results into the sweep report's summary block."""
+    finished = [s for s in seasons if s["ok"]]
+    records = [wl for wl in (_wins_losses(s["record"]) for s in finished) if wl]
+    games = sum(w + l for w, l in records)
+    playoffs = [s["playoff_rounds_won"] for s in finished if s.get("playoff_rounds_won") is not None]
+    return {
+        "seasons": len(seasons),
+        "completed": len(finished),
+        "failed": len(seasons) - len(finished),
+        "win_pct": round(sum(w for w, _ in records) / games, 4) if games else None,
+        "playoff_rate": round(sum(r >= 0 for r in playoffs) / len(playoffs), 4) if playoffs else None,
+        "mean_playoff_rounds_won": round(sum(max(r, 0) for r in playoffs) / len(playoffs), 3) if playoffs else None,
+        "titles": sum(r >= 4 for r in playoffs),
+        "trades_made": sum(s["trades_made"] for s in seasons),
+        "llm_calls": sum(s.get("llm_calls", 0) for s in seasons),
+        "wall_time_s": round(wall_time_s, 1),
+        "seasons_per_hour": round(len(finished) / wall_time_s * 3600, 1) if wall_time_s else None,
+    }
+
+
+class SeasonFarm:
+    """Plays leagues across worker processes, one Chromium per worker, each pinned to its own core.
+
+    A worker that dies mid-season (Chromium crash, OOM kill) is replaced on the
+    same core and its league is re-queued, up to max_retries times.
+    """
+
+    def __init__(self, task: str, workers: Optional[int] = None, model: str = "gpt-4o", max_steps: int = 100,
+                 headless: bool = True, max_retries: int = 2, stream_path: Optional[str] = None,
+                 fast: bool = True, snapshot: Optional[str] = os.getenv("GM_LEAGUE_SNAPSHOT") or None):
+        self.task = task
+        self.cpus = available_cpus()
+        self.num_workers = workers or len(self.cpus)
+        self.options = {"model": model, "max_steps": max_steps, "headless": headless, "fast": fast,
+                        "snapshot": snapshot}
+        self.max_retries = max_retries
+        self.stream_path = stream_path
+        self.ctx = mp.get_context("spawn")
+        self.pending = deque()
+        self.results = self.ctx.Queue()
+        self.workers: Dict[int, mp.Process] = {}
+        self.inboxes: Dict[int, mp.Queue] = {}
+        self.in_flight: Dict[int, str] = {}
+        self.attempts = Counter()
+        self.requeued = 0
+        self.seasons: List[dict] = []
+
+    def _spawn(self, worker_id: int) -> None:
+        cpu = self.cpus[worker_id % len(self.cpus)]
+        # fresh inbox: a dead worker's queue may hold a half-read message
+        self.inboxes[worker_id] = self.ctx.Queue()
+        proc = self.ctx.Process(target=_worker, name=f"season-farm-{worker_id}", daemon=True,
+                                args=(worker_id, cpu, self.inboxes[worker_id], self.results, self.task, self.options))
+        proc.start()
+        self.workers[worker_id] = proc
+
+    def _dispatch(self) -> None:
+        for worker_id in self.workers:
+            if worker_id not in self.in_flight and self.pending:
+                name = self.pending.popleft()
+                self.in_flight[worker_id] = name
+                self.attempts[name] += 1
+                self.inboxes[worker_id].put(name)
+
+    def _record(self, season: dict) -> None:
+        self.seasons.append(season)
+        if self.stream_path:
+            with open(self.stream_path, "a") as f:
+                f.write(json.dumps(season) + "\n")
+        status = "ok" if season["ok"] else f"failed: {season['error']}"
+        logger.info(f"{season['name']} ({status}) record {season['record'] or '?'}, "
+                    f"{len(self.seasons)} seasons done")
+
+    def _handle(self, message) -> None:
+        worker_id, season = message
+        if self.in_flight.get(worker_id) == season["name"]:
+            del self.in_flight[worker_id]
+        season["attempts"] = self.attempts[season["name"]]
+        self._record(season)
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                self._handle(self.results.get_nowait())
+            except queue.Empty:
+                return
+
+    def _reap(self) -> None:
+        """Replace dead workers and re-queue whatever league they were playing."""
+        for worker_id, proc in list(self.workers.items()):
+            if proc.is_alive():
+                continue
+            self._drain()  # a result sent just before dying is still in the queue
+            name = self.in_flight.pop(worker_id, None)
+            logger.warning(f"Worker {worker_id} exited with code {proc.exitcode} while playing {name}")
+            if name is not None:
+                if self.attempts[name] <= self.max_retries:
+                    self.requeued += 1
+                    self.pending.appendleft(name)
+                else:
+                    self._record({"name": name, "ok": False, "error": f"worker crashed {self.attempts[name]} times",
+                                  "record": "", "playoff_rounds_won": None, "phase": "", "trades_made": 0,
+                                  "steps": 0, "wall_time_s": 0.0, "llm_calls": 0, "worker": worker_id,
+                                  "attempts": self.attempts[name]})
+            self._spawn(worker_id)
+
+    def run(self, count: int) -> dict:
+        t0 = time.perf_counter()
+        self.pending.extend(f"season-{i:04d}" for i in range(count))
+        for worker_id in range(min(self.num_workers, count)):
+            self._spawn(worker_id)
+        try:
+            while len(self.seasons) < count:
+                self._dispatch()
+                try:
+                    self._handle(self.results.get(timeout=POLL_INTERVAL))
+                except queue.Empty:
+                    pass
+                self._reap()
+        finally:
+            for inbox in self.inboxes.values():
+                inbox.put(None)
+            for proc in self.workers.values():
+                proc.join(timeout=30)
+                if proc.is_alive():
+                    proc.terminate()
+        wall_time = time.perf_counter() - t0
+        return {
+            "summary": {**summarize(self.seasons, wall_time), "workers": self.num_workers,
+                        "requeued": self.requeued},
+            "seasons": sorted(self.seasons, key=lambda s: s["name"]),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many seasons across worker processes pinned to CPU cores")
+    parser.add_argument("-n", "--seasons", type=int, default=32)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="defaults to one per available core")
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--max-steps", type=int, default=100, help="agent steps per season")
+    parser.add_argument("--max-retries", type=int, default=2, help="re-queues of a season whose worker crashed")
+    parser.add_argument("--task", default="instructions.txt")
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--full-browse", action="store_true", help="load images, fonts and third-party scripts")
+    parser.add_argument("--snapshot", default=os.getenv("GM_LEAGUE_SNAPSHOT") or None,
+                        help="league checkpoint every season starts from (league_snapshot.py create)")
+    parser.add_argument("--stream", default="season_farm.jsonl", help="append each season's result here as it lands")
+    parser.add_argument("--out", default="season_farm.json")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.task, "r") as f:
+        task = f.read()
+    farm = SeasonFarm(task, args.workers, args.model, args.max_steps, not args.headed, args.max_retries, args.stream,
+                      fast=not args.full_browse, snapshot=args.snapshot)
+    report = farm.run(args.seasons)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    summary = report["summary"]
+    print(f"{summary['completed']}/{summary['seasons']} seasons on {summary['workers']} workers "
+          f"in {summary['wall_time_s']:.0f}s ({summary['seasons_per_hour']} seasons/hour), "
+          f"{summary['requeued']} re-queued after worker crashes")
+    print(f"win% {summary['win_pct']}, playoff rate {summary['playoff_rate']}, titles {summary['titles']}, "
+          f"{summary['trades_made']} trades, {summary['llm_calls']} LLM calls")
+    print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
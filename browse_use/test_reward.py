@@ -1,20 +1,27 @@
-import joblib
 import numpy as np
+from reward_registry import get_registry
 
 def load_model():
-    """Load the trained reward model."""
-    return joblib.load("reward_model.pkl")
+    """Load the trained reward model through the shared registry."""
+    registry = get_registry("reward_model.pkl")
+    registry.refresh()
+    return registry
 
-def evaluate_trade(trade_text: str, model) -> dict:
+def evaluate_trades(trade_texts, registry) -> list:
+    """Evaluate a batch of trade proposals with a single model call."""
+    probs = registry.score(trade_texts)
+    return [
+        {
+            "probability": prob,
+            "recommendation": "ACCEPT" if prob > 0.5 else "REJECT",
+            "confidence": abs(prob - 0.5) * 2  # Scale to 0-1 range
+        }
+        for prob in probs
+    ]
+
+def evaluate_trade(trade_text: str, registry) -> dict:
     """Evaluate a trade proposal using the reward model."""
-    # Get probability of being a good trade
-    prob = model.predict_proba([trade_text])[0][1]
-    
-    return {
-        "probability": prob,
-        "recommendation": "ACCEPT" if prob > 0.5 else "REJECT",
-        "confidence": abs(prob - 0.5) * 2  # Scale to 0-1 range
-    }
+    return evaluate_trades([trade_text], registry)[0]
 
 def main():
     # Load model
@@ -53,11 +60,11 @@ def main():
     
     # Evaluate each test case
     print("\nEvaluating trade proposals...")
-    for i, trade in enumerate(test_trades, 1):
+    results = evaluate_trades(test_trades, model)
+    for i, (trade, result) in enumerate(zip(test_trades, results), 1):
         print(f"\nTrade Proposal {i}:")
         print(trade)
         
-        result = evaluate_trade(trade, model)
         print("\nEvaluation Results:")
         print(f"Probability of being a good trade: {result['probability']:.2f}")
         print(f"Recommendation: {result['recommendation']}")
@@ -0,0 +1,337 @@
+import re
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+from pydantic import BaseModel, Field
+from playwright.async_api import Page
+
+from dom_extract import TRADE_SUMMARY_SELECTOR, parse_money, read_inner_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STRUCTURED_MODEL_PATH = "reward_model_structured.pkl"
+
+
+class TradePlayer(BaseModel):
+    name: str
+    salary: float = 0.0  # dollars per season
+    ovr: Optional[int] = None
+    pot: Optional[int] = None
+    age: Optional[int] = None
+
+
+class TradePick(BaseModel):
+    season: int
+    round: int
+
+
+class Trade(BaseModel):
+    """One trade from the user's point of view: what goes out, what comes in."""
+
+    team: str = ""
+    other_team: str = ""
+    players_out: List[TradePlayer] = Field(default_factory=list)
+    players_in: List[TradePlayer] = Field(default_factory=list)
+    picks_out: List[TradePick] = Field(default_factory=list)
+    picks_in: List[TradePick] = Field(default_factory=list)
+    payroll_before: Optional[float] = None
+    payroll_after: Optional[float] = None
+    salary_cap: Optional[float] = None
+    ovr_before: Optional[float] = None
+    ovr_after: Optional[float] = None
+
+    @property
+    def salary_out(self) -> float:
+        return sum(p.salary for p in self.players_out)
+
+    @property
+    def salary_in(self) -> float:
+        return sum(p.salary for p in self.players_in)
+
+    def is_empty(self) -> bool:
+        return not (self.players_out or self.players_in or self.picks_out or self.picks_in)
+
+    def to_text(self) -> str:
+        """Human-readable summary in the same shape the feedback file has always used."""
+        def money(x):
+            return f"${x / 1e6:.2f}M"
+
+        def assets(players, picks):
+            lines = [f"- {p.name} ({money(p.salary)})" for p in players]
+            lines += [f"- {pk.season} {'1st' if pk.round == 1 else '2nd'} round pick" for pk in picks]
+            return "\n".join(lines) or "- nothing"
+
+        lines = [
+            "Trade Proposal:",
+            f"{self.team or 'Your team'} trades away:",
+            assets(self.players_out, self.picks_out),
+            f"{self.team or 'Your team'} receives:",
+            assets(self.players_in, self.picks_in),
+        ]
+        if self.payroll_after is not None:
+            lines.append(f"Payroll after trade: {money(self.payroll_after)}")
+        if self.salary_cap is not None:
+            lines.append(f"Salary cap: {money(self.salary_cap)}")
+        if self.ovr_before is not None and self.ovr_after is not None:
+            lines.append(f"Team ovr: {self.ovr_before:g} => {self.ovr_after:g}")
+        return "\n".join(lines)
+
+
+###############################################################################
+# Parsing
+###############################################################################
+_MONEY = r"-?\$[\d,.]+\s?[kMB]?"
+_PLAYER_RE = re.compile(r"^\s*[-*•]?\s*\**([^$()\n*]+?)\**\s*\((" + _MONEY + r")[^)\n]*\)", re.MULTILINE)
+_PICK_RE = re.compile(r"(\d{4})\s+(1st|2nd)\s+round", re.IGNORECASE)
+_SECTION_RE = re.compile(r"^\s*(.+?)\s+trade away:?\s*$", re.IGNORECASE | re.MULTILINE)
+_OVR_RE = re.compile(r"ovr[^\d\n]*?(\d+(?:\.\d+)?)\s*(?:⇒|=>|→|->|to)\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+_PAYROLL_RE = re.compile(r"payroll after trade\W*(" + _MONEY + ")", re.IGNORECASE)
+# "Salary cap: $X" first; "$X salary cap" only within one line, so the payroll line above is never read as the cap
+_CAP_RE = re.compile(r"salary cap\W*(" + _MONEY + ")", re.IGNORECASE)
+_CAP_SUFFIX_RE = re.compile("(" + _MONEY + r")[ \t]+salary cap", re.IGNORECASE)
+# Header lines in the LLM-written feedback text
+_OUT_HEADER_RE = re.compile(r"(traded\W+from your team|trade[sd]? away|sends)", re.IGNORECASE)
+_IN_HEADER_RE = re.compile(r"(received\W+by your team|receives)", re.IGNORECASE)
+
+
+def _players(text: str) -> List[TradePlayer]:
+    players = []
+    for name, salary in _PLAYER_RE.findall(text):
+        name = name.strip(" -*:")
+        value = parse_money(salary.replace(" ", ""))
+        if name and value is not None and not name.lower().startswith(("total", "payroll", "salary")):
+            players.append(TradePlayer(name=name, salary=value))
+    return players
+
+
+def _picks(text: str) -> List[TradePick]:
+    return [TradePick(season=int(season), round=1 if rnd.lower() == "1st" else 2)
+            for season, rnd in _PICK_RE.findall(text)]
+
+
+def _money_match(regex: re.Pattern, text: str) -> Optional[float]:
+    m = regex.search(text)
+    if not m:
+        return None
+    return parse_money(next(g for g in m.groups() if g).replace(" ", ""))
+
+
+def _finish(trade: Trade, own_section: str) -> Trade:
+    m = _OVR_RE.search(own_section)
+    if m:
+        trade.ovr_before, trade.ovr_after = float(m.group(1)), float(m.group(2))
+    trade.payroll_after = _money_match(_PAYROLL_RE, own_section)
+    trade.salary_cap = _money_match(_CAP_RE, own_section)
+    if trade.salary_cap is None:
+        trade.salary_cap = _money_match(_CAP_SUFFIX_RE, own_section)
+    if trade.payroll_after is not None:
+        trade.payroll_before = trade.payroll_after - trade.salary_in + trade.salary_out
+    return trade
+
+
+def parse_trade_summary(text: str) -> Trade:
+    """Parse the trade page summary panel ("<Team> trade away: ...", user's team first)."""
+    sections = list(_SECTION_RE.finditer(text))
+    if len(sections) < 2:
+        return parse_trade_text(text)
+    bodies = []
+    for i, m in enumerate(sections):
+        end = sections[i + 1].start() if i + 1 < len(sections) else len(text)
+        bodies.append(text[m.end():end])
+    trade = Trade(
+        team=sections[0].group(1).strip(),
+        other_team=sections[1].group(1).strip(),
+        players_out=_players(bodies[0]),
+        picks_out=_picks(bodies[0]),
+        players_in=_players(bodies[1]),
+        picks_in=_picks(bodies[1]),
+    )
+    return _finish(trade, bodies[0])
+
+
+def parse_trade_text(text: str) -> Trade:
+    """Best-effort parse of free-form trade descriptions (e.g. LLM text in trade_feedback.txt)."""
+    out_m = _OUT_HEADER_RE.search(text)
+    in_m = _IN_HEADER_RE.search(text, out_m.end() if out_m else 0)
+    if not out_m or not in_m:
+        return Trade()
+    # The incoming section ends at the next markdown heading or the salary discussion
+    rest = text[in_m.end():]
+    stop = re.search(r"^\s*(#{2,}|\d\.\s|\*\*?salary|salary implications|draft picks involved)", rest,
+                     re.IGNORECASE | re.MULTILINE)
+    out_text = text[out_m.end():in_m.start()]
+    in_text = rest[:stop.start()] if stop else rest
+    trade = Trade(
+        players_out=_players(out_text),
+        picks_out=_picks(out_text),
+        players_in=_players(in_text),
+        picks_in=_picks(in_text),
+    )
+    return _finish(trade, rest[stop.start():] if stop else rest)
+
+
+# Row text in the trade page roster tables looks like "... PG 24 64 70 $40.77M ..."
+_ROW_RATINGS_RE = re.compile(r"\b(?:PG|SG|SF|PF|C|G|F|GF|FC)\s+(\d{2})\s+(\d{2})\s+(\d{2})\b")
+
+_TABLE_ROWS_JS = """
+() => [...document.querySelectorAll("#actual-actual-content table tbody tr")].map((tr) => tr.innerText)
+"""
+
+
+def _apply_row_ratings(trade: Trade, rows: Sequence[str]) -> None:
+    for player in trade.players_out + trade.players_in:
+        for row in rows:
+            if player.name in row:
+                m = _ROW_RATINGS_RE.search(row)
+                if m:
+                    player.age, player.ovr, player.pot = int(m.group(1)), int(m.group(2)), int(m.group(3))
+                break
+
+
+def enrich_from_snapshot(trade: Trade, snapshot) -> Trade:
+    """Fill ratings and ages from a league_export.LeagueSnapshot where names match."""
+    by_name = snapshot.players_by_name()
+    for player in trade.players_out + trade.players_in:
+        record = by_name.get(player.name)
+        if record is not None:
+            player.ovr = record.ovr if record.ovr is not None else player.ovr
+            player.pot = record.pot if record.pot is not None else player.pot
+            player.age = record.age if record.age is not None else player.age
+    return trade
+
+
+async def parse_trade_page(page: Page, snapshot=None) -> Trade:
+    """Build a Trade from the trade page DOM: the summary panel plus the roster tables."""
+    text = await read_inner_text(page, TRADE_SUMMARY_SELECTOR)
+    trade = parse_trade_summary(text)
+    try:
+        _apply_row_ratings(trade, await page.evaluate(_TABLE_ROWS_JS))
+    except Exception as e:
+        logger.debug(f"Could not read trade tables: {e}")
+    if snapshot is not None:
+        enrich_from_snapshot(trade, snapshot)
+    return trade
+
+
+###############################################################################
+# Features
+###############################################################################
+FEATURE_NAMES = [
+    "n_players_out", "n_players_in",
+    "salary_out_m", "salary_in_m", "salary_diff_m", "salary_ratio_in_out",
+    "ovr_out_max", "ovr_in_max", "ovr_out_mean", "ovr_in_mean", "ovr_max_diff",
+    "pot_out_max", "pot_in_max",
+    "age_out_mean", "age_in_mean", "age_diff",
+    "picks_out_1st", "picks_out_2nd", "picks_in_1st", "picks_in_2nd",
+    "payroll_before_m", "payroll_after_m", "salary_cap_m", "over_cap_after", "cap_room_after_m",
+    "team_ovr_before", "team_ovr_after", "team_ovr_delta",
+    "missing_ratings", "missing_payroll",
+]
+
+
+def _as_trade(t: Union[Trade, Dict[str, Any], str]) -> Trade:
+    if isinstance(t, Trade):
+        return t
+    if isinstance(t, dict):
+        return Trade(**t)
+    if t.lstrip().startswith("{"):
+        return Trade(**json.loads(t))
+    return parse_trade_text(t)
+
+
+def _stat(players: List[TradePlayer], attr: str, fn) -> float:
+    values = [getattr(p, attr) for p in players if getattr(p, attr) is not None]
+    return float(fn(values)) if values else np.nan
+
+
+def featurize(trades: Iterable[Union[Trade, Dict[str, Any], str]]) -> np.ndarray:
+    """Turn a batch of trades into a dense (n_trades, len(FEATURE_NAMES)) float matrix."""
+    trades = [_as_trade(t) for t in trades]
+    n = len(trades)
+    # Gather raw per-trade columns, then do all arithmetic on whole arrays
+    col = lambda values: np.fromiter(values, dtype=np.float64, count=n)
+    n_out = col(len(t.players_out) for t in trades)
+    n_in = col(len(t.players_in) for t in trades)
+    sal_out = col(t.salary_out for t in trades) / 1e6
+    sal_in = col(t.salary_in for t in trades) / 1e6
+    ovr_out_max = col(_stat(t.players_out, "ovr", max) for t in trades)
+    ovr_in_max = col(_stat(t.players_in, "ovr", max) for t in trades)
+    ovr_out_mean = col(_stat(t.players_out, "ovr", np.mean) for t in trades)
+    ovr_in_mean = col(_stat(t.players_in, "ovr", np.mean) for t in trades)
+    pot_out_max = col(_stat(t.players_out, "pot", max) for t in trades)
+    pot_in_max = col(_stat(t.players_in, "pot", max) for t in trades)
+    age_out = col(_stat(t.players_out, "age", np.mean) for t in trades)
+    age_in = col(_stat(t.players_in, "age", np.mean) for t in trades)
+    picks = np.array([[sum(pk.round == r for pk in side) for side in (t.picks_out, t.picks_in) for r in (1, 2)]
+                      for t in trades], dtype=np.float64).reshape(n, 4)
+    nan = lambda v: np.nan if v is None else v
+    payroll_before = col(nan(t.payroll_before) for t in trades) / 1e6
+    payroll_after = col(nan(t.payroll_after) for t in trades) / 1e6
+    cap = col(nan(t.salary_cap) for t in trades) / 1e6
+    team_before = col(nan(t.ovr_before) for t in trades)
+    team_after = col(nan(t.ovr_after) for t in trades)
+
+    players_with_ratings = np.isfinite(np.c_[ovr_out_max, ovr_in_max])
+    has_players = np.c_[n_out, n_in] > 0
+    missing_ratings = (has_players & ~players_with_ratings).any(axis=1)
+    missing_payroll = ~np.isfinite(payroll_after)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(sal_out > 0, sal_in / sal_out, 0.0)
+    X = np.column_stack([
+        n_out, n_in,
+        sal_out, sal_in, sal_in - sal_out, ratio,
+        ovr_out_max, ovr_in_max, ovr_out_mean, ovr_in_mean, ovr_in_max - ovr_out_max,
+        pot_out_max, pot_in_max,
+        age_out, age_in, age_in - age_out,
+        picks,
+        payroll_before, payroll_after, cap, payroll_after > cap, cap - payroll_after,
+        team_before, team_after, team_after - team_before,
+        missing_ratings, missing_payroll,
+    ]).astype(np.float64)
+    # Missing values become 0; the missing_* indicators let the model tell them apart
+    return np.nan_to_num(X, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def build_structured_pipeline(C: float = 1.0):
+    """Featurizer -> scaler -> logistic regression; a few dozen weights instead of a vocabulary."""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import FunctionTransformer, StandardScaler
+
+    return Pipeline([
+        ("features", FunctionTransformer(featurize)),
+        ("scale", StandardScaler()),
+        ("lr", LogisticRegression(max_iter=1000, C=C)),
+    ])
+
+
+###############################################################################
+# Self-check: python trade_model.py
+###############################################################################
+SAMPLE_TRADES = [
+    Trade(players_out=[TradePlayer(name="Jalen Carter", salary=30e6)],
+          players_in=[TradePlayer(name="Marcus Reed", salary=45e6)],
+          payroll_after=150e6, salary_cap=140.59e6, ovr_before=52, ovr_after=54),
+    Trade(players_out=[TradePlayer(name="Devon Hall", salary=12.5e6), TradePlayer(name="Ty Brooks", salary=1.75e6)],
+          picks_in=[TradePick(season=2026, round=1), TradePick(season=2027, round=2)],
+          payroll_after=98.4e6, salary_cap=140.59e6),
+    Trade(picks_out=[TradePick(season=2025, round=2)], players_in=[TradePlayer(name="Omar Diaz", salary=0.9e6)]),
+]
+
+
+def check_round_trip(trades: Sequence[Trade] = SAMPLE_TRADES) -> None:
+    """to_text() -> parse_trade_text() must give back every field the text carries."""
+    carried = {"team", "other_team", "payroll_before"}  # names and the derived payroll are not in the text
+    for trade in trades:
+        parsed = parse_trade_text(trade.to_text())
+        assert parsed.model_dump(exclude=carried) == trade.model_dump(exclude=carried), (trade.to_text(), parsed)
+        if trade.payroll_after is not None:
+            assert parsed.payroll_before == trade.payroll_after - trade.salary_in + trade.salary_out
+
+
+if __name__ == "__main__":
+    check_round_trip()
+    print(f"{len(SAMPLE_TRADES)} trades round-trip through to_text() / parse_trade_text()")
@@ -0,0 +1,167 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from league_export import ROSTER_LIMIT
+from trade_model import Trade, _as_trade
+
+logger = logging.getLogger(__name__)
+
+# Basketball GM defaults, overridden by the league's gameAttributes when a snapshot is available
+SALARY_MATCH = 1.25  # over-the-cap teams may take back 125% of outgoing salary...
+SALARY_MATCH_BUFFER = 100_000.0  # ...plus $100k
+MIN_ROSTER = 13
+MAX_ROSTER = ROSTER_LIMIT
+
+
+class TradeRules:
+    """League trade rules plus what is known about each team's payroll and roster.
+
+    Payrolls and roster sizes are keyed by team name ("Region Name" and
+    abbreviation) so both sides of a trade can be checked. Anything unknown
+    is treated as passing: the prefilter only rejects trades it can prove
+    illegal and leaves the rest to the reward model.
+    """
+
+    def __init__(self, salary_cap: Optional[float] = None, cap_type: str = "soft",
+                 salary_match: float = SALARY_MATCH, salary_match_buffer: float = SALARY_MATCH_BUFFER,
+                 min_roster: int = MIN_ROSTER, max_roster: int = MAX_ROSTER, user_team: str = "",
+                 payrolls: Optional[Dict[str, float]] = None, roster_sizes: Optional[Dict[str, int]] = None):
+        self.salary_cap = salary_cap
+        self.cap_type = cap_type
+        self.salary_match = salary_match
+        self.salary_match_buffer = salary_match_buffer
+        self.min_roster = min_roster
+        self.max_roster = max_roster
+        self.user_team = user_team
+        self.payrolls = payrolls or {}
+        self.roster_sizes = roster_sizes or {}
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "TradeRules":
+        """Rules and every team's payroll / roster size from a league_export.LeagueSnapshot."""
+        attrs = snapshot.game_attributes
+        match = attrs.get("salaryCapTradeSalaryMatch")
+        payrolls, roster_sizes, user_team = {}, {}, ""
+        for team in snapshot.teams():
+            full = f"{team.region} {team.name}".strip()
+            payroll, size = snapshot.payroll(team.tid), len(snapshot.roster(team.tid))
+            for key in (full, team.abbrev):
+                if key:
+                    payrolls[key], roster_sizes[key] = payroll, size
+            if team.tid == snapshot.user_tid:
+                user_team = full
+        return cls(
+            salary_cap=snapshot.salary_cap,
+            cap_type=attrs.get("salaryCapType", "soft"),
+            salary_match=match / 100.0 if match else SALARY_MATCH,
+            min_roster=attrs.get("minRosterSize", MIN_ROSTER),
+            max_roster=attrs.get("maxRosterSize", MAX_ROSTER),
+            user_team=user_team,
+            payrolls=payrolls,
+            roster_sizes=roster_sizes,
+        )
+
+    def lookup(self, table: Dict[str, Any], team: str) -> float:
+        value = table.get(team or self.user_team)
+        return np.nan if value is None else float(value)
+
+
+class LegalityReport:
+    """Per-trade verdicts from check_trades()."""
+
+    def __init__(self, legal: np.ndarray, reasons: List[List[str]]):
+        self.legal = legal
+        self.reasons = reasons
+
+    def __len__(self):
+        return len(self.legal)
+
+    @property
+    def illegal_count(self) -> int:
+        return int((~self.legal).sum())
+
+
+def _side_arrays(trades: List[Trade], rules: TradeRules) -> Dict[str, np.ndarray]:
+    """(2, n) arrays: row 0 is the user's team, row 1 the other team, which receives what we send."""
+    n = len(trades)
+    a = {k: np.full((2, n), np.nan) for k in ("salary_out", "salary_in", "count_out", "count_in",
+                                              "payroll_before", "payroll_after", "roster_before")}
+    for i, t in enumerate(trades):
+        out, inc = t.salary_out, t.salary_in
+        a["salary_out"][:, i] = (out, inc)
+        a["salary_in"][:, i] = (inc, out)
+        a["count_out"][:, i] = (len(t.players_out), len(t.players_in))
+        a["count_in"][:, i] = (len(t.players_in), len(t.players_out))
+        a["payroll_before"][:, i] = (t.payroll_before if t.payroll_before is not None
+                                     else rules.lookup(rules.payrolls, t.team),
+                                     rules.lookup(rules.payrolls, t.other_team) if t.other_team else np.nan)
+        a["payroll_after"][0, i] = t.payroll_after if t.payroll_after is not None else np.nan
+        a["roster_before"][:, i] = (rules.lookup(rules.roster_sizes, t.team),
+                                    rules.lookup(rules.roster_sizes, t.other_team) if t.other_team else np.nan)
+    # payroll after = before + incoming - outgoing wherever the page did not state it
+    derived = a["payroll_before"] + a["salary_in"] - a["salary_out"]
+    a["payroll_after"] = np.where(np.isnan(a["payroll_after"]), derived, a["payroll_after"])
+    a["cap"] = np.array([[t.salary_cap if t.salary_cap is not None else
+                          (rules.salary_cap if rules.salary_cap is not None else np.nan) for t in trades]] * 2)
+    return a
+
+
+def check_trades(trades: Sequence[Any], rules: Optional[TradeRules] = None) -> LegalityReport:
+    """Check a batch of trades against salary matching, roster size and hard-cap rules in one pass.
+
+    Accepts Trade objects, dicts or trade text (parsed with parse_trade_text).
+    NaN comparisons are False, so a rule only fails when its inputs are known.
+    """
+    rules = rules or TradeRules()
+    trades = [_as_trade(t) for t in trades]
+    if not trades:
+        return LegalityReport(np.ones(0, dtype=bool), [])
+    a = _side_arrays(trades, rules)
+
+    with np.errstate(invalid="ignore"):
+        over_cap = a["payroll_after"] > a["cap"]
+        takes_back_more = a["salary_in"] > a["salary_out"]
+        failures = {}
+        if rules.cap_type == "soft":
+            limit = rules.salary_match * a["salary_out"] + rules.salary_match_buffer
+            failures["over the cap and taking back more than {:.0%} of outgoing salary".format(rules.salary_match)] = \
+                over_cap & (a["salary_in"] > limit)
+        elif rules.cap_type == "hard":
+            failures["over the hard cap after the trade"] = over_cap & takes_back_more
+        roster_after = a["roster_before"] + a["count_in"] - a["count_out"]
+        failures[f"over the maximum roster size ({rules.max_roster})"] = roster_after > rules.max_roster
+        failures[f"under the minimum roster size ({rules.min_roster})"] = \
+            (roster_after < rules.min_roster) & (a["count_out"] > a["count_in"])
+
+    illegal = np.zeros(len(trades), dtype=bool)
+    for mask in failures.values():
+        illegal |= mask.any(axis=0)
+    reasons = [[] for _ in trades]
+    for i in np.flatnonzero(illegal):
+        t = trades[i]
+        for message, mask in failures.items():
+            for side, team in enumerate((t.team or rules.user_team or "Your team", t.other_team or "Other team")):
+                if mask[side, i]:
+                    reasons[i].append(f"{team} {message}")
+    return LegalityReport(~illegal, reasons)
+
+
+if __name__ == "__main__":
+    # python trade_rules.py: verdicts must not change when a trade goes through its summary text
+    from trade_model import SAMPLE_TRADES, parse_trade_summary, parse_trade_text
+
+    trades = list(SAMPLE_TRADES)
+    texts = [t.to_text() for t in trades]
+    # the trade page lays each team's side out with its own payroll and cap lines
+    summary = ("Boston Celtics trade away:\n- Jalen Carter ($30.00M)\n"
+               "Payroll after trade: $150.00M\nSalary cap: $140.59M\nTeam ovr: 52 ⇒ 54\n"
+               "Chicago Bulls trade away:\n- Marcus Reed ($45.00M)\n"
+               "Payroll after trade: $120.00M\nSalary cap: $140.59M")
+    expected = check_trades(trades).legal
+    assert not expected[0], "over the cap, taking back $45M for $30M must be illegal"
+    assert (check_trades(texts).legal == expected).all()
+    assert (check_trades([parse_trade_text(t) for t in texts]).legal == expected).all()
+    assert not check_trades([parse_trade_summary(summary)]).legal[0]
+    print(f"{len(trades)} trades: same verdicts from Trade objects, to_text() and the trade page summary")
@@ -1,58 +1,220 @@
-import re, json, joblib, pathlib
+import os, re, json, time, pickle, joblib, pathlib, argparse
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV, RandomizedSearchCV
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 
+from feedback_store import DEFAULT_STORE_PATH, get_store, parse_text_feedback
+from compact_reward import compact_path_for, export, load_compact, max_difference
+from trade_model import DEFAULT_STRUCTURED_MODEL_PATH, build_structured_pipeline, parse_trade_text
+
 ###############################################################################
-# 1) Load & parse your feedback dataset
+# 1) Load your feedback dataset
 ###############################################################################
-RAW_FILE = pathlib.Path("trade_feedback.txt").read_text()
+def load_records(path=DEFAULT_STORE_PATH, labelled_only=False, since=None, until=None):
+    """Stream labelled trades from the feedback store (importing trade_feedback.txt on first use)."""
+    if path.endswith(".txt"):
+        # legacy text file: parse it through the store's importer format without touching the DB
+        feedback = parse_text_feedback(pathlib.Path(path).read_text())
+    else:
+        feedback = get_store(path).iter_records(since=since, until=until, labelled_only=labelled_only)
 
-# --- split on the header line you saw ("=== Trade Evaluation ... ===") ----------
-blocks = [b.strip() for b in re.split(r"=== Trade Evaluation .*? ===", RAW_FILE) if b.strip()]
-records = []
-for b in blocks:
-    # a) full natural-language description (state + action)
-    description = b.split("AI Decision")[0].strip()
-    
-    # b) human label (yes = good trade, no = bad trade) --------------------------
-    m = re.search(r"User Feedback:\s*(yes|no)", b, re.I)
-    label = 1 if (m and m.group(1).lower() == "yes") else 0
-    
-    records.append({"text": description, "label": label})
+    records = []
+    for r in feedback:
+        if labelled_only and r.label is None:
+            continue
+        # human label (yes = good trade, anything else = bad trade) ------------------
+        records.append({"text": r.trade_text, "label": r.label or 0})
 
-print(f"Parsed {len(records)} labelled trades.")
+    print(f"Parsed {len(records)} labelled trades.")
+    return records
 
 ###############################################################################
-# 2) Prepare data for ML
+# 2) Define pipelines
 ###############################################################################
-texts  = [r["text"]   for r in records]
-labels = [r["label"]  for r in records]
+def build_text_pipeline(memory=None):
+    """TF-IDF  →  LogisticRegression over the trade description text."""
+    return Pipeline([
+        ("tfidf", TfidfVectorizer(max_features=20_000,
+                                  ngram_range=(1,2),
+                                  stop_words="english")),
+        ("lr",    LogisticRegression(max_iter=400, C=3.0))
+    ], memory=memory)
+
+def prepare(records, features):
+    """Return (X, y) for the chosen feature set."""
+    if features == "structured":
+        # numeric features from the parsed Trade; unparseable descriptions are dropped
+        pairs = [(parse_trade_text(r["text"]), r["label"]) for r in records]
+        pairs = [(t, y) for t, y in pairs if not t.is_empty()]
+        print(f"Structured trades parsed: {len(pairs)} / {len(records)}")
+        return [t for t, _ in pairs], [y for _, y in pairs]
+    return [r["text"] for r in records], [r["label"] for r in records]
 
 ###############################################################################
-# 3) Define pipeline TF-IDF  →  LogisticRegression
+# 3) Train / evaluate quickly
 ###############################################################################
-clf = Pipeline([
-    ("tfidf", TfidfVectorizer(max_features=20_000,
-                              ngram_range=(1,2),
-                              stop_words="english")),
-    ("lr",    LogisticRegression(max_iter=400, C=3.0))
-])
+def train(X, y, clf):
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, stratify=y, random_state=42)
+
+    clf.fit(X_train, y_train)
+    print(f"Test accuracy  : {clf.score(X_test, y_test):.3f}")
+    print(f"5-fold CV mean : {cross_val_score(clf, X, y, cv=5).mean():.3f}")
+    return clf
 
 ###############################################################################
-# 4) Train / evaluate quickly
+# 3b) Hyperparameter search with a latency / size leaderboard
 ###############################################################################
-X_train, X_test, y_train, y_test = train_test_split(
-    texts, labels, test_size=0.2, stratify=labels, random_state=42)
+TEXT_SEARCH_GRID = {
+    "tfidf__max_features": [2_000, 5_000, 20_000, None],
+    "tfidf__ngram_range":  [(1,1), (1,2)],
+    "tfidf__min_df":       [1, 2],
+    "tfidf__sublinear_tf": [False, True],
+    "lr__C":               [0.3, 1.0, 3.0, 10.0],
+}
+STRUCTURED_SEARCH_GRID = {
+    "lr__C": [0.01, 0.1, 0.3, 1.0, 3.0, 10.0],
+}
+
+def measure(clf, X_sample, repeats=50):
+    """Single-trade p50 latency (ms), batched cost per trade (us) and pickled size (bytes)."""
+    single = []
+    for i in range(repeats):
+        x = [X_sample[i % len(X_sample)]]
+        t0 = time.perf_counter()
+        clf.predict_proba(x)
+        single.append(time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    clf.predict_proba(X_sample)
+    batch = time.perf_counter() - t0
+    return {
+        "predict_latency_ms": float(np.median(single) * 1e3),
+        "batch_us_per_trade": batch / len(X_sample) * 1e6,
+        "model_bytes":        len(pickle.dumps(clf)),
+    }
+
+def fold_scorer(clf, X_val, y_val):
+    """CV scorer: accuracy, plus the fold model's latency and size timed on that fold's held-out trades.
+
+    Every candidate is measured during cross-validation, so none has to be refitted just to be timed.
+    """
+    metrics = measure(clf, X_val)
+    metrics["accuracy"] = float(np.mean(clf.predict(X_val) == np.asarray(y_val)))
+    return metrics
+
+def pareto(rows):
+    """Flag candidates no other candidate beats on both accuracy and latency."""
+    for r in rows:
+        r["pareto"] = not any(
+            o["cv_accuracy"] >= r["cv_accuracy"] and o["predict_latency_ms"] <= r["predict_latency_ms"]
+            and (o["cv_accuracy"], o["predict_latency_ms"]) != (r["cv_accuracy"], r["predict_latency_ms"])
+            for o in rows)
+    return rows
 
-clf.fit(X_train, y_train)
-print(f"Test accuracy  : {clf.score(X_test, y_test):.3f}")
-print(f"5-fold CV mean : {cross_val_score(clf, texts, labels, cv=5).mean():.3f}")
+def search(X, y, features="text", n_iter=None, n_jobs=-1, cache_dir=".train_cache",
+           leaderboard_path="reward_leaderboard.json", max_latency_ms=None):
+    """Grid (or random, with n_iter) search on all cores; returns the chosen refitted model."""
+    # cached transformer fits: TF-IDF settings shared by several C values are fitted once per fold
+    memory = joblib.Memory(cache_dir, verbose=0)
+    if features == "structured":
+        base, grid = build_structured_pipeline(), STRUCTURED_SEARCH_GRID
+        base.set_params(memory=memory)
+    else:
+        base, grid = build_text_pipeline(memory=memory), TEXT_SEARCH_GRID
+    if n_iter:
+        searcher = RandomizedSearchCV(base, grid, n_iter=n_iter, cv=5, n_jobs=n_jobs, random_state=42,
+                                      scoring=fold_scorer, refit="accuracy")
+    else:
+        searcher = GridSearchCV(base, grid, cv=5, n_jobs=n_jobs, scoring=fold_scorer, refit="accuracy")
+    t0 = time.perf_counter()
+    searcher.fit(X, y)
+    print(f"Searched {len(searcher.cv_results_['params'])} candidates in {time.perf_counter() - t0:.1f}s")
+
+    # latencies are fold means on held-out trades; with n_jobs > 1 folds run side by side, so they rank
+    # candidates against each other rather than replace a quiet single-process benchmark (bench_reward.py)
+    res = searcher.cv_results_
+    rows = []
+    for i, params in enumerate(res["params"]):
+        rows.append({
+            "params":             {k: list(v) if isinstance(v, tuple) else v for k, v in params.items()},
+            "cv_accuracy":        float(res["mean_test_accuracy"][i]),
+            "cv_std":             float(res["std_test_accuracy"][i]),
+            "fit_time_s":         float(res["mean_fit_time"][i]),
+            "predict_latency_ms": float(res["mean_test_predict_latency_ms"][i]),
+            "batch_us_per_trade": float(res["mean_test_batch_us_per_trade"][i]),
+            "model_bytes":        int(res["mean_test_model_bytes"][i]),
+            "_params":            params,
+        })
+    rows = pareto(sorted(rows, key=lambda r: (-r["cv_accuracy"], r["predict_latency_ms"])))
+
+    with open(leaderboard_path, "w") as f:
+        json.dump([{k: v for k, v in r.items() if k != "_params"} for r in rows], f, indent=2)
+    print(f"{'acc':>6} {'fit s':>7} {'p50 ms':>7} {'us/trade':>9} {'bytes':>9}  params")
+    for r in rows[:10]:
+        print(f"{r['cv_accuracy']:6.3f} {r['fit_time_s']:7.3f} {r['predict_latency_ms']:7.3f} "
+              f"{r['batch_us_per_trade']:9.1f} {r['model_bytes']:9d}  {'*' if r['pareto'] else ' '} {r['params']}")
+    print(f"Leaderboard written to {leaderboard_path} (* = accuracy/latency Pareto front)")
+
+    eligible = [r for r in rows if max_latency_ms is None or r["predict_latency_ms"] <= max_latency_ms]
+    if not eligible:
+        raise SystemExit(f"No candidate under {max_latency_ms} ms")
+    chosen = eligible[0]["_params"]
+    if chosen == searcher.best_params_:
+        return searcher.best_estimator_
+    # a latency cap picked another candidate: refit just that one, reusing the cached transformer fits
+    return clone(base).set_params(**chosen).fit(X, y)
 
 ###############################################################################
-# 5) Save the reward model
+# 4) Save the reward model
 ###############################################################################
-joblib.dump(clf, "reward_model.pkl")
-print("Reward model saved to reward_model.pkl") 
\ No newline at end of file
+def save_model(clf, path):
+    # write to a temp file and rename so a running web2.py never loads a half-written pickle
+    joblib.dump(clf, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    print(f"Reward model saved to {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the trade reward model")
+    parser.add_argument("--features", choices=["text", "structured"], default="text",
+                        help="TF-IDF over the description, or numeric features from the parsed trade")
+    parser.add_argument("--data", default=DEFAULT_STORE_PATH,
+                        help="feedback store (.sqlite) or a legacy trade_feedback.txt")
+    parser.add_argument("--labelled-only", action="store_true",
+                        help="skip evaluations that never got yes/no feedback instead of treating them as bad")
+    parser.add_argument("--since", default=None, help="only use feedback at or after this timestamp")
+    parser.add_argument("--until", default=None, help="only use feedback before this timestamp")
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--search", action="store_true",
+                        help="hyperparameter search across all cores, writing a leaderboard")
+    parser.add_argument("--n-iter", type=int, default=None, help="random search with this many candidates")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--leaderboard", default="reward_leaderboard.json")
+    parser.add_argument("--max-latency-ms", type=float, default=None,
+                        help="save the most accurate candidate under this single-trade latency")
+    parser.add_argument("--compact", action="store_true",
+                        help="also export a NumPy-only .npz next to the pickle (see compact_reward.py)")
+    parser.add_argument("--prune", type=float, default=0.0,
+                        help="with --compact, drop vocabulary terms with |coef| at or below this")
+    args = parser.parse_args()
+
+    records = load_records(args.data, args.labelled_only, args.since, args.until)
+    X, y = prepare(records, args.features)
+    out = args.out or (DEFAULT_STRUCTURED_MODEL_PATH if args.features == "structured" else "reward_model.pkl")
+    if args.search:
+        clf = search(X, y, args.features, args.n_iter, args.n_jobs,
+                     leaderboard_path=args.leaderboard, max_latency_ms=args.max_latency_ms)
+    elif args.features == "structured":
+        clf = train(X, y, build_structured_pipeline())
+    else:
+        clf = train(X, y, build_text_pipeline())
+    save_model(clf, out)
+    if args.compact:
+        compact_path = export(clf, compact_path_for(out), prune=args.prune)
+        print(f"Compact model saved to {compact_path} "
+              f"(max probability difference {max_difference(clf, load_compact(compact_path), X):.2e})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import time
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from playwright.async_api import Page, Locator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10_000  # ms
+
+# Per-action timeouts (ms); simulations can legitimately take a long time
+ACTION_TIMEOUTS = {
+    "navigate": 10_000,
+    "negotiate": 10_000,
+    "propose_trade": 15_000,
+    "create_league": 120_000,
+    "simulate": 300_000,
+}
+
+# True once the game is idle: no spinner and no visible "Processing" button
+_NOT_PROCESSING_JS = """
+() => !document.querySelector(".spinner-border") &&
+      ![...document.querySelectorAll("button")].some(
+        (b) => b.offsetParent !== null && b.innerText.includes("Processing"))
+"""
+
+
+class WaitLog:
+    """Records how long each wait actually took, per action and signal."""
+
+    def __init__(self):
+        self.records: List[Dict] = []
+
+    def add(self, action: str, signal: str, elapsed: float, ok: bool) -> None:
+        self.records.append({"action": action, "signal": signal, "elapsed": elapsed, "ok": ok})
+        level = logging.DEBUG if ok else logging.WARNING
+        logger.log(level, f"wait {action}/{signal}: {elapsed * 1000:.0f} ms{'' if ok else ' (timed out)'}")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        by_action = defaultdict(list)
+        for r in self.records:
+            by_action[r["action"]].append(r)
+        return {
+            action: {
+                "count": len(rs),
+                "total_s": sum(r["elapsed"] for r in rs),
+                "max_s": max(r["elapsed"] for r in rs),
+                "timeouts": sum(not r["ok"] for r in rs),
+            }
+            for action, rs in by_action.items()
+        }
+
+
+wait_log = WaitLog()
+
+
+def _timeout_for(action: str, timeout: Optional[int]) -> int:
+    return timeout if timeout is not None else ACTION_TIMEOUTS.get(action, DEFAULT_TIMEOUT)
+
+
+async def _timed(action: str, signal: str, awaitable) -> bool:
+    start = time.perf_counter()
+    ok = True
+    try:
+        await awaitable
+    except Exception as e:
+        # A missed readiness signal is logged, not fatal; the next locator call auto-waits anyway
+        logger.debug(f"wait {action}/{signal} failed: {e}")
+        ok = False
+    wait_log.add(action, signal, time.perf_counter() - start, ok)
+    return ok
+
+
+async def wait_for_url_change(page: Page, old_url: str, action: str = "navigate", timeout: Optional[int] = None) -> bool:
+    return await _timed(action, "url", page.wait_for_url(lambda url: url != old_url, timeout=_timeout_for(action, timeout)))
+
+
+async def wait_for_visible(page: Page, selector: str, action: str = "navigate", timeout: Optional[int] = None) -> bool:
+    return await _timed(action, "visible", page.wait_for_selector(selector, state="visible", timeout=_timeout_for(action, timeout)))
+
+
+async def wait_for_network_idle(page: Page, action: str = "navigate", timeout: Optional[int] = None) -> bool:
+    return await _timed(action, "networkidle", page.wait_for_load_state("networkidle", timeout=_timeout_for(action, timeout)))
+
+
+async def wait_for_processing(page: Page, action: str = "simulate", timeout: Optional[int] = None) -> bool:
+    """Wait until the game's processing indicator has cleared."""
+    return await _timed(action, "processing", page.wait_for_function(_NOT_PROCESSING_JS, timeout=_timeout_for(action, timeout)))
+
+
+async def settle(page: Page, action: str, *, url_changed_from: Optional[str] = None, selector: Optional[str] = None,
+                 network_idle: bool = False, processing: bool = True, timeout: Optional[int] = None) -> bool:
+    """Wait on the concrete readiness signals that apply to an action, in order."""
+    ok = True
+    if url_changed_from is not None:
+        ok &= await wait_for_url_change(page, url_changed_from, action, timeout)
+    if network_idle:
+        ok &= await wait_for_network_idle(page, action, timeout)
+    if processing:
+        ok &= await wait_for_processing(page, action, timeout)
+    if selector is not None:
+        ok &= await wait_for_visible(page, selector, action, timeout)
+    return ok
+
+
+async def click_and_settle(page: Page, locator: Locator, action: str, *, expect_navigation: bool = False,
+                           selector: Optional[str] = None, timeout: Optional[int] = None) -> bool:
+    """Click, then wait for the action's readiness signals instead of a fixed sleep."""
+    old_url = page.url
+    await locator.click()
+    return await settle(page, action, url_changed_from=old_url if expect_navigation else None,
+                        selector=selector, timeout=timeout)
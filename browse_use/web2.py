@@ -1,18 +1,33 @@
 from langchain_openai import ChatOpenAI
-from browser_use import Agent, Controller, ActionResult
+from browser_use import Agent, Controller, ActionResult, BrowserSession
 from dotenv import load_dotenv
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from datetime import datetime
 import os
 from pathlib import Path
-from playwright.async_api import Page
-from openai import OpenAI
-import base64
+from playwright.async_api import Page, async_playwright
 import json
+import hashlib
 import logging
-import joblib
+import weakref
 import numpy as np
+from llm_pool import Priority, create_chat_completion, sdk_kwargs
+from extraction_cache import get_cache
+from extraction_cascade import cascade_json, cascade_text, same_fields, same_phase, validate_game_state, validate_season_state, validate_trade_text
+from page_watcher import PageWatcher
+from waits import settle, wait_for_processing, wait_log
+from dom_extract import NEGOTIATE_SELECTOR, TRADE_SUMMARY_SELECTOR, ROSTER_SUMMARY_SELECTOR, ROSTER_STATS_SELECTOR, PHASE_SELECTOR, extract_game_state_fields, validate_game_state_fields
+from league_export import LeagueExporter
+from league_setup import bootstrap_league
+from reward_registry import get_registry
+from feedback_store import get_store
+from trade_model import DEFAULT_STRUCTURED_MODEL_PATH, enrich_from_snapshot, parse_trade_page, parse_trade_summary
+from trade_rules import TradeRules, check_trades
+from counter_offer import apply_package, search_counter_offers
+import fast_browse
+import gm_config
+import league_snapshot
 #  more high level planning: first, extract team name, and then at end see who won to see how team does - index 35 i believe
 
 load_dotenv()
@@ -41,11 +56,25 @@ class PhaseManager:
     def __init__(self):
         self.current_phase = "trade_deadline"
         self.actions_remaining = 4  
+        self.phase_text = None  # Last navbar phase text pushed by the page watcher
+        self.first_move_of_phase = True  # Re-read team state on the next step
         self.logger = logging.getLogger(__name__)
 
+    def observe_phase(self, key: str, text: str) -> None:
+        """Page watcher listener: react to phase transitions as soon as the navbar changes"""
+        if key != "phase":
+            return
+        if self.phase_text is not None and text != self.phase_text:
+            self.logger.info(f"Phase changed: {self.phase_text!r} -> {text!r}")
+            self.first_move_of_phase = True  # Re-read team state in the new phase
+            if self.current_phase == "trade_deadline" and "playoffs" in text.lower():
+                # The game moved past the deadline without us, nothing left to spend
+                self.current_phase = "playoffs"
+                self.actions_remaining = 0
+        self.phase_text = text
+
     async def handle_phase_change(self, page: Page) -> None:
         """Handle phase transitions when actions are depleted"""
-        global first_move_of_phase
         if self.current_phase == "trade_deadline" and self.actions_remaining <= 0:
             # await evaluate_trade_proposals(page)
             self.logger.info("Trade deadline actions depleted, transitioning to playoffs")
@@ -55,10 +84,12 @@ class PhaseManager:
             try:
                 await page.get_by_role("button", name="Play", exact=True).click()
                 await page.get_by_role("button", name="Until playoffs").click()
+                await wait_for_processing(page, "simulate")
                 await page.get_by_role("button", name="Play", exact=True).click()
                 await page.get_by_role("button", name="Through playoffs").click()
+                await wait_for_processing(page, "simulate")
                 await page.get_by_role("button", name="Play", exact=True).click()
-                first_move_of_phase = True  # Reset for the new phase
+                self.first_move_of_phase = True  # Reset for the new phase
 
             except Exception as e:
                 self.logger.error(f"Error during phase transition: {str(e)}")
@@ -77,23 +108,84 @@ class PhaseManager:
         self.logger.info(f"No actions remaining in {self.current_phase}")
         return False
 
-# Global state variables
-initialized = False
-game_state = None
-phase_manager = PhaseManager()
-first_move_of_phase = True
+# GM_BATCH_TRADES=1 scores all proposals in one pass instead of negotiating them one by one
+BATCH_TRADE_EVALUATION = os.getenv("GM_BATCH_TRADES", "0") == "1"
+
+# Ask the human to label each evaluated trade; labels update the online reward model immediately
+ASK_TRADE_FEEDBACK = os.getenv("GM_ASK_TRADE_FEEDBACK", "0") == "1"
+# Set to reward_model_online.pkl to score with the continuously updated model.
+# A compact .npz export next to the pickle (compact_reward.py) is used whenever it is the newer file.
+REWARD_MODEL_PATH = os.getenv("GM_REWARD_MODEL", "reward_model.pkl")
+
+class LeagueSession:
+    """Everything one league's agent loop mutates: bootstrap flag, phase bookkeeping and page caches.
+
+    Sessions are looked up from the page's browser context (session_for), so
+    the hooks, actions and trade helpers below serve any number of leagues
+    running side by side in one process (multi_league.py). A plain
+    `python web2.py` run uses default_session.
+    """
+
+    def __init__(self, name: str = "default", snapshot_path: Optional[str] = league_snapshot.LEAGUE_SNAPSHOT):
+        self.name = name
+        self.initialized = False
+        self.game_state = None
+        self.phase_manager = PhaseManager()
+        self.page_watcher = PageWatcher()
+        self.page_watcher.add_listener(self.phase_manager.observe_phase)
+        self.league_exporter = LeagueExporter()
+        # Proposals already scored, so the outer retry loop never evaluates the same offer twice
+        self.evaluated_proposals = set()
+        self.trades_made = 0
+        self.snapshot_path = snapshot_path
+        self.snapshot_sha256 = None  # checkpoint the league was restored from, if any
+
+_sessions = weakref.WeakKeyDictionary()  # browser context -> LeagueSession
+default_session = LeagueSession()
+
+def bind_session(context, session: LeagueSession) -> None:
+    """Route every page of a browser context to session."""
+    _sessions[context] = session
+
+def session_for(page) -> LeagueSession:
+    return _sessions.get(page.context, default_session)
+
+# Shared by every league in the process
+reward_registry = get_registry(REWARD_MODEL_PATH)
+feedback_store = get_store()
+structured_registry = get_registry(DEFAULT_STRUCTURED_MODEL_PATH)  # used when train_reward.py --features structured has run
+_online_model = None
+
+def online_model():
+    """The online reward model, loaded on the first label so runs without feedback never import sklearn."""
+    global _online_model
+    if _online_model is None:
+        from online_reward import OnlineRewardModel
+        _online_model = OnlineRewardModel.load_or_create()
+    return _online_model
 
 controller = Controller()
 
 #helper function for state extraction
+async def parse_game_state(page) -> GameState:
+    """Read the roster summary from the DOM or league database, using the vision model only as a fallback."""
+    fields = await extract_game_state_fields(page)
+    if fields is not None:
+        return GameState(**fields)
+    # Next best: the league database behind the page
+    try:
+        snapshot = await session_for(page).league_exporter.export(page)
+        fields = snapshot.game_state_fields()
+        if validate_game_state_fields(fields):
+            return GameState(**fields)
+    except Exception as e:
+        logger.info(f"League export unavailable, falling back to vision: {e}")
+    return await parse_game_state_with_openai(page)
+
 async def parse_game_state_with_openai(page) -> GameState:
-    element = page.locator("#actual-actual-content > div.d-sm-flex.mb-3 > div.d-flex > div:nth-child(2)")
+    element = page.locator(ROSTER_STATS_SELECTOR)
     screenshot = await element.screenshot()
     
-    base64_image = base64.b64encode(screenshot).decode("utf-8")
-    
-    client = OpenAI()
-    
     prompt = """
     You are an OCR and information extraction agent. Extract the following fields from the image and output as JSON:
     {
@@ -109,32 +201,14 @@ async def parse_game_state_with_openai(page) -> GameState:
     If a field is missing, use an empty string.
     """
     
-    # Call OpenAI API with the new format
-    response = client.responses.create(
-        model="gpt-4.1",
-        input=[
-            {
-                "role": "user",
-                "content": [
-                    {"type": "input_text", "text": prompt},
-                    {
-                        "type": "input_image",
-                        "image_url": f"data:image/png;base64,{base64_image}"
-                    }
-                ]
-            }
-        ]
-    )
-    
-    state_dict = json.loads(response.output_text)
+    # small model first, gpt-4.1 only when its answer fails the sanity checks
+    state_dict = await cascade_json("game_state", prompt, screenshot, validate_game_state, same=same_fields)
     return GameState(**state_dict)
 
 async def parse_season_state_with_openai(page) -> SeasonState:
     # Use the selector you suggested, or fallback to a screenshot of the area if needed
-    element = page.locator("#content > nav > div > div.dropdown-links.navbar-nav.flex-shrink-1.overflow-hidden.text-nowrap > div > a")
+    element = page.locator(PHASE_SELECTOR)
     screenshot = await element.screenshot()
-    base64_image = base64.b64encode(screenshot).decode("utf-8")
-    client = OpenAI()
     prompt = (
         "You are an OCR and information extraction agent. "
         "Extract the current phase of the basketball season from the image and output as JSON:\n"
@@ -143,35 +217,33 @@ async def parse_season_state_with_openai(page) -> SeasonState:
         "The 'comments' field should include any additional context, such as if the phase is preseason, playoffs, draft, etc., or if the text is unclear. "
         "If you cannot determine the phase, use an empty string."
     )
-    response = client.responses.create(
-        model="gpt-4.1",
-        input=[
-            {
-                "role": "user",
-                "content": [
-                    {"type": "input_text", "text": prompt},
-                    {
-                        "type": "input_image",
-                        "image_url": f"data:image/png;base64,{base64_image}"
-                    }
-                ]
-            }
-        ]
-    )
-    state_dict = json.loads(response.output_text)
+    state_dict = await cascade_json("season_state", prompt, screenshot, validate_season_state,
+                                    priority=Priority.PHASE, same=same_phase)
     return SeasonState(**state_dict)
 
 
-@controller.action('Ask human for help with a question AT THE BEGINNING OF EACH PHASE for guidance.', domains=['https://play.basketball-gm.com'])   # pass allowed_domains= or page_filter= to limit actions to certain pages
+async def get_season_state(page) -> SeasonState:
+    """Season phase, re-extracted only when the watcher saw the navbar change."""
+    page_watcher = session_for(page).page_watcher
+    await page_watcher.flush(page)
+    season_state = page_watcher.cached("phase")
+    if season_state is None:
+        version = page_watcher.version("phase")
+        season_state = await parse_season_state_with_openai(page)
+        page_watcher.store("phase", season_state, version)
+    return season_state
+
+
+@controller.action('Ask human for help with a question AT THE BEGINNING OF EACH PHASE for guidance.', domains=gm_config.GAME_DOMAINS)   # pass allowed_domains= or page_filter= to limit actions to certain pages
 def ask_human(question: str) -> ActionResult:
     answer = input(f'{question} > ')
     return ActionResult(extracted_content=f'The human responded with: {answer}', include_in_memory=True)
 
-@controller.action('Ask LLM for guidance at the beginning of each phase.', domains=['https://play.basketball-gm.com'])
-def ask_llm(question: str) -> ActionResult:
-    client = OpenAI()
-    response = client.chat.completions.create(
+@controller.action('Ask LLM for guidance at the beginning of each phase.', domains=gm_config.GAME_DOMAINS)
+async def ask_llm(question: str) -> ActionResult:
+    response = await create_chat_completion(
         model="gpt-4",
+        priority=Priority.ADVISORY,
         messages=[
             {"role": "system", "content": "You are an expert basketball team manager. Provide strategic guidance based on the current situation."},
             {"role": "user", "content": question}
@@ -180,35 +252,67 @@ def ask_llm(question: str) -> ActionResult:
     answer = response.choices[0].message.content
     return ActionResult(extracted_content=f'The LLM responded with: {answer}', include_in_memory=True)
 
+@controller.action('Search trade packages with another team (full name or abbreviation) and propose the best one as a counter offer.', domains=gm_config.GAME_DOMAINS)
+async def propose_counter_offer(team: str, browser_session: BrowserSession) -> ActionResult:
+    page = await browser_session.get_current_page()
+    session = session_for(page)
+    snapshot = await session.league_exporter.export(page)
+    wanted = team.strip().lower()
+    other = next((t for t in snapshot.teams() if t.tid != snapshot.user_tid and wanted in
+                  (f"{t.region} {t.name}".lower(), t.name.lower(), t.abbrev.lower())), None)
+    if other is None:
+        return ActionResult(extracted_content=f'No other team called {team}', include_in_memory=True)
+
+    packages = search_counter_offers(snapshot, other.tid, score_trades, top_k=3)
+    if not packages:
+        return ActionResult(extracted_content=f'No legal package found with the {other.region} {other.name}', include_in_memory=True)
+    best = packages[0]
+    # keep our most valuable players that are not in the package out of the AI's own counter offers
+    sent = {a.name for a in best.assets_out}
+    protect = [p.name for p in snapshot.roster() if p.name not in sent][:2]
+
+    await page.goto(gm_config.url(f"/l/{snapshot.lid}/trade"))
+    await settle(page, "navigate", selector=TRADE_SUMMARY_SELECTOR)
+    await apply_package(page, best, other.tid, protect=protect)
+    await page.get_by_role("button", name="Propose trade").click()
+    await settle(page, "propose_trade")
+    session.trades_made += 1
+    await log_trade_evaluation(best.trade.to_text(), "PROPOSE", best.score, trade=best.trade)
+    others = "\n".join(p.describe() for p in packages[1:])
+    return ActionResult(extracted_content=f'Proposed: {best.describe()}\nOther candidates:\n{others}', include_in_memory=True)
+
+async def start_league(page):
+    """Bootstrap the session's league, remembering the checkpoint it was restored from."""
+    session = session_for(page)
+    checkpoint = await bootstrap_league(page, session.snapshot_path)
+    if checkpoint is not None:
+        session.snapshot_sha256 = checkpoint.sha256
+
 async def state_hook(agent: Agent):
-    global initialized, game_state, first_move_of_phase
     page = await agent.browser_session.get_current_page()
-    if not initialized:
-        await page.goto("https://play.basketball-gm.com/")
-        await page.get_by_role("link", name="New league » Real players").click()
-        await page.get_by_role("button", name="Random").nth(1).click()
-        await page.get_by_role("button", name="Create League Processing").click()
-        await page.get_by_role("button", name="Play", exact=True).click()
-        await page.get_by_role("button", name="Until regular season").click()
-        await page.get_by_role("button", name="Play", exact=True).click()
-        await page.get_by_role("button", name="Until trade deadline").click()
-        initialized = True
-
-    if first_move_of_phase:
-        await page.get_by_role("link", name="Roster", exact=True).click()
-        game_state = await parse_game_state_with_openai(page)
-        first_move_of_phase = False  # Set to False after first move
+    session = session_for(page)
+    if not session.initialized:
+        await start_league(page)
+        session.initialized = True
+
+    await session.page_watcher.install(page)
+
+    if session.phase_manager.first_move_of_phase:
+        session.phase_manager.first_move_of_phase = False  # Set to False after first move
         return await get_state(agent)
     else:
         return None
 
 async def router_hook(agent: Agent):
-    global game_state, initialized, phase_manager, first_move_of_phase
     page = await agent.browser_session.get_current_page()
+    session = session_for(page)
+    phase_manager = session.phase_manager
 
     try:
-        season_state = await parse_season_state_with_openai(page)
-        logger.info(f"Current season phase: {season_state.phase} | Comments: {season_state.comments}")
+        season_state = await get_season_state(page)
+        logger.info(f"[{session.name}] Current season phase: {season_state.phase} | Comments: {season_state.comments}")
+        logger.info(f"Extraction cache: {get_cache().stats()}")
+        logger.info(f"Wait timings: {wait_log.summary()}")
 
         # Handle phase changes
         await phase_manager.handle_phase_change(page)
@@ -219,19 +323,12 @@ async def router_hook(agent: Agent):
         if not phase_manager.decrement_counter():
             logger.info(f"No actions left in phase {season_state.phase}. Please transition to the next phase.")
 
-        if not initialized:
-            await page.goto("https://play.basketball-gm.com/")
-            await page.get_by_role("link", name="New league » Real players").click()
-            await page.get_by_role("button", name="Random").nth(1).click()
-            await page.get_by_role("button", name="Create League Processing").click()
-            await page.get_by_role("button", name="Play", exact=True).click()
-            await page.get_by_role("button", name="Until regular season").click()
-            await page.get_by_role("button", name="Play", exact=True).click()
-            await page.get_by_role("button", name="Until trade deadline").click()
-            initialized = True
+        if not session.initialized:
+            await start_league(page)
+            session.initialized = True
 
         # Only get state if first_move_of_phase is True
-        if first_move_of_phase:
+        if phase_manager.first_move_of_phase:
             state_result = await get_state(agent)
             combined_content = json.dumps({
                 "season_phase": season_state.phase,
@@ -247,17 +344,26 @@ async def router_hook(agent: Agent):
         raise
 
 async def get_state(agent: Agent):
-    global game_state
     page = await agent.browser_session.get_current_page() 
+    session = session_for(page)
+    page_watcher = session.page_watcher
     try:
         await page.get_by_role("link", name="Roster", exact=True).click()
-        game_state = await parse_game_state_with_openai(page)
+        await page.locator(ROSTER_SUMMARY_SELECTOR).first.wait_for(state="visible", timeout=5000)
+        await page_watcher.flush(page)
+        # Only re-extract when the roster panel changed since the last extraction
+        game_state = page_watcher.cached("roster")
+        if game_state is None:
+            version = page_watcher.version("roster")
+            game_state = await parse_game_state(page)
+            page_watcher.store("roster", game_state, version)
+        session.game_state = game_state
         state_json = game_state.model_dump_json()
         print(state_json)
         return ActionResult(extracted_content=state_json)
 
     except Exception as e:
-        game_state = GameState(
+        session.game_state = GameState(
             record="0-0",
             team_rating="0",
             average_mov="0.0",
@@ -267,19 +373,72 @@ async def get_state(agent: Agent):
             salary_cap="0.0",
             profit="0.0"
         )
-        state_json = game_state.model_dump_json()
+        state_json = session.game_state.model_dump_json()
         return ActionResult(extracted_content=state_json)
 
+def current_trade_rules(page):
+    """Trade rules for the page's league as of its last export, or Basketball GM defaults before the first one."""
+    snapshot = session_for(page).league_exporter.snapshot
+    return TradeRules.from_snapshot(snapshot) if snapshot is not None else TradeRules()
+
+async def refresh_league_export(page):
+    """Re-export the page's league (unchanged stores are not re-sent), or keep the last snapshot if that fails."""
+    league_exporter = session_for(page).league_exporter
+    try:
+        return await league_exporter.export(page)
+    except Exception as e:
+        logger.debug(f"League export unavailable: {e}")
+        return league_exporter.snapshot
+
+async def parse_current_trade(page):
+    return await parse_trade_page(page, await refresh_league_export(page))
+
+async def reject_if_illegal(page, trade):
+    """REJECT trades that break salary matching / roster / cap rules without any model or LLM call."""
+    report = check_trades([trade], current_trade_rules(page))
+    if report.legal[0]:
+        return None
+    print(f"Rejecting illegal trade: {'; '.join(report.reasons[0])}")
+    await log_trade_evaluation(trade.to_text(), "REJECT", 1.0, trade=trade, model_version="rules")
+    return "REJECT", 1.0
+
+async def evaluate_trade_structured(page, trade=None):
+    """Score the trade parsed straight from the DOM with the numeric-feature model; no LLM call."""
+    if trade is None:
+        trade = await parse_current_trade(page)
+    if trade.is_empty():
+        return None
+    prob = structured_registry.score([trade])[0]
+    decision = "ACCEPT" if prob > 0.5 else "REJECT"
+    confidence = abs(prob - 0.5) * 2  # Scale to 0-1 range
+    await log_trade_evaluation(trade.to_text(), decision, confidence, trade=trade, registry=structured_registry)
+    return decision, confidence
+
 async def evaluate_trade_logic(page):
     """Evaluate trade using GPT for extraction and reward model for decision."""
+    trade = None
+    try:
+        trade = await parse_current_trade(page)
+        verdict = await reject_if_illegal(page, trade)
+        if verdict is not None:
+            return verdict
+    except Exception as e:
+        logger.debug(f"Trade rules prefilter skipped: {e}")
+
+    if structured_registry.exists():
+        try:
+            result = await evaluate_trade_structured(page, trade)
+            if result is not None:
+                return result
+        except Exception as e:
+            logger.warning(f"Structured trade evaluation failed, falling back to vision: {e}")
+
     # Take screenshot of the trade proposal
-    element = page.locator("#actual-actual-content > div > div.col-md-3 > div")
+    element = page.locator(TRADE_SUMMARY_SELECTOR)
     await element.wait_for(state="visible", timeout=5000)
     screenshot = await element.screenshot()
-    base64_image = base64.b64encode(screenshot).decode("utf-8")
 
     # Use GPT to extract and format trade information
-    client = OpenAI()
     prompt = """Extract the trade information from the image and format it exactly like this:
     Trade Proposal:
     Team A receives:
@@ -297,38 +456,17 @@ async def evaluate_trade_logic(page):
     
     Make sure to include all players, picks, and salary information in this exact format."""
     
-    response = client.responses.create(
-        model="gpt-4.1",
-        input=[
-            {
-                "role": "user",
-                "content": [
-                    {"type": "input_text", "text": prompt},
-                    {"type": "input_image", "image_url": f"data:image/png;base64,{base64_image}"}
-                ]
-            }
-        ]
-    )
-    
-    formatted_trade = response.output_text.strip()
+    formatted_trade = await cascade_text("trade_summary", prompt, screenshot, validate_trade_text)
     
     # Use reward model to make decision
     try:
-        model = joblib.load("reward_model.pkl")
-        prob = model.predict_proba([formatted_trade])[0][1]
+        prob = reward_registry.score([formatted_trade])[0]
         
         # Make decision based on probability threshold
         decision = "ACCEPT" if prob > 0.5 else "REJECT"
         confidence = abs(prob - 0.5) * 2  # Scale to 0-1 range
         
-        # Save trade data with timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open("trade_feedback.txt", "a") as f:
-            f.write(f"\n=== Trade Evaluation {timestamp} ===\n")
-            f.write(f"Trade Information:\n{formatted_trade}\n")
-            f.write(f"AI Decision: {decision}\n")
-            f.write(f"Confidence: {confidence:.2f}\n")
-            f.write("=" * 50 + "\n")
+        await log_trade_evaluation(formatted_trade, decision, confidence)
         
         return decision, confidence
         
@@ -336,30 +474,176 @@ async def evaluate_trade_logic(page):
         print(f"Error using reward model: {e}")
         return "REJECT", 0.0  # Default to reject if model fails
 
+async def log_trade_evaluation(trade_info, decision, confidence, trade=None, registry=None, user_feedback=None,
+                               model_version=None):
+    """Record the evaluation in the feedback store without blocking the event loop."""
+    registry = registry or reward_registry
+    if model_version is None and registry.current:
+        model_version = registry.current.version
+    if user_feedback is None and ASK_TRADE_FEEDBACK:
+        user_feedback = await get_user_feedback()
+    await feedback_store.add_async(
+        trade_info,
+        ai_decision=decision,
+        confidence=round(float(confidence), 4),
+        user_feedback=user_feedback,
+        trade_json=trade.model_dump_json() if trade is not None else None,
+        model_version=model_version,
+    )
+    if user_feedback in ("yes", "no"):
+        await online_model().sync_async(feedback_store)
+
 async def get_user_feedback():
     """Get user feedback on the trade decision."""
     while True:
-        feedback = input("\nDo you agree with this decision? (yes/no/skip): ").lower()
+        feedback = (await asyncio.to_thread(input, "\nDo you agree with this decision? (yes/no/skip): ")).lower()
         if feedback in ['yes', 'no', 'skip']:
             return feedback
         print("Please enter 'yes', 'no', or 'skip'")
 
-async def save_trade_data(trade_info, ai_decision, user_feedback, filename="trade_feedback.txt"):
-    """Save trade information, AI decision, and user feedback to a file."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    with open(filename, "a") as f:
-        f.write(f"\n=== Trade Evaluation {timestamp} ===\n")
-        f.write(f"Trade Information:\n{trade_info}\n")
-        f.write(f"AI Decision: {ai_decision}\n")
-        f.write(f"User Feedback: {user_feedback}\n")
-        f.write("=" * 50 + "\n")
+async def save_trade_data(trade_info, ai_decision, user_feedback, store=None):
+    """Save trade information, AI decision, and user feedback to the feedback store."""
+    store = store or feedback_store
+    await store.add_async(trade_info, ai_decision=ai_decision, user_feedback=user_feedback)
+    if user_feedback in ("yes", "no"):
+        await online_model().sync_async(store)
+
+# Collects the text of every proposal on the Trade Proposals page in one pass.
+# Each proposal's card is the largest ancestor of its Negotiate button that
+# contains no other Negotiate button.
+PROPOSAL_CARDS_JS = """
+() => {
+  const isNegotiate = (b) => b.textContent.trim() === "Negotiate";
+  const buttons = [...document.querySelectorAll("button")].filter(isNegotiate);
+  return buttons.map((button, index) => {
+    let card = button;
+    while (card.parentElement &&
+           [...card.parentElement.querySelectorAll("button")].filter(isNegotiate).length === 1) {
+      card = card.parentElement;
+    }
+    return { index, text: card.innerText.replace(/\\bNegotiate\\b/g, "").trim() };
+  });
+}
+"""
+
+def proposal_fingerprint(text: str) -> str:
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+async def scrape_trade_proposals(page):
+    """Return [{index, text, fingerprint}] for every proposal currently listed."""
+    await page.wait_for_selector('button:has-text("Negotiate")', state="visible", timeout=5000)
+    proposals = await page.evaluate(PROPOSAL_CARDS_JS)
+    for proposal in proposals:
+        proposal["fingerprint"] = proposal_fingerprint(proposal["text"])
+    return proposals
+
+def score_trades(trades):
+    """Reward-model probabilities for Trade objects: the structured model when trained, else the text model."""
+    if structured_registry.exists():
+        return structured_registry.score(trades)
+    return reward_registry.score([trade.to_text() for trade in trades])
+
+def parse_proposal_trades(texts, snapshot=None):
+    trades = [parse_trade_summary(text) for text in texts]
+    if snapshot is not None:
+        for trade in trades:
+            enrich_from_snapshot(trade, snapshot)
+    return trades
+
+def proposal_model_text(text, trade):
+    """What the text model scores for a proposal: the formatted Trade when the card parses, as in score_trades."""
+    return text if trade.is_empty() else trade.to_text()
+
+def score_proposal_texts(texts, trades=None):
+    """Score proposals in one call per model; returns the probabilities and the registry that scored each one.
+
+    Cards that parse into a Trade go to the structured model when it is
+    trained, otherwise to the text model as Trade.to_text(), the input the
+    sequential path scores. Only cards that do not parse are scored as raw text.
+    """
+    trades = trades if trades is not None else parse_proposal_trades(texts)
+    probs = np.zeros(len(texts))
+    registries = [reward_registry] * len(texts)
+    structured = [i for i, trade in enumerate(trades) if not trade.is_empty()] if structured_registry.exists() else []
+    if structured:
+        probs[structured] = structured_registry.score([trades[i] for i in structured])
+        for i in structured:
+            registries[i] = structured_registry
+    structured_set = set(structured)
+    todo = [i for i in range(len(texts)) if i not in structured_set]
+    if todo:
+        probs[todo] = reward_registry.score([proposal_model_text(texts[i], trades[i]) for i in todo])
+    return probs, registries
+
+async def evaluate_trade_proposals_batch(page, max_accepted=2):
+    """Scrape every proposal, score them in one model call, then execute only the accepted ones."""
+    session = session_for(page)
+    evaluated_proposals = session.evaluated_proposals
+    try:
+        await page.get_by_role("link", name="Trade Proposals").click()
+        await settle(page, "navigate", selector=NEGOTIATE_SELECTOR, timeout=5000)
+        proposals = await scrape_trade_proposals(page)
+        fresh = [p for p in proposals if p["fingerprint"] not in evaluated_proposals]
+        print(f"Found {len(proposals)} trade proposals ({len(fresh)} not yet evaluated)")
+        if not fresh:
+            return True
+
+        # Rules prefilter: illegal offers are rejected before any model work
+        texts = [p["text"] for p in fresh]
+        # re-export first: payrolls and rosters change with every trade executed below
+        trades = parse_proposal_trades(texts, await refresh_league_export(page))
+        report = check_trades(trades, current_trade_rules(page))
+        legal = [i for i in range(len(fresh)) if report.legal[i]]
+        probs = np.zeros(len(fresh))
+        registries = [reward_registry] * len(fresh)
+        if legal:
+            legal_probs, legal_registries = score_proposal_texts([texts[i] for i in legal], [trades[i] for i in legal])
+            probs[legal] = legal_probs
+            for i, registry in zip(legal, legal_registries):
+                registries[i] = registry
+        if report.illegal_count:
+            print(f"{report.illegal_count} proposals rejected by trade rules")
+
+        accepted = []
+        for i, (proposal, prob) in enumerate(zip(fresh, probs)):
+            evaluated_proposals.add(proposal["fingerprint"])
+            if not report.legal[i]:
+                print(f"Illegal proposal: {'; '.join(report.reasons[i])}")
+                await log_trade_evaluation(proposal["text"], "REJECT", 1.0, trade=trades[i], model_version="rules")
+                continue
+            decision = "ACCEPT" if prob > 0.5 else "REJECT"
+            # one at a time: this may prompt the human for a label
+            await log_trade_evaluation(proposal_model_text(proposal["text"], trades[i]), decision, abs(prob - 0.5) * 2,
+                                       trade=trades[i], registry=registries[i])
+            if decision == "ACCEPT":
+                accepted.append((prob, proposal["fingerprint"]))
+
+        # Best offers first; indices shift after each executed trade, so re-locate by fingerprint
+        for prob, fingerprint in sorted(accepted, reverse=True)[:max_accepted]:
+            current = {p["fingerprint"]: p["index"] for p in await scrape_trade_proposals(page)}
+            if fingerprint not in current:
+                continue
+            print(f"Accepting trade proposal (p={prob:.2f})")
+            old_url = page.url
+            await page.get_by_role("button", name="Negotiate").nth(current[fingerprint]).click()
+            await settle(page, "negotiate", url_changed_from=old_url, selector=TRADE_SUMMARY_SELECTOR)
+            await page.get_by_role("button", name="Propose trade").click()
+            await settle(page, "propose_trade")
+            session.trades_made += 1
+            await page.get_by_role("link", name="Trade Proposals").click()
+            await settle(page, "navigate", selector=NEGOTIATE_SELECTOR, timeout=5000)
+    except Exception as e:
+        print(f"Error in evaluate_trade_proposals_batch: {str(e)}")
+        return False
+    return True
 
 async def evaluate_trade_proposals(page):
+    if BATCH_TRADE_EVALUATION:
+        return await evaluate_trade_proposals_batch(page)
     try:
         # Navigate to trade proposals
         await page.get_by_role("link", name="Trade Proposals").click()
-        await asyncio.sleep(2)  # Wait for page to load
+        await settle(page, "navigate", selector=NEGOTIATE_SELECTOR, timeout=5000)
         done = 0
         
         for i in range(4):  # Keep checking for new trade proposals
@@ -387,9 +671,10 @@ async def evaluate_trade_proposals(page):
                         if i >= len(buttons):
                             break
                             
-                        # Click negotiate
+                        # Click negotiate and wait for the trade summary instead of a fixed sleep
+                        old_url = page.url
                         await buttons[i].click()
-                        await asyncio.sleep(1)  # Wait for trade modal
+                        await settle(page, "negotiate", url_changed_from=old_url, selector=TRADE_SUMMARY_SELECTOR)
                         
                         # Evaluate trade using reward model
                         decision, confidence = await evaluate_trade_logic(page)
@@ -400,23 +685,25 @@ async def evaluate_trade_proposals(page):
                         if decision == "ACCEPT":
                             print(f"Accepting trade proposal {i+1}")
                             await page.get_by_role("button", name="Propose trade").click()
-                            await asyncio.sleep(2)  # Wait for trade to process
+                            await settle(page, "propose_trade")  # Wait for trade to process
+                            session_for(page).trades_made += 1
                             
                         else:
                             print(f"Rejecting trade proposal {i+1}")
+                            old_url = page.url
                             await page.go_back()
-                            await asyncio.sleep(1)  # Wait for page to settle
+                            await settle(page, "navigate", url_changed_from=old_url)
                         done += 1   
                         # Go back to trade proposals page
                         await page.get_by_role("link", name="Trade Proposals").click()
-                        await asyncio.sleep(2)  # Wait for page to load
+                        await settle(page, "navigate", selector=NEGOTIATE_SELECTOR, timeout=5000)
                         
                     except Exception as e:
                         print(f"Error processing trade proposal {i+1}: {str(e)}")
                         # Try to recover by going back to trade proposals
                         try:
                             await page.get_by_role("link", name="Trade Proposals").click()
-                            await asyncio.sleep(2)
+                            await settle(page, "navigate", selector=NEGOTIATE_SELECTOR, timeout=5000)
                         except:
                             pass
                         continue
@@ -435,13 +722,34 @@ async def main():
     with open("instructions.txt", "r") as f:
         task = f.read()
 
-    model = ChatOpenAI(model='gpt-4o')
-    agent = Agent(task=task, llm=model, controller=controller)
-
-    await agent.run(
-        on_step_start=state_hook,
-        on_step_end=router_hook
-    )
+    # Load the reward model up front; later retrains are picked up without a restart
+    try:
+        reward_registry.refresh()
+    except Exception as e:
+        logger.warning(f"Reward model not loaded at startup: {e}")
+
+    model = ChatOpenAI(model='gpt-4o', **sdk_kwargs(http_client_arg="http_async_client"))
+    if not fast_browse.enabled():
+        agent = Agent(task=task, llm=model, controller=controller)
+        await agent.run(
+            on_step_start=state_hook,
+            on_step_end=router_hook
+        )
+        return
+
+    # GM_FAST_BROWSE=1: headless, small viewport, no images/fonts/ads/animations
+    async with async_playwright() as pw:
+        browser = await fast_browse.launch(pw)
+        context = await fast_browse.new_context(browser)
+        agent = Agent(task=task, llm=model, controller=controller,
+                      browser_session=BrowserSession(browser_context=context, keep_alive=True))
+        try:
+            await agent.run(
+                on_step_start=state_hook,
+                on_step_end=router_hook
+            )
+        finally:
+            await browser.close()
     
    
 
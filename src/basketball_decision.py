@@ -1,10 +1,14 @@
 from typing import Any, Dict
-from langchain_openai import ChatOpenAI
 import json
 import os
+import sys
 from datetime import datetime
 import logging
 
+# Shared LLM client pool lives next to the browser agents
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "browse_use"))
+from llm_pool import create_chat_completion
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -48,8 +52,6 @@ async def make_basketball_decision(state: Dict[str, Any]) -> str:
     logger.info("STARTING NEW BASKETBALL DECISION")
     logger.info(f"Input state: {json.dumps(state, indent=2)}")
     
-    llm = ChatOpenAI(model="gpt-4o")
-    
     # Create a detailed prompt for the LLM
     prompt = f"""You are a basketball team manager at the trade deadline. Analyze the current state and make a strategic decision.
 
@@ -95,12 +97,16 @@ Make sure to:
 
     # Get response from LLM
     logger.info("Sending request to LLM...")
-    response = await llm.ainvoke(prompt)
-    logger.info(f"Received response from LLM: {response.content[:200]}...")
+    response = await create_chat_completion(
+        model="gpt-4o",
+        messages=[{"role": "user", "content": prompt}]
+    )
+    content = response.choices[0].message.content
+    logger.info(f"Received response from LLM: {content[:200]}...")
     
     try:
         # Try to parse as JSON
-        decision_data = json.loads(response.content)
+        decision_data = json.loads(content)
         
         # Ensure tool_calls exists
         if 'tool_calls' not in decision_data:
@@ -131,11 +137,11 @@ Make sure to:
         # Log the error
         error_data = {
             "error": str(e),
-            "raw_response": response.content
+            "raw_response": content
         }
         logger.error(f"Error processing response: {str(e)}")
         log_decision(state, error_data, "basketball_errors.log")
         logger.info("="*80)
         
         # Fallback if JSON parsing fails
-        return f"DECISION: Continue with current strategy\nREASONING: {response.content}\nERROR: {str(e)}" 
\ No newline at end of file
+        return f"DECISION: Continue with current strategy\nREASONING: {content}\nERROR: {str(e)}" 
\ No newline at end of file
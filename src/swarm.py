@@ -1,6 +1,11 @@
 from typing import Any, Dict, List
-from langchain_openai import ChatOpenAI
 import json
+import os
+import sys
+
+# Shared LLM client pool (and its record/replay cassette) lives next to the browser agents
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "browse_use"))
+from llm_pool import create_chat_completion
 
 def make_trade() -> str:
     """Decide whether or not to make a trade, and if you decide to make a trade return the players traded."""
@@ -18,8 +23,6 @@ async def basketball_decision(state: Dict[str, Any]) -> str:
     """
     Given the current browser/game state, make a decision using a single LLM call.
     """
-    llm = ChatOpenAI(model="gpt-4o")
-    
     # Create a detailed prompt for the LLM
     prompt = f"""You are a basketball team manager at the trade deadline. Analyze the current state and make a strategic decision.
 
@@ -48,15 +51,16 @@ Return your decision in the following JSON format:
 Make sure to focus on immediate actions that can improve the team's performance."""
 
     # Get response from LLM
-    response = await llm.ainvoke(prompt)
+    response = await create_chat_completion(model="gpt-4o", messages=[{"role": "user", "content": prompt}])
+    content = response.choices[0].message.content
     
     try:
         # Try to parse as JSON
-        decision_data = json.loads(response.content)
+        decision_data = json.loads(content)
         return f"DECISION: {decision_data['decision']}\nREASONING: {decision_data['reasoning']}\nNEXT STEPS:\n" + "\n".join(f"- {step}" for step in decision_data['next_steps'])
     except:
         # Fallback if JSON parsing fails
-        return f"DECISION: Continue with current strategy\nREASONING: {response.content}"
+        return f"DECISION: Continue with current strategy\nREASONING: {content}"
 
 if __name__ == "__main__":
     import asyncio